@@ -9,7 +9,7 @@ sys.path.insert(0, os.path.abspath('src'))
 block_cipher = None
 
 a = Analysis(
-    ['src/salary_reader/main.py'],
+    ['src/salary_reader/startup.py'],
     pathex=[],
     binaries=[],
     datas=[
@@ -63,15 +63,8 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[
-        'numpy',
-        'numpy.core',
-        'numpy.core._multiarray_umath',
-        'numpy.core._multiarray_tests',
-        'numpy.libs',
-        'numpy.libs._multiarray_umath',
-        'numpy.libs._multiarray_tests',
-    ],
+    # Замена iiko для тестов и бенчмарков не входит в сборку
+    excludes=['salary_reader.testing'],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -0,0 +1,99 @@
+"""
+Задержка запросов к БД приложения для поиска, который используют control_models и drivers/attendances.py:
+сотрудники программы, программы отдела, пороги программы, отделы сотрудников и снимок для расчета.
+
+Каждый запрос замеряется на БД после миграций (indexed) и без вторичных индексов (no_indexes),
+чтобы было видно, что дают индексы из core/migrations.py.
+"""
+import pytest
+
+from conftest import SIZES
+
+# Сколько раз повторить поиск по всем программам (отделам) в одном замере
+REPEAT = 20
+
+
+@pytest.fixture(params=["indexed", "no_indexes"])
+def db_session(request, dataset):
+    from sqlalchemy import text
+
+    from salary_reader.core.database import engine, get_session
+    from salary_reader.core.migrations import MIGRATIONS, migrate
+
+    index_names = [
+        statement.split()[5] for migration in MIGRATIONS for statement in migration.statements
+        if statement.startswith("CREATE INDEX")
+    ]
+    if request.param == "no_indexes":
+        with engine.begin() as connection:
+            for name in index_names:
+                connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            connection.exec_driver_sql("PRAGMA user_version = 0")
+            connection.exec_driver_sql("ANALYZE")
+    try:
+        with get_session() as session:
+            yield session
+    finally:
+        migrate(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+
+
+@pytest.fixture
+def program_ids(dataset):
+    from salary_reader.core.database import get_session
+    from salary_reader.core.models import MotivationProgram
+
+    with get_session() as session:
+        return [program_id for program_id, in session.query(MotivationProgram.id)]
+
+
+def test_db_employees_by_program(bench, db_session, program_ids):
+    from salary_reader.core.models import Employee
+
+    # Как get_employees_by_motivation_program_id и заполнение таблицы сотрудников программы
+    def lookup():
+        return [db_session.query(Employee.id).filter(Employee.motivation_program_id == program_id).all()
+                for _ in range(REPEAT) for program_id in program_ids]
+
+    assert any(bench(lookup))
+
+
+def test_db_thresholds_by_program(bench, db_session, program_ids):
+    from salary_reader.core.models import MotivationThreshold
+
+    # Как ThresholdsTableController.load_data: пороги программы по возрастанию выручки
+    def lookup():
+        return [
+            db_session.query(MotivationThreshold.revenue_threshold, MotivationThreshold.salary)
+            .filter(MotivationThreshold.motivation_program_id == program_id)
+            .order_by(MotivationThreshold.revenue_threshold).all()
+            for _ in range(REPEAT) for program_id in program_ids
+        ]
+
+    assert all(bench(lookup))
+
+
+def test_db_programs_by_department(bench, db_session, dataset):
+    from salary_reader.core.models import Department, MotivationProgram
+
+    department_codes = [department["code"] for department in dataset.departments]
+
+    # Как get_current_roles_by_department_code
+    def lookup():
+        return [
+            db_session.query(MotivationProgram).join(Department).filter(Department.code == department_code).all()
+            for _ in range(REPEAT) for department_code in department_codes
+        ]
+
+    assert all(bench(lookup))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_db_compute_snapshot(bench, db_session, dataset, size):
+    from salary_reader.drivers.snapshot import load_compute_snapshot
+
+    # Как AttendancesDataDriver.prepare_data: сотрудники, их отделы, программы и пороги
+    employee_ids = [employee["id"] for employee in dataset.employees if employee.get("code")][:size]
+    snapshot = bench(load_compute_snapshot, db_session, employee_ids)
+    assert snapshot.get_employee(employee_ids[0])
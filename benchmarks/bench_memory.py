@@ -0,0 +1,23 @@
+"""
+Память, которую занимают явки после разбора: объекты Attendance в AttendancesList и колонки payroll_engine.
+Результат - байт на явку.
+"""
+import pytest
+
+from conftest import SIZES, attendances_list
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_attendances_list_memory(bench_memory, attendances_for, period, size):
+    api_attendances = attendances_for(size)
+    attendances = bench_memory(attendances_list, len(api_attendances), api_attendances, period)
+    assert len(attendances)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_attendance_columns_memory(bench_memory, attendances_for, period, size):
+    payroll_engine = pytest.importorskip("salary_reader.drivers.payroll_engine")
+
+    api_attendances = attendances_for(size)
+    columns = bench_memory(payroll_engine.AttendanceColumns.from_api, len(api_attendances), api_attendances, *period)
+    assert len(columns)
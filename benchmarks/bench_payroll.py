@@ -0,0 +1,117 @@
+"""
+Бенчмарки подготовки явок, расчета зарплат, отрисовки сводной таблицы и выгрузок на 10/100/1000 сотрудников.
+"""
+import pytest
+
+from conftest import SIZES, attendances_list as _attendances_list
+
+from salary_reader.drivers.salary import ThresholdIndex, calculate_salaries
+
+THRESHOLDS = ThresholdIndex([(0, 1500), (100_000, 2000), (180_000, 2500)])
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_parse_attendances(bench, attendances_for, period, size):
+    bench(_attendances_list, attendances_for(size), period)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_attendances_list_general_row_data(bench, attendances_for, period, size):
+    attendances = _attendances_list(attendances_for(size), period)
+    rows = bench(lambda: [attendances.get_general_row_data(employee_id) for employee_id in attendances.attendances])
+    assert len(rows) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_calculate_salaries(bench, attendances_for, period, sales, size):
+    attendances = _attendances_list(attendances_for(size), period)
+    items = [
+        (THRESHOLDS, sales.get(date_, 0), data["hours_duration"] * 3600)
+        for employee_id in attendances.attendances
+        for date_, data in attendances.get_general_row_data(employee_id)["shifts"].items()
+    ]
+    salaries = bench(calculate_salaries, items)
+    assert len(salaries) == len(items)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_prepare_data(bench, dataset, driver_for, attendances_for, size):
+    driver = driver_for(size)
+
+    def prepare():
+        # prepare_data освобождает исходные записи, перед каждым замером они загружаются заново
+        driver.api_attendances = attendances_for(size)
+        driver.prepare_data()
+
+    bench(prepare)
+    assert len(driver.employees_attendances.attendances) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_driver_calculate_salary(bench, dataset, driver_for, size):
+    driver = driver_for(size)
+    driver.prepare_data()
+    shifts = [
+        (employee_id, date_, data["shift_type"], int(data["hours_duration"] * 3600))
+        for employee_id in driver.employees_attendances.attendances
+        for date_, data in driver.employees_attendances.get_general_row_data(employee_id)["shifts"].items()
+    ]
+    bench(lambda: [driver.calculate_salary(*shift) for shift in shifts])
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["no_cache", "warm_cache"])
+@pytest.mark.parametrize("size", SIZES)
+def test_general_table_rows(bench, dataset, driver_for, size, cached):
+    from salary_reader.drivers.payroll_cache import PayrollCache
+
+    driver = driver_for(size)
+    driver.prepare_data()
+    if cached:
+        # Повторное обновление того же периода: явки, выручка и программы не изменились
+        driver.payroll_cache = PayrollCache("sqlite://")
+        driver.get_general_table_rows()
+    rows = bench(driver.get_general_table_rows)
+    assert len(rows) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_render_general_table(bench, dataset, qt_app, driver_for, size):
+    from PySide6.QtWidgets import QTableView
+
+    table = QTableView()
+    driver = driver_for(size, table)
+    driver.prepare_data()
+    bench(driver.render_general_table)
+    assert driver.general_model.rowCount() == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_generate_payslip_report(bench, dataset, qt_app, driver_for, period, size, tmp_path, monkeypatch):
+    from salary_reader.payslip_report import payslip_report
+    from salary_reader.payslip_report.payslip_report import ReportGenerator
+
+    driver = driver_for(size)
+    driver.prepare_data()
+    driver.general_model.set_rows(driver.get_general_table_rows())
+
+    # PDF пишется в текущий каталог и открывается программой просмотра
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(payslip_report.subprocess, "run", lambda *args, **kwargs: None)
+    monkeypatch.setattr(payslip_report.os, "startfile", lambda path: None, raising=False)
+    # create_payslip_pdf собирает сотрудников и удержания из модели и вызывает generate_payslip_report
+    bench(ReportGenerator(driver).create_payslip_pdf, *period)
+    assert (tmp_path / "payslip_report.pdf").exists()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_export_to_excel(bench, dataset, qt_app, driver_for, size, tmp_path):
+    from salary_reader.drivers.excel_export import collect_export_data, write_salary_workbook
+
+    driver = driver_for(size)
+    driver.prepare_data()
+    driver.general_model.set_rows(driver.get_general_table_rows())
+
+    # Как в SalaryReader.export_to_excel: сбор данных в потоке GUI и запись книги (в приложении - в фоне)
+    path = tmp_path / "salary_table.xlsx"
+    bench(lambda: write_salary_workbook(path, collect_export_data(driver)))
+    assert path.exists()
@@ -0,0 +1,259 @@
+"""
+Бенчмарки горячих путей расчета зарплат (pytest).
+
+Запуск (в обычный запуск pytest бенчмарки не входят, см. testpaths в pyproject.toml):
+    PYTHONPATH=src python -m pytest benchmarks -q --bench-save-baseline   # записать базовые значения
+    PYTHONPATH=src python -m pytest benchmarks -q                         # сравнить с ними
+
+Данные синтетические с фиксированным seed (salary_reader.testing.fake_iiko), БД создается во временном каталоге,
+вместо iiko используется локальная замена с тем же набором данных.
+Каждый замер сравнивается с базовым: тест падает, если медиана больше базовой в --bench-threshold раз.
+Замеры памяти (фикстура bench_memory) хранятся там же, в байтах на элемент.
+Время зависит от машины, поэтому базовые значения не хранятся в репозитории: они записываются в кэш pytest
+(.pytest_cache) той машины, на которой потом сравниваются. Без записанной базы замеры только выводятся.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from salary_reader.testing.fake_iiko import generate_dataset, install_fake_iiko
+
+# Ключ базовых значений в кэше pytest (config.cache)
+BASELINE_CACHE_KEY = "salary_reader/bench_baseline"
+DEFAULT_THRESHOLD = 1.5
+DEFAULT_ROUNDS = 3
+# Разница меньше этой (секунды) не считается регрессией: короткие замеры слишком шумные
+MIN_REGRESSION_SECONDS = 0.01
+# То же для замеров памяти (байт на элемент)
+MIN_REGRESSION_BYTES = 16
+
+# Количество сотрудников в замерах
+SIZES = (10, 100, 1000)
+DATASET_SEED = 42
+DAYS = 31
+
+# Один отдел, max(SIZES) сотрудников, месяц явок
+DATASET = generate_dataset(departments=1, employees=max(SIZES), days=DAYS, seed=DATASET_SEED)
+
+# До импорта остальных модулей salary_reader: отдельная БД, замена iiko с набором DATASET и Qt без дисплея
+_bench_dir = Path(tempfile.mkdtemp(prefix="salary-bench-"))
+(_bench_dir / "dataset.json").write_text(DATASET.to_json(), encoding="utf-8")
+os.environ.setdefault("SALARY_READER_DB_PATH", str(_bench_dir / "bench.db"))
+os.environ.setdefault("SALARY_READER_LOG_DIR", str(_bench_dir / "logs"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+install_fake_iiko(str(_bench_dir / "dataset.json"))
+
+
+def attendances_list(api_attendances: list[dict], period):
+    """Разбирает записи iiko в AttendancesList, как prepare_data, но без проверки сотрудников в БД."""
+    from salary_reader.drivers.attendance_list import AttendanceParseStats, AttendancesList, parse_api_attendance
+
+    attendances = AttendancesList()
+    stats = AttendanceParseStats()
+    for api_attendance in api_attendances:
+        attendance = parse_api_attendance(api_attendance, *period, stats)
+        if attendance is not None:
+            attendances.add_attendance(attendance)
+    return attendances
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-save-baseline", action="store_true", help="записать результаты как базовые значения этой машины")
+    group.addoption("--bench-threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="во сколько раз замер может превышать базовый")
+    group.addoption("--bench-rounds", type=int, default=DEFAULT_ROUNDS, help="сколько раз повторять замер")
+
+
+def pytest_collect_file(file_path, parent):
+    # Файлы бенчмарков называются bench_*.py, чтобы не попадать в обычный запуск тестов (pytest tests)
+    if file_path.suffix == ".py" and file_path.name.startswith("bench_"):
+        return pytest.Module.from_parent(parent, path=file_path)
+
+
+def pytest_configure(config):
+    config.bench_results = {}
+    config.bench_memory = {}
+    # Без кэша pytest (-p no:cacheprovider) сравнивать не с чем
+    cache = getattr(config, "cache", None)
+    if cache is None and config.getoption("--bench-save-baseline", default=False):
+        raise pytest.UsageError("--bench-save-baseline требует кэш pytest (без -p no:cacheprovider)")
+    config.bench_baseline = cache.get(BASELINE_CACHE_KEY, {}) if cache is not None else {}
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    cache = getattr(config, "cache", None)
+    if config.getoption("--bench-save-baseline", default=False) and (config.bench_results or config.bench_memory):
+        baseline = dict(config.bench_baseline)
+        baseline.update(config.bench_results)
+        baseline.update(config.bench_memory)
+        cache.set(BASELINE_CACHE_KEY, dict(sorted(baseline.items())))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    sections = (
+        ("benchmarks (медиана, с)", getattr(config, "bench_results", None)),
+        ("benchmarks (память, байт на элемент)", getattr(config, "bench_memory", None)),
+    )
+    for title, results in sections:
+        if not results:
+            continue
+        terminalreporter.section(title)
+        for name, value in sorted(results.items()):
+            base = config.bench_baseline.get(name)
+            ratio = f"x{value / base:.2f}" if base else "нет базы"
+            terminalreporter.write_line(f"{name:60} {value:10.4f}  {ratio}")
+
+
+def _check_regression(config, name: str, value: float, min_difference: float, unit: str) -> None:
+    base = config.bench_baseline.get(name)
+    threshold = config.getoption("--bench-threshold", default=DEFAULT_THRESHOLD)
+    regressed = base and value > base * threshold and value - base > min_difference
+    if regressed and not config.getoption("--bench-save-baseline", default=False):
+        pytest.fail(f"{name}: {value:.4f} {unit}, базовое {base:.4f} {unit} (порог x{threshold})")
+
+
+@pytest.fixture
+def bench(request):
+    """
+    Замеряет функцию: bench(fn, *args) выполняет ее --bench-rounds раз и возвращает результат последнего вызова.
+    Медиана сохраняется под именем теста и сравнивается с базовой.
+    """
+    config = request.config
+
+    def run(fn, *args, **kwargs):
+        samples = []
+        result = None
+        for _ in range(config.getoption("--bench-rounds", default=DEFAULT_ROUNDS)):
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            samples.append(time.perf_counter() - started)
+
+        name = request.node.name
+        median = statistics.median(samples)
+        config.bench_results[name] = round(median, 6)
+        _check_regression(config, name, median, MIN_REGRESSION_SECONDS, "с")
+        return result
+
+    return run
+
+
+@pytest.fixture
+def bench_memory(request):
+    """
+    Замеряет память: bench_memory(fn, count, *args) вызывает fn и делит память, которую занимает ее результат
+    (по tracemalloc), на count. Значение сохраняется под именем теста и сравнивается с базовым.
+    """
+    config = request.config
+
+    def run(fn, count: int, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            result = fn(*args, **kwargs)
+            allocated = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+        name = request.node.name
+        per_item = allocated / max(count, 1)
+        config.bench_memory[name] = round(per_item, 1)
+        _check_regression(config, name, per_item, MIN_REGRESSION_BYTES, "байт")
+        return result
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """
+    Набор DATASET. Сотрудники, отдел и программы мотивации (по одной на роль, с порогами)
+    записываются в БД бенчмарков.
+    """
+    from sqlalchemy import update
+
+    from salary_reader.core.database import get_session
+    from salary_reader.core.models import Employee, MotivationProgram, MotivationThreshold
+    from salary_reader.iiko_business_api.employees import IikoDirectory, sync_employees
+    from salary_reader.testing.fake_iiko import add_departments
+
+    data = DATASET
+    department_code = data.departments[0]["code"]
+    with get_session() as session:
+        add_departments(session, data)
+        sync_employees(session, IikoDirectory(data.employees, data.roles))
+        for role in data.roles:
+            program = MotivationProgram(name=role["name"], department_code=department_code)
+            program.thresholds = [
+                MotivationThreshold(revenue_threshold=0, salary=1500),
+                MotivationThreshold(revenue_threshold=100_000, salary=2000),
+                MotivationThreshold(revenue_threshold=180_000, salary=2500),
+            ]
+            session.add(program)
+            session.flush()
+            session.execute(update(Employee).where(Employee.position == role["name"])
+                            .values(motivation_program_id=program.id))
+        session.commit()
+    return data
+
+
+@pytest.fixture(scope="session")
+def period(dataset):
+    from datetime import date
+
+    days = sorted(dataset.sales[dataset.departments[0]["code"]])
+    return date.fromisoformat(days[0]), date.fromisoformat(days[-1])
+
+
+@pytest.fixture(scope="session")
+def attendances_for(dataset):
+    """attendances_for(size) - явки первых size сотрудников набора (служебные аккаунты не считаются)."""
+    employee_ids = [employee["id"] for employee in dataset.employees if employee.get("code")]
+
+    def select(size: int) -> list[dict]:
+        selected = set(employee_ids[:size])
+        return [attendance for attendance in dataset.attendances if attendance["employeeId"] in selected]
+
+    return select
+
+
+@pytest.fixture(scope="session")
+def sales(dataset):
+    from datetime import date
+
+    return {date.fromisoformat(day): revenue for day, revenue in dataset.sales[dataset.departments[0]["code"]].items()}
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def driver_for(attendances_for, sales, period):
+    """
+    driver_for(size, table=None) - драйвер с загруженными явками size сотрудников (как после fetch_data).
+    Пропускает тест, если драйвер нельзя импортировать (не установлен iiko_api).
+    """
+    pytest.importorskip("iiko_api")
+    from salary_reader.drivers.attendances import AttendancesDataDriver
+
+    def create(size: int, table=None):
+        driver = AttendancesDataDriver(table)
+        driver.api_attendances = attendances_for(size)
+        driver.sales = dict(sales)
+        driver.period_date_from, driver.period_date_to = period
+        return driver
+
+    return create
@@ -0,0 +1,231 @@
+"""
+Замеры времени запуска приложения.
+
+Каждый замер выполняется в отдельном процессе, чтобы импортированные модули не переиспользовались между замерами.
+Qt работает с платформой offscreen, поэтому замеры можно выполнять без дисплея.
+Результаты сохраняются в JSON (по умолчанию benchmarks/results/startup-<commit>.json) и сравниваются между коммитами.
+
+Примеры:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --repeat 10 --output before.json
+    python benchmarks/startup_benchmark.py --executable dist/SalaryReader.exe
+    python benchmarks/startup_benchmark.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SRC_PATH = PROJECT_ROOT / "src"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Модули, стоимость импорта которых замеряется отдельно
+MODULES = (
+    "PySide6.QtCore",
+    "PySide6.QtGui",
+    "PySide6.QtWidgets",
+    "qframelesswindow",
+    "sqlalchemy",
+    "openpyxl",
+    "reportlab.pdfgen.canvas",
+    "reportlab.platypus",
+    "iiko_api",
+    "salary_reader.main",
+)
+
+_IMPORT_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import {module}
+print(json.dumps(time.perf_counter() - started))
+"""
+
+_DB_OPEN_SNIPPET = """
+import json, time
+started = time.perf_counter()
+from salary_reader.core.database import get_session
+from salary_reader.core.models import Department
+with get_session() as session:
+    session.query(Department).first()
+print(json.dumps(time.perf_counter() - started))
+"""
+
+# Отметки запуска приложения, см. salary_reader.core.startup_timing
+STARTUP_MARKS = ("splash_shown", "modules_imported", "window_created", "first_paint", "interactive")
+
+
+def _environment() -> dict[str, str]:
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_PATH), env.get("PYTHONPATH")]))
+    return env
+
+
+def _run_snippet(snippet: str, timeout: float) -> float:
+    """Выполняет код в новом интерпретаторе и возвращает напечатанное им время в секундах."""
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet], env=_environment(), cwd=PROJECT_ROOT,
+        capture_output=True, text=True, timeout=timeout,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "ошибка")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _run_app(command: list[str], timeout: float) -> dict[str, float]:
+    """
+    Запускает приложение до состояния interactive и возвращает отметки запуска.
+    Приложение завершается само (SALARY_READER_EXIT_AFTER_STARTUP).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        report_path = Path(directory) / "startup.json"
+        env = _environment()
+        env["SALARY_READER_STARTUP_REPORT"] = str(report_path)
+        env["SALARY_READER_EXIT_AFTER_STARTUP"] = "1"
+
+        started = time.perf_counter()
+        completed = subprocess.run(command, env=env, cwd=PROJECT_ROOT, capture_output=True, text=True,
+                                   timeout=timeout)
+        wall_time = time.perf_counter() - started
+        if not report_path.exists():
+            stderr = completed.stderr.strip().splitlines()
+            raise RuntimeError(stderr[-1] if stderr else f"код возврата {completed.returncode}")
+
+        marks = json.loads(report_path.read_text(encoding="utf-8"))
+        marks["process_wall_time"] = wall_time
+        return marks
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {
+        "median": round(statistics.median(samples), 4),
+        "min": round(min(samples), 4),
+        "max": round(max(samples), 4),
+    }
+
+
+def _measure(name: str, measure, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        try:
+            samples.append(measure())
+        except Exception as e:
+            print(f"  {name}: {e}", file=sys.stderr)
+            return {"error": str(e)}
+    result = _summary(samples)
+    print(f"  {name}: {result['median']:.3f} с")
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(repeat: int, executable: str | None, timeout: float) -> dict:
+    """
+    Выполняет все замеры.
+
+    :param repeat: Сколько раз повторять каждый замер.
+    :param executable: Путь к собранному приложению (PyInstaller). Если задан, замеряется запуск сборки.
+    :param timeout: Ограничение времени одного запуска в секундах.
+    """
+    results = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "imports": {},
+    }
+
+    print("Импорт модулей:")
+    for module in MODULES:
+        results["imports"][module] = _measure(
+            module, lambda: _run_snippet(_IMPORT_SNIPPET.format(module=module), timeout), repeat)
+
+    print("Открытие БД:")
+    results["db_open"] = _measure("db_open", lambda: _run_snippet(_DB_OPEN_SNIPPET, timeout), repeat)
+
+    print("Запуск приложения:")
+    command = [executable] if executable else [sys.executable, "-m", "salary_reader.startup"]
+    results["executable"] = executable
+    runs = []
+    for _ in range(repeat):
+        try:
+            runs.append(_run_app(command, timeout))
+        except Exception as e:
+            print(f"  startup: {e}", file=sys.stderr)
+            results["startup"] = {"error": str(e)}
+            break
+    else:
+        results["startup"] = {
+            mark: _summary([run[mark] for run in runs])
+            for mark in STARTUP_MARKS + ("process_wall_time",) if all(mark in run for run in runs)
+        }
+        for mark, summary in results["startup"].items():
+            print(f"  {mark}: {summary['median']:.3f} с")
+    return results
+
+
+def _flatten(results: dict) -> dict[str, float]:
+    """Медианы всех замеров: {"imports.openpyxl": 0.12, "startup.interactive": 1.9, ...}."""
+    flat = {}
+    for section in ("imports", "startup"):
+        for name, summary in results.get(section, {}).items():
+            if isinstance(summary, dict) and "median" in summary:
+                flat[f"{section}.{name}"] = summary["median"]
+    if "median" in results.get("db_open", {}):
+        flat["db_open"] = results["db_open"]["median"]
+    return flat
+
+
+def compare(before_path: Path, after_path: Path) -> None:
+    """Печатает изменение медиан между двумя результатами."""
+    before = json.loads(before_path.read_text(encoding="utf-8"))
+    after = json.loads(after_path.read_text(encoding="utf-8"))
+    before_flat, after_flat = _flatten(before), _flatten(after)
+
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for name in sorted(before_flat.keys() | after_flat.keys()):
+        old, new = before_flat.get(name), after_flat.get(name)
+        if old is None or new is None:
+            print(f"  {name:45} {old!s:>8} -> {new!s:>8}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"  {name:45} {old:8.3f} -> {new:8.3f} ({change:+.1f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замеры времени запуска SalaryReader")
+    parser.add_argument("--repeat", type=int, default=5, help="сколько раз повторять каждый замер")
+    parser.add_argument("--executable", help="путь к собранному приложению (PyInstaller)")
+    parser.add_argument("--timeout", type=float, default=120, help="ограничение времени одного запуска, с")
+    parser.add_argument("--output", type=Path, help="куда сохранить результат (JSON)")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BEFORE", "AFTER"),
+                        help="сравнить два сохраненных результата")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run_benchmark(args.repeat, args.executable, args.timeout)
+    output = args.output or RESULTS_DIR / f"startup-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Результат сохранен в {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,7 +34,7 @@ def build_executable():
         '--clean',
         '--noconfirm',
         # Добавляем точку входа
-        'src/salary_reader/main.py',
+        'src/salary_reader/startup.py',
     ]
 
     # Добавляем ресурсы
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import os
 
@@ -5,7 +6,8 @@ import os
 sys.path.insert(0, os.path.abspath('src'))
 
 # Импортируем функцию запуска
-from salary_reader.main import run
+from salary_reader.startup import run
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     run()
\ No newline at end of file
@@ -6,16 +6,18 @@
 #  либо тольок принимается ими
 #  (Полагаю лучше сделать так чтобы все функции в этом модуле принимали объект сессии)
 #  иначе возникают конфликты, когда сессия создается над функцией и повторно в ней
+from dataclasses import dataclass
 from typing import Any, Type
 
+from sqlalchemy import ColumnElement, and_, delete, func, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
 
 from loguru import logger
 from iiko_api import EmployeeNotFoundError
 
 from .database import get_session
-from .models import Employee, Department, MotivationProgram
-from salary_reader.iiko_init import iiko_api, safe_iiko_auth
+from .models import Counter, Employee, Department, MotivationProgram, MotivationThreshold, association_table
+from salary_reader.iiko_init import iiko_api, safe_iiko_auth, call_iiko
 
 
 def save_employee(session: Session, employee_data: dict[str, Any]) -> None:
@@ -77,9 +79,93 @@ def assign_motivation_program(session: Session, employee_id: str, motivation_pro
         employee.motivation_program = motivation_program
 
 
+@dataclass(frozen=True, slots=True)
+class ProgramConflict:
+    """Сотрудник, которого добавляют в программу, но он уже привязан к другой программе."""
+    employee_id: str
+    employee_name: str
+    program_name: str
+
+
+@dataclass(slots=True)
+class ProgramMembershipPlan:
+    """
+    Разница между текущим и желаемым составом программы мотивации.
+
+    :var to_add: Сотрудники без программы, которых нужно привязать.
+    :var to_remove: Сотрудники программы, которых нужно отвязать.
+    :var conflicts: Сотрудники других программ: привязываются, только если пользователь подтвердил замену.
+    :var missing: ID из желаемого состава, которых нет в БД.
+    """
+    to_add: list[str]
+    to_remove: list[str]
+    conflicts: list[ProgramConflict]
+    missing: list[str]
+
+
+def plan_program_membership(session: Session,
+                            motivation_program_id: int | str,
+                            employee_ids: list[str]) -> ProgramMembershipPlan:
+    """
+    Сравнивает текущий состав программы мотивации с желаемым одним запросом.
+
+    :param session: SQLAlchemy сессия для взаимодействия с базой данных.
+    :param motivation_program_id: ID программы мотивации.
+    :param employee_ids: ID сотрудников, которые должны быть привязаны к программе.
+    """
+    motivation_program_id = int(motivation_program_id)
+    desired = dict.fromkeys(employee_ids)
+    rows = session.execute(
+        select(Employee.id, Employee.name, Employee.motivation_program_id, MotivationProgram.name)
+        .outerjoin(MotivationProgram, MotivationProgram.id == Employee.motivation_program_id)
+        .where(or_(Employee.id.in_(list(desired)), Employee.motivation_program_id == motivation_program_id))
+    ).all()
+
+    found = set()
+    plan = ProgramMembershipPlan(to_add=[], to_remove=[], conflicts=[], missing=[])
+    for employee_id, name, program_id, program_name in rows:
+        found.add(employee_id)
+        if employee_id not in desired:
+            plan.to_remove.append(employee_id)
+        elif program_id is None:
+            plan.to_add.append(employee_id)
+        elif program_id != motivation_program_id:
+            plan.conflicts.append(ProgramConflict(employee_id, name, program_name))
+    plan.missing = [employee_id for employee_id in desired if employee_id not in found]
+    return plan
+
+
+def apply_program_membership(session: Session,
+                             motivation_program_id: int | str,
+                             add_ids: list[str],
+                             remove_ids: list[str]) -> None:
+    """
+    Привязывает сотрудников add_ids к программе мотивации и отвязывает remove_ids:
+    по одному UPDATE на каждое направление. Фиксацию транзакции выполняет вызывающий код.
+
+    :param session: SQLAlchemy сессия для взаимодействия с базой данных.
+    :param motivation_program_id: ID программы мотивации.
+    :param add_ids: ID сотрудников, которых нужно привязать (в том числе с заменой другой программы).
+    :param remove_ids: ID сотрудников, которых нужно отвязать. Отвязываются, только если привязаны к этой программе.
+    """
+    motivation_program_id = int(motivation_program_id)
+    if remove_ids:
+        session.execute(
+            update(Employee)
+            .where(Employee.id.in_(remove_ids), Employee.motivation_program_id == motivation_program_id)
+            .values(motivation_program_id=None)
+        )
+    if add_ids:
+        session.execute(
+            update(Employee)
+            .where(Employee.id.in_(add_ids))
+            .values(motivation_program_id=motivation_program_id)
+        )
+
+
 def delete_motivation_program(role_id):
     """
-    Удаляет программу мотивации и все связанные с ней пороги.
+    Удаляет программу мотивации и все связанные с ней пороги и увеличивает счетчик версий программ.
     Поднимает исключение, если программа не найдена.
     :param role_id: id программы мотивации.
     """
@@ -94,6 +180,10 @@ def delete_motivation_program(role_id):
                 for employee in motivation_program.employees:
                     employee.motivation_program = None
 
+                # Счетчик версий сдвигается за версию удаляемой программы: id программы может достаться новой,
+                # и ее версия не должна совпасть с версией удаленной (по ним кэш зарплат отличает расчеты)
+                next_program_version(session)
+
                 # Удаляем саму программу мотивации (это также удалит связанные пороги)
                 session.delete(motivation_program)
 
@@ -121,14 +211,106 @@ def get_current_roles_by_department_code(department_code: str) -> list[Motivatio
     return roles
 
 
-def thresholds_clear(program: MotivationProgram, session: Session):
+def get_departments() -> list[Department]:
     """
-    Удаляет пороги мотивации для указанной программы.
-    :param program: Программа мотивации, для которой нужно удалить пороги.
+    Возвращает список всех отделов.
     """
-    for threshold in program.thresholds:
-        session.delete(threshold)
-    session.commit()
+    with get_session() as session:
+        return session.query(Department).all()
+
+
+PROGRAM_VERSION_COUNTER = "motivation_program_version"
+
+
+def next_program_version(session: Session) -> int:
+    """
+    Выдает новую версию программы мотивации. Фиксацию транзакции выполняет вызывающий код.
+
+    Версии берутся из общего для всех программ счетчика и не повторяются, в том числе после удаления программы.
+    Счетчик создается при первом вызове со значением наибольшей версии среди программ.
+
+    :param session: SQLAlchemy сессия для взаимодействия с базой данных.
+    :return: Новая версия.
+    """
+    session.execute(
+        insert(Counter).prefix_with("OR IGNORE").from_select(
+            ["name", "value"],
+            select(literal(PROGRAM_VERSION_COUNTER), func.coalesce(func.max(MotivationProgram.version), 0)),
+        )
+    )
+    return session.execute(
+        update(Counter)
+        .where(Counter.name == PROGRAM_VERSION_COUNTER)
+        .values(value=Counter.value + 1)
+        .returning(Counter.value)
+    ).scalar_one()
+
+
+@dataclass(slots=True)
+class ThresholdChanges:
+    """Изменения порогов программы мотивации после сохранения таблицы."""
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+def save_program_thresholds(session: Session,
+                            motivation_program_id: int | str,
+                            thresholds: dict[int, int]) -> ThresholdChanges:
+    """
+    Приводит пороги программы мотивации к thresholds: добавляет новые, меняет вознаграждение у изменившихся
+    и удаляет отсутствующие. Пороги сопоставляются по выручке. Если что-то изменилось,
+    выдает программе новую версию (next_program_version). Фиксацию транзакции выполняет вызывающий код.
+
+    :param session: SQLAlchemy сессия для взаимодействия с базой данных.
+    :param motivation_program_id: ID программы мотивации.
+    :param thresholds: Вознаграждение по порогу выручки.
+    :return: Количество добавленных, измененных и удаленных порогов.
+    """
+    motivation_program_id = int(motivation_program_id)
+    stored = session.execute(
+        select(MotivationThreshold.id, MotivationThreshold.revenue_threshold, MotivationThreshold.salary)
+        .where(MotivationThreshold.motivation_program_id == motivation_program_id)
+        .order_by(MotivationThreshold.id)
+    ).all()
+
+    delete_ids = []
+    updates = []
+    seen = set()
+    for threshold_id, revenue, salary in stored:
+        if revenue not in thresholds or revenue in seen:
+            # Удален из таблицы или дубль, сохраненный старой версией приложения
+            delete_ids.append(threshold_id)
+        elif thresholds[revenue] != salary:
+            updates.append({"id": threshold_id, "salary": thresholds[revenue]})
+        seen.add(revenue)
+    inserts = [
+        {"motivation_program_id": motivation_program_id, "revenue_threshold": revenue, "salary": salary}
+        for revenue, salary in sorted(thresholds.items()) if revenue not in seen
+    ]
+
+    if delete_ids:
+        session.execute(delete(MotivationThreshold).where(MotivationThreshold.id.in_(delete_ids)))
+    if updates:
+        session.execute(update(MotivationThreshold), updates)
+    if inserts:
+        session.execute(insert(MotivationThreshold), inserts)
+    changes = ThresholdChanges(inserted=len(inserts), updated=len(updates), deleted=len(delete_ids))
+
+    if changes:
+        session.execute(
+            update(MotivationProgram)
+            .where(MotivationProgram.id == motivation_program_id)
+            .values(version=next_program_version(session))
+        )
+        # Загруженные в сессию программа и ее пороги устарели после массовых запросов
+        program = session.identity_map.get(session.identity_key(MotivationProgram, motivation_program_id))
+        if program is not None:
+            session.expire(program)
+    return changes
 
 
 def get_employees_by_motivation_program_id(session: Session, motivation_program_id: int) -> list[Type[Employee]]:
@@ -154,7 +336,7 @@ def get_department_by_code(session: Session, department_code: str) -> Type[Depar
     return session.query(Department).filter_by(code=department_code).one_or_none()
 
 
-def _employee_display_name_from_iiko(employee: dict) -> str:
+def employee_display_name_from_iiko(employee: dict) -> str:
     """Собирает отображаемое имя из полей iiko (firstName + lastName)."""
     system_name = employee.get("name", "Не задано")
     tabel = employee.get("code", "Не задан")
@@ -176,8 +358,8 @@ def get_employee_name_by_id(employee_id: str, *, authenticated: bool = False) ->
 
     def _fetch() -> str:
         try:
-            employee = iiko_api.employees.get_employee_by_id(employee_id)
-            return _employee_display_name_from_iiko(employee)
+            employee = call_iiko(iiko_api.employees.get_employee_by_id, employee_id)
+            return employee_display_name_from_iiko(employee)
         except EmployeeNotFoundError:
             logger.error(f"Сотрудник с ID {employee_id} не найден")
             return f"Сотрудник {employee_id} (не найден)"
@@ -187,3 +369,75 @@ def get_employee_name_by_id(employee_id: str, *, authenticated: bool = False) ->
 
     with safe_iiko_auth():
         return _fetch()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# Загрузчики для экранов: данные сотрудников читаются проекциями столбцов фиксированным числом запросов
+# (сотрудники и их отделы), а не через ленивые связи ORM, которые делают запрос на каждого сотрудника.
+# ---------------------------------------------------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class EmployeeRow:
+    """Строка сотрудника для таблиц экранов. Не связана с сессией и может использоваться после ее закрытия."""
+    id: str
+    name: str
+    position: str
+    code: str | None
+    motivation_program_id: int | None
+    department_names: tuple[str, ...] = ()
+
+    @property
+    def departments_text(self) -> str:
+        """Отделы сотрудника одной строкой для ячейки таблицы."""
+        return " ".join(self.department_names)
+
+
+def _load_employee_rows(session: Session, condition: ColumnElement[bool]) -> list[EmployeeRow]:
+    """
+    Загружает сотрудников, подходящих под condition, и их отделы двумя запросами.
+    Отделы выбираются по тому же условию подзапросом, а не списком ID.
+    """
+    employee_ids = select(Employee.id).where(condition)
+    departments: dict[str, list[str]] = {}
+    for employee_id, department_name in session.execute(
+            select(association_table.c.employee_id, Department.name)
+            .join(Department, Department.code == association_table.c.department_code)
+            .where(association_table.c.employee_id.in_(employee_ids))
+            .order_by(Department.name)
+    ):
+        departments.setdefault(employee_id, []).append(department_name)
+
+    return [
+        EmployeeRow(
+            id=employee_id,
+            name=name,
+            position=position,
+            code=code,
+            motivation_program_id=motivation_program_id,
+            department_names=tuple(departments.get(employee_id, ())),
+        )
+        for employee_id, name, position, code, motivation_program_id in session.execute(
+            select(Employee.id, Employee.name, Employee.position, Employee.code, Employee.motivation_program_id)
+            .where(condition)
+        )
+    ]
+
+
+def load_program_employee_rows(session: Session, motivation_program_id: int | str) -> list[EmployeeRow]:
+    """
+    Сотрудники программы мотивации с отделами: таблица сотрудников роли в главном окне
+    и правая таблица окна EditEmployeesWindow.
+    """
+    return _load_employee_rows(session, Employee.motivation_program_id == int(motivation_program_id))
+
+
+def load_assignable_employee_rows(session: Session, motivation_program_id: int | str) -> list[EmployeeRow]:
+    """
+    Сотрудники с табельным номером, не привязанные к программе мотивации (без программы или с другой программой),
+    с отделами: левая таблица окна EditEmployeesWindow.
+    """
+    return _load_employee_rows(session, and_(
+        Employee.code.is_not(None),
+        Employee.code != "",
+        or_(Employee.motivation_program_id.is_(None), Employee.motivation_program_id != int(motivation_program_id)),
+    ))
@@ -1,11 +1,24 @@
 # salary_reader/core/database.py
 import os
 import sys
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.orm import sessionmaker
+from .migrations import migrate
 from .models import Base
 from .paths import get_db_path  # Импорт нового модуля
 
+# Настройки каждого соединения SQLite:
+# WAL - чтение не блокируется записью (фоновое обновление таблицы и правки программ),
+# synchronous=NORMAL - в режиме WAL данные не теряются при падении приложения, а fsync реже,
+# кэш страниц 16 МБ (отрицательное значение - в КБ) и чтение файла через mmap до 64 МБ
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", "-16000"),
+    ("mmap_size", str(64 * 1024 * 1024)),
+    ("temp_store", "MEMORY"),
+)
+
 # Проверяем доступность sqlite3
 try:
     import sqlite3
@@ -52,8 +65,24 @@ except ImportError as e:
 db_path = get_db_path()
 os.makedirs(db_path.parent, exist_ok=True)
 
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению engine."""
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS:
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
 engine = create_engine(f'sqlite:///{db_path}')
+configure_sqlite(engine)
 Base.metadata.create_all(engine)
+migrate(engine)
 Session = sessionmaker(bind=engine)
 
 
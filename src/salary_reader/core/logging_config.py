@@ -1,6 +1,15 @@
 from __future__ import annotations  # Импортируем типы loguru для анотаций
 
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+import time
+from pathlib import Path
 
 import loguru
 from loguru import logger
@@ -9,23 +18,193 @@ from .paths import get_log_path
 
 logfile_path = get_log_path("app.log")
 
+# Переменная окружения, задающая уровень логирования для всех модулей (например, INFO в рабочей сборке)
+LOG_LEVEL_ENV = "SALARY_READER_LOG_LEVEL"
+
+CONSOLE_FORMAT = ("<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> | "
+                  "<level>{message}</level>")
+
+# Параметры, с которыми сейчас настроены обработчики, и минимальный включенный уровень
+_configured_with: tuple | None = None
+_min_level_no: int = 0
+# Дочерний процесс пула (configure_worker_logging): логи только в консоль, файл пишет основной процесс
+_worker_process = False
+
+
+class BackgroundLogWriter:
+    """
+    Пишет готовые сообщения логов в консоль и файл в отдельном потоке.
+
+    Вызов логгера только форматирует сообщение и кладет его в очередь в памяти процесса, поэтому расчеты
+    не ждут диска и консоли. (enqueue=True в loguru для этого не подходит: он сериализует каждую запись
+    для передачи между процессами, и вызов становится дороже синхронной записи.)
+    Файл ротируется раз в сутки, хранятся последние 10 файлов.
+    """
+
+    def __init__(self, filepath: str | os.PathLike):
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        self._file_handler = logging.handlers.TimedRotatingFileHandler(
+            filepath, when="midnight", backupCount=10, encoding="utf-8"
+        )
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def console(self, message: str) -> None:
+        self._queue.put((False, message))
+
+    def file(self, message: str) -> None:
+        self._queue.put((True, message))
+
+    def stop(self) -> None:
+        """Дописывает сообщения из очереди и останавливает поток записи."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        self._file_handler.close()
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            # Сообщения, накопившиеся в очереди, записываются пачкой с одним сбросом буфера
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = batch[:batch.index(None)]
+            self._write(batch)
+
+    def _write(self, batch: list[tuple[bool, str]]) -> None:
+        # Консоль и файл пишутся независимо: ошибка записи в файл не должна терять вывод в консоль и наоборот
+        console_messages = [message for to_file, message in batch if not to_file]
+        if console_messages and sys.stderr is not None:  # В оконной сборке PyInstaller консоли нет
+            try:
+                sys.stderr.write("".join(console_messages))
+                sys.stderr.flush()
+            except Exception as e:
+                self._report_error("консоль", e)
+
+        file_messages = [message for to_file, message in batch if to_file]
+        if file_messages:
+            try:
+                self._write_file("".join(file_messages))
+            except Exception as e:
+                self._report_error(self._file_handler.baseFilename, e)
+
+    def _write_file(self, text: str) -> None:
+        handler = self._file_handler
+        if handler.shouldRollover(logging.makeLogRecord({})):
+            try:
+                handler.doRollover()
+            except Exception as e:
+                # Следующая попытка ротации - в следующую полночь, до нее запись продолжается в текущий файл
+                handler.rolloverAt = handler.computeRollover(int(time.time()))
+                self._report_error(handler.baseFilename, e)
+        if handler.stream is None:
+            # Файл закрыт после неудачной ротации (например, файл занят другим процессом) - открываем заново
+            handler.stream = handler._open()
+        handler.stream.write(text)
+        handler.stream.flush()
+
+    @staticmethod
+    def _report_error(target: str, error: Exception) -> None:
+        """Сообщает об ошибке записи лога в stderr: поток записи при этом продолжает работу."""
+        if sys.stderr is None:
+            return
+        try:
+            sys.stderr.write(f"Ошибка записи лога ({target}): {error!r}\n")
+            sys.stderr.flush()
+        except Exception:
+            pass
+
+
+_writers: dict[str, BackgroundLogWriter] = {}
+
+
+def _get_writer(filepath) -> BackgroundLogWriter:
+    key = str(filepath)
+    if key not in _writers:
+        _writers[key] = BackgroundLogWriter(filepath)
+    return _writers[key]
+
+
 def get_logger(name: str, level: str = "DEBUG", filepath: str = logfile_path, **kwargs) -> loguru.Logger:
     """
     Возвращает объект логгера
 
+    Обработчики общие для всех модулей и настраиваются один раз (повторно - только при других параметрах).
+    Запись в консоль и файл выполняет поток BackgroundLogWriter.
+
     :param name: Имя логгера
-    :param level: Уровень логирования, по умолчанию INFO
+    :param level: Уровень логирования, по умолчанию DEBUG. Переопределяется переменной SALARY_READER_LOG_LEVEL
     :param filepath: Путь для сохранения логов
-    :param kwargs: Дополнительные параметры логирования
+    :param kwargs: Дополнительные параметры обработчика файла loguru
     :return: Объект логгера
     """
+    global _configured_with, _min_level_no
 
+    level = os.environ.get(LOG_LEVEL_ENV) or level
     new_logger = logger.bind(name=name)
-    new_logger.remove() # Удаляем дефолтный логгер
-    
-    # Добавляем консольный вывод
-    new_logger.add(sink=sys.stderr, level=level, format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> | <level>{message}</level>")
-    
-    # Добавляем файловый вывод
-    new_logger.add(sink=filepath, level=level, rotation="1 day", retention="10 days", **kwargs)
+    if not _worker_process and _is_child_process():
+        configure_worker_logging(level)
+    if _worker_process:
+        return new_logger
+
+    settings = (level, str(filepath), tuple(sorted(kwargs.items())))
+    if settings != _configured_with:
+        new_logger.remove() # Удаляем дефолтный логгер
+        writer = _get_writer(filepath)
+
+        # Добавляем консольный вывод
+        new_logger.add(sink=writer.console, level=level, format=CONSOLE_FORMAT, colorize=False)
+
+        # Добавляем файловый вывод
+        new_logger.add(sink=writer.file, level=level, **kwargs)
+        _configured_with = settings
+        _min_level_no = logger.level(level).no
     return new_logger
+
+
+def _is_child_process() -> bool:
+    """
+    Проверяет, что код выполняется в дочернем процессе multiprocessing.
+    При запуске через spawn (Windows, сборка PyInstaller) дочерний процесс импортирует модуль __main__
+    до того, как заданы parent_process() и initializer пула, но имя процесса к этому моменту уже задано.
+    """
+    return multiprocessing.parent_process() is not None or multiprocessing.current_process().name != "MainProcess"
+
+
+def configure_worker_logging(level: str = "DEBUG") -> None:
+    """
+    Настраивает логирование в дочернем процессе пула (initializer для ProcessPoolExecutor).
+    get_logger вызывает ее сам, если модуль импортируется в дочернем процессе.
+
+    Сообщения пишутся только в консоль и без потока записи. Файл лога пишет только основной процесс:
+    несколько TimedRotatingFileHandler на одном файле мешают друг другу при ротации.
+    Последующие вызовы get_logger в процессе обработчики не меняют.
+
+    :param level: Уровень логирования, по умолчанию DEBUG. Переопределяется переменной SALARY_READER_LOG_LEVEL
+    """
+    global _configured_with, _min_level_no, _worker_process
+
+    level = os.environ.get(LOG_LEVEL_ENV) or level
+    # При запуске через fork процесс унаследовал обработчики основного процесса, а поток записи - нет
+    logger.remove()
+    if sys.stderr is not None:  # В оконной сборке PyInstaller консоли нет
+        logger.add(sink=sys.stderr, level=level, format=CONSOLE_FORMAT, colorize=False)
+    _worker_process = True
+    _configured_with = None
+    _min_level_no = logger.level(level).no
+
+
+def is_enabled(level: str) -> bool:
+    """
+    Проверяет, будет ли записано сообщение уровня level.
+    Используется перед формированием дорогих сообщений в горячих участках кода.
+    """
+    return logger.level(level).no >= _min_level_no
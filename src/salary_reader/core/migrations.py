@@ -0,0 +1,99 @@
+"""
+Версионные миграции схемы БД приложения.
+
+Версия схемы хранится в PRAGMA user_version файла SQLite. Новая БД создается по моделям (Base.metadata.create_all),
+затем migrate применяет к ней все шаги с номером больше текущей версии. Шаги написаны так,
+чтобы их можно было применить и к БД, уже созданной по актуальным моделям: индексы создаются с IF NOT EXISTS,
+а колонки добавляются, только если их еще нет в таблице (в SQLite у ADD COLUMN нет IF NOT EXISTS).
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, Engine, text
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__, level="DEBUG")
+
+
+@dataclass(frozen=True)
+class AddColumn:
+    table: str
+    name: str
+    # Определение колонки для ALTER TABLE ... ADD COLUMN
+    definition: str
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: tuple[str, ...] = ()
+    add_columns: tuple[AddColumn, ...] = ()
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        version=1,
+        description="индексы внешних ключей и порогов мотивации",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS ix_employees_motivation_program_id "
+            "ON employees (motivation_program_id)",
+            "CREATE INDEX IF NOT EXISTS ix_motivate_thresholds_program_revenue "
+            "ON motivate_thresholds (motivation_program_id, revenue_threshold)",
+            "CREATE INDEX IF NOT EXISTS ix_employee_department_association_employee_id "
+            "ON employee_department_association (employee_id)",
+            "CREATE INDEX IF NOT EXISTS ix_employee_department_association_department_code "
+            "ON employee_department_association (department_code)",
+            "CREATE INDEX IF NOT EXISTS ix_motivation_programs_department_code "
+            "ON motivation_programs (department_code)",
+        ),
+    ),
+    Migration(
+        version=2,
+        description="версия программы мотивации",
+        add_columns=(
+            AddColumn("motivation_programs", "version", "INTEGER NOT NULL DEFAULT 1"),
+        ),
+    ),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar_one()
+
+
+def _column_names(connection: Connection, table: str) -> set[str]:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def migrate(engine: Engine) -> int:
+    """
+    Применяет миграции, которых еще нет в БД. Версия записывается после каждого шага,
+    шаги идемпотентны: прерванный шаг при следующем запуске выполняется заново.
+
+    :return: Версия схемы после миграции.
+    """
+    with engine.connect() as connection:
+        version = get_schema_version(connection)
+    if version > SCHEMA_VERSION:
+        logger.warning(f"Версия схемы БД {version} новее, чем известна приложению ({SCHEMA_VERSION})")
+        return version
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with engine.begin() as connection:
+            for column in migration.add_columns:
+                if column.name not in _column_names(connection, column.table):
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {column.table} ADD COLUMN {column.name} {column.definition}"
+                    )
+            for statement in migration.statements:
+                connection.execute(text(statement))
+            # PRAGMA не принимает параметры, версия - число из MIGRATIONS
+            connection.exec_driver_sql(f"PRAGMA user_version = {migration.version:d}")
+        logger.info(f"Миграция схемы БД {migration.version}: {migration.description}")
+        version = migration.version
+    return version
@@ -1,15 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
 
+# Индексы объявлены в моделях для новых БД, в существующие их добавляет миграция (core/migrations.py)
+
 # Вспомогательная таблица для связи многие ко многим между таблицами Employee и Department
 association_table = Table(
     'employee_department_association',
     Base.metadata,
-    Column('employee_id', String, ForeignKey('employees.id')),
-    Column('department_code', String, ForeignKey('departments.code'))
+    Column('employee_id', String, ForeignKey('employees.id'), index=True),
+    Column('department_code', String, ForeignKey('departments.code'), index=True)
 )
 
 
@@ -55,7 +57,7 @@ class Employee(Base):
     code = Column(String, unique=True)
     position = Column(String(250), nullable=False)
 
-    motivation_program_id = Column(Integer, ForeignKey('motivation_programs.id'))
+    motivation_program_id = Column(Integer, ForeignKey('motivation_programs.id'), index=True)
 
     # Связь многие ко многим с отделами
     departments = relationship(
@@ -83,7 +85,12 @@ class MotivationProgram(Base):
     name = Column(String(250), nullable=False)
 
     # Внешний ключ для связи с отделом
-    department_code = Column(String, ForeignKey('departments.code'), nullable=False)
+    department_code = Column(String, ForeignKey('departments.code'), nullable=False, index=True)
+
+    # Версия программы: новая при создании программы и при каждом изменении порогов.
+    # Версии выдаются общим счетчиком (control_models.next_program_version) и не повторяются,
+    # по ним кэш зарплат (drivers/payroll_cache.py) отличает расчеты по старым и новым порогам
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Один-ко-многим связь с сотрудниками
     employees = relationship(
@@ -123,3 +130,16 @@ class MotivationThreshold(Base):
     salary = Column(Integer, nullable=False)
     # Связь с мотивационной программой
     motivation_program = relationship("MotivationProgram", back_populates="thresholds")
+
+    # Пороги читаются по программе в порядке выручки
+    __table_args__ = (
+        Index('ix_motivate_thresholds_program_revenue', 'motivation_program_id', 'revenue_threshold'),
+    )
+
+
+class Counter(Base):
+    """Таблица счетчиков, значения которых не должны повторяться (например, версии программ мотивации)."""
+    __tablename__ = 'counters'
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False)
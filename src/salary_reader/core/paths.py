@@ -15,8 +15,15 @@ def get_application_path():
         # Для разработки
         return Path(__file__).parent.parent.parent  # -> src директория
 
+# Переменная окружения с путем к файлу БД (например, отдельная БД для benchmarks/)
+DB_PATH_ENV = "SALARY_READER_DB_PATH"
+# Переменная окружения с каталогом логов (например, временный каталог для tests/)
+LOG_DIR_ENV = "SALARY_READER_LOG_DIR"
+
 def get_db_path():
     """Получаем путь до файла БД"""
+    if os.environ.get(DB_PATH_ENV):
+        return Path(os.environ[DB_PATH_ENV])
     if is_frozen():
         # Для exe-файла - сохраняем БД рядом с exe
         app_dir = Path(sys.executable).parent
@@ -39,6 +46,8 @@ def get_resource_path(relative_path):
 
 def get_log_path(relative_path):
     """Получаем путь до лога"""
+    if os.environ.get(LOG_DIR_ENV):
+        return Path(os.environ[LOG_DIR_ENV]) / relative_path
     if is_frozen():
         # Для exe-файла
         app_dir = Path(sys.executable).parent
@@ -46,3 +55,7 @@ def get_log_path(relative_path):
     else:
         # Для разработки
         return Path(__file__).parent.parent / "logs" / relative_path
+
+def get_cache_path(relative_path):
+    """Получаем путь до файла кэша, кэш хранится рядом с файлом БД"""
+    return get_db_path().parent / relative_path
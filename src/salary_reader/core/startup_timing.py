@@ -0,0 +1,86 @@
+"""
+Замеры времени запуска приложения.
+
+Отметки считаются от импорта этого модуля (первый импорт при запуске приложения).
+Основные отметки: first_paint - первая отрисовка главного окна, interactive - после первой отрисовки
+цикл событий обработал очередь событий (окно отвечает пользователю).
+Если задана переменная окружения SALARY_READER_STARTUP_REPORT, отметки записываются в этот файл в формате JSON.
+Если задана SALARY_READER_EXIT_AFTER_STARTUP, приложение завершается сразу после запуска (для замеров benchmarks/).
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from PySide6.QtCore import QEvent, QObject
+
+from salary_reader.core.logging_config import get_logger
+
+logger = get_logger(__name__, level="DEBUG")
+
+STARTUP_REPORT_ENV = "SALARY_READER_STARTUP_REPORT"
+EXIT_AFTER_STARTUP_ENV = "SALARY_READER_EXIT_AFTER_STARTUP"
+
+_started_at = time.perf_counter()
+
+
+class StartupTimer:
+    """
+    Отметки времени запуска в секундах от старта.
+    """
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        """
+        Ставит отметку, повторная отметка с тем же именем игнорируется.
+
+        :return: Время от старта в секундах.
+        """
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.started_at
+            logger.info(f"Запуск: {name} через {self.marks[name]:.3f} с")
+        return self.marks[name]
+
+    def watch_first_paint(self, widget, name: str = "first_paint", on_painted: Callable[[], None] | None = None) -> None:
+        """
+        Ставит отметку name при первой отрисовке виджета.
+
+        :param on_painted: Вызывается после первой отрисовки.
+        """
+        widget.installEventFilter(_FirstPaintFilter(self, name, on_painted, widget))
+
+    def report(self) -> dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.marks.items()}
+
+    def dump(self, path: str | os.PathLike | None = None) -> None:
+        """
+        Записывает отметки в JSON, по умолчанию в файл из SALARY_READER_STARTUP_REPORT.
+        """
+        path = path or os.environ.get(STARTUP_REPORT_ENV)
+        if not path:
+            return
+        Path(path).write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+
+
+class _FirstPaintFilter(QObject):
+    def __init__(self, timer: StartupTimer, name: str, on_painted: Callable[[], None] | None, parent: QObject):
+        super().__init__(parent)
+        self._timer = timer
+        self._name = name
+        self._on_painted = on_painted
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Type.Paint:
+            self._timer.mark(self._name)
+            watched.removeEventFilter(self)
+            self.deleteLater()
+            if self._on_painted is not None:
+                self._on_painted()
+        return False
+
+
+startup_timer = StartupTimer(_started_at)
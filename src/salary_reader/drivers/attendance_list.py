@@ -0,0 +1,362 @@
+"""
+Явки сотрудников и их агрегация для сводной таблицы зарплат.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, date, timedelta
+from typing import AnyStr, Union
+from uuid import UUID
+
+from salary_reader.drivers.salary import ShiftType
+from salary_reader.core.logging_config import get_logger
+
+# TODO: Вынести в settings(Для настроек нужна отдельная таблица в бд)
+FULL_SHIFT_HOURS = 10
+HALF_SHIFT_HOURS = 5
+# Такси оплачивается за явку дольше TAXI_MIN_HOURS часов, закрытую после TAXI_AFTER_HOUR часов
+TAXI_PRICE = 200
+TAXI_MIN_HOURS = 6
+TAXI_AFTER_HOUR = 20
+
+logger = get_logger(__name__, level="DEBUG")
+
+
+class EmployeeId(str):
+    """
+    Тип данных, представляющий собой строку в формате UUID.
+    Используется для хранения и валидации идентификатора сотрудника.
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: AnyStr) -> Union[str, None]:
+        if not isinstance(value, str):
+            raise TypeError(f'Значение должно быть строкой, получено: {type(value)}')
+        try:
+            UUID(value)
+        except ValueError as e:
+            raise ValueError(f'Некорректный UUID: {value}') from e
+        return value
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MINUTES_PER_DAY = 24 * 60
+
+
+def _to_epoch_minutes(value: datetime) -> int:
+    """
+    Переводит время в минуты от эпохи по "настенному" времени, секунды и часовой пояс отбрасываются.
+    """
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(minutes=1)
+
+
+def _from_epoch_minutes(minutes: int) -> datetime:
+    return _EPOCH + timedelta(minutes=minutes)
+
+
+@dataclass
+class AttendanceParseStats:
+    """
+    Счетчики разбора явок. Вместо записи в лог на каждую явку в лог пишется итог (см. prepare_data).
+    """
+    parsed: int = 0
+    out_of_period: int = 0
+    out_of_schedule: int = 0
+    start_capped: int = 0
+    end_capped: int = 0
+    # Явки длиннее одного дня (ошибка в данных): сотрудник и дата начала
+    multi_day: list[tuple[str, date]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"создано явок: {self.parsed}, вне периода: {self.out_of_period}, "
+            f"открыто не по расписанию: {self.out_of_schedule}, начало перенесено на 10:00: {self.start_capped}, "
+            f"окончание перенесено на 22:00: {self.end_capped}, длиннее одного дня: {len(self.multi_day)}"
+        )
+
+
+class Attendance:
+    """
+    Класс, представляющий собой явку сотрудника.
+
+    Явка хранится компактно (__slots__): начало и окончание - целые минуты от эпохи, продолжительность - целые минуты.
+    Даты, timedelta и строка периода вычисляются при обращении.
+
+    Атрибуты класса:
+
+    :var employee_id: Идентификатор сотрудника.
+    :var start_minute: Начало явки (после ограничения 10:00) в минутах от эпохи.
+    :var end_minute: Окончание явки (после ограничения 22:00) в минутах от эпохи.
+    :var duration_minutes: Продолжительность явки в минутах, округленная до 30 минут.
+    :var crosses_period_boundary: Явка выходит за границы периода отчета.
+    :var is_taxi_paid: За явку оплачивается такси.
+    """
+    __slots__ = ("employee_id", "start_minute", "end_minute", "duration_minutes", "crosses_period_boundary",
+                 "is_taxi_paid")
+
+    def __init__(
+            self,
+            employee_id: EmployeeId,
+            date_from: datetime,
+            date_to: datetime,
+            *,
+            crosses_period_boundary: bool = False,
+            stats: AttendanceParseStats | None = None,
+    ):
+        """
+        :param stats: Счетчики разбора, в них учитываются перенесенные начало и окончание явки.
+        """
+        self.employee_id = employee_id
+        self.crosses_period_boundary = crosses_period_boundary
+
+        # Если явка закрыта после 22 часов, то устанавливается 22 часа.(чтобы не учитывать время после смены)
+        if date_to.hour > 22 or (date_to.hour == 22 and date_to.minute > 0):
+            capped_to = date_to.replace(hour=22, minute=0, second=0, microsecond=0)
+            if stats is not None:
+                stats.end_capped += 1
+        else:
+            capped_to = date_to
+
+        if date_from.hour < 10 or (date_from.hour == 10 and date_from.minute < 30):
+            capped_from = date_from.replace(hour=10, minute=0, second=0, microsecond=0)
+            if stats is not None:
+                stats.start_capped += 1
+        else:
+            capped_from = date_from
+
+        # Продолжительность явки (считается по полным значениям времени, до перевода в минуты)
+        if date_from.date() == date_to.date():
+            if capped_from.hour < 22:
+                duration = capped_to - capped_from
+            else:  # Если смена открыта после 22 часов, то продолжительность явки будет 0 часов.
+                duration = timedelta(hours=0)
+        else:
+            if stats is not None:
+                stats.multi_day.append((employee_id, date_from.date()))
+            else:
+                logger.warning(f"Явка сотрудника {employee_id} на {date_from.strftime('%d.%m.%Y')} больше одного дня.")
+            duration = timedelta(hours=0)
+
+        # Округление длительности явки до 30 минут(если остаток больше 15 минут, то округляем до 30 минут)
+        minutes = duration.total_seconds() / 60
+        self.duration_minutes = round(minutes / 30) * 30
+
+        self.start_minute = _to_epoch_minutes(capped_from)
+        self.end_minute = _to_epoch_minutes(capped_to)
+
+        self.is_taxi_paid = self.duration_minutes > TAXI_MIN_HOURS * 60 and capped_to.hour > TAXI_AFTER_HOUR
+
+    @property
+    def date_from(self) -> datetime:
+        """Дата и время начала явки."""
+        return _from_epoch_minutes(self.start_minute)
+
+    @property
+    def date_to(self) -> datetime:
+        """Дата и время окончания явки."""
+        return _from_epoch_minutes(self.end_minute)
+
+    @property
+    def attendance_date(self) -> date:
+        """Дата явки."""
+        return date.fromordinal(_EPOCH.toordinal() + self.start_minute // _MINUTES_PER_DAY)
+
+    @property
+    def duration(self) -> timedelta:
+        """Продолжительность явки."""
+        return timedelta(minutes=self.duration_minutes)
+
+    @property
+    def attendance_string(self) -> str:
+        """Строка, отражающая период явки. Формируется при обращении, для окна детализации и ведомостей."""
+        if self.crosses_period_boundary:
+            return f'{self.date_from.strftime("%d.%m %H:%M")} - {self.date_to.strftime("%d.%m %H:%M")}'
+        # Время "ЧЧ:ММ" считается из минут без создания datetime: строка нужна для каждой явки в детализации
+        start_hour, start_minute = divmod(self.start_minute % _MINUTES_PER_DAY, 60)
+        end_hour, end_minute = divmod(self.end_minute % _MINUTES_PER_DAY, 60)
+        return f'{start_hour:02d}:{start_minute:02d} - {end_hour:02d}:{end_minute:02d}'
+
+    def __str__(self):
+        return f'Явка сотрудника {self.employee_id}: {self.attendance_string}'
+
+
+class AttendancesList:
+    def __init__(self):
+        self.attendances: dict[EmployeeId, dict[date, list[Attendance]]] = {}
+
+    def __len__(self) -> int:
+        """
+        Возвращает количество явок в списке
+        :return: Кол-во хранящихся явок.
+            Возвращает 0, если список пуст.
+        """
+        _len = 0
+        for employee_id in self.attendances:
+            for date_ in self.attendances[employee_id]:
+                _len += len(self.attendances[employee_id][date_])
+        return _len
+
+    def add_attendance(self, attendance: Attendance) -> None:
+        if attendance.employee_id in self.attendances:
+            if attendance.attendance_date in self.attendances[attendance.employee_id]:
+                self.attendances[attendance.employee_id][attendance.attendance_date].append(attendance)
+            else:
+                self.attendances[attendance.employee_id][attendance.attendance_date] = [attendance]
+        else:
+            self.attendances[attendance.employee_id] = {attendance.attendance_date: [attendance]}
+
+    def get_general_row_data(self, employee_id: EmployeeId):
+        """
+        Возвращает строку таблицы с агрегированными данными по всем явкам employee_id сохраненным в attendances
+
+        :param employee_id: Идентификатор сотрудника
+        :return:
+        """
+        employee_attendances = self.attendances[employee_id]
+
+        employee_attendances_data = {
+            "warnings": False,
+            "full_shifts_count": 0,
+            "full_shifts_count_from_1": 0,
+            "full_shifts_count_from_16": 0,
+            "half_shifts_count": 0,
+            "half_shifts_count_from_1": 0,
+            "half_shifts_count_from_16": 0,
+            "total_shifts_count": 0,
+            "total_shifts_count_from_1": 0,
+            "total_shifts_count_from_16": 0,
+            "total_duration_seconds": 0,
+            "shifts": {},
+            "taxi_paid_count": 0,
+            "taxi_paid_sum": 0
+        }
+
+        for date_ in employee_attendances:
+            duration_minutes = 0
+            is_taxi_paid = False
+            if len(employee_attendances[date_]) > 1:
+                employee_attendances_data["warnings"] = True
+                for attendance_ in employee_attendances[date_]:
+                    duration_minutes += attendance_.duration_minutes
+                    if attendance_.is_taxi_paid:
+                        is_taxi_paid = True
+                    if attendance_.crosses_period_boundary:
+                        employee_attendances_data["warnings"] = True
+            else:
+                duration_minutes = employee_attendances[date_][0].duration_minutes
+                if employee_attendances[date_][0].is_taxi_paid:
+                    is_taxi_paid = True
+                if employee_attendances[date_][0].crosses_period_boundary:
+                    employee_attendances_data["warnings"] = True
+
+            # TODO: Вынести в настройки пороги длительности явки
+            hours_duration = duration_minutes / 60
+
+            employee_attendances_data["total_duration_seconds"] += float(duration_minutes * 60)
+
+            if is_taxi_paid:
+                employee_attendances_data["taxi_paid_count"] += 1
+                employee_attendances_data["taxi_paid_sum"] += TAXI_PRICE
+
+            if hours_duration >= FULL_SHIFT_HOURS:
+                if 1 <= date_.day <= 15:
+                    employee_attendances_data["full_shifts_count_from_1"] += 1
+                elif 16 <= date_.day <= 31:
+                    employee_attendances_data["full_shifts_count_from_16"] += 1
+                employee_attendances_data["full_shifts_count"] += 1
+                employee_attendances_data["shifts"].update({
+                    date_: {"shift_type": ShiftType("full"),
+                            "hours_duration": hours_duration,
+                            }
+                })
+            elif hours_duration >= HALF_SHIFT_HOURS:
+                if 1 <= date_.day <= 15:
+                    employee_attendances_data["half_shifts_count_from_1"] += 1
+                elif 16 <= date_.day <= 31:
+                    employee_attendances_data["half_shifts_count_from_16"] += 1
+                employee_attendances_data["half_shifts_count"] += 1
+                employee_attendances_data["shifts"].update({
+                    date_: {"shift_type": ShiftType("half"),
+                            "hours_duration": hours_duration,
+                            }
+                })
+            else:
+                employee_attendances_data["warnings"] = True
+                employee_attendances_data["shifts"].update({
+                    date_: {"shift_type": ShiftType("warning"),
+                            "hours_duration": hours_duration,
+                            }
+                })
+
+        return employee_attendances_data
+
+    def get_dates(self) -> set[date]:
+        """
+        Возвращает все даты, за которые есть явки.
+        """
+        return {date_ for employee_attendances in self.attendances.values() for date_ in employee_attendances}
+
+    def get_employee_detailed_data(self, employee_id: EmployeeId) -> dict[date, list[Attendance]]:
+        """
+        Возвращает данные по явкам сотрудника
+        :param employee_id: Идентификатор сотрудника в iiko
+        :return: Словарь с датами и явками в эти даты
+        """
+        employee_attendances = self.attendances[employee_id]
+        logger.info(f"Получение данных по явкам сотрудника {employee_id}: {len(employee_attendances)} дней")
+        return employee_attendances
+
+
+def parse_api_attendance(
+        api_attendance: dict,
+        period_date_from: date | None = None,
+        period_date_to: date | None = None,
+        stats: AttendanceParseStats | None = None,
+) -> Attendance | None:
+    """
+    Создает явку из записи iiko, если она пересекает период и открыта по расписанию.
+
+    :param api_attendance: Запись явки из iiko (employeeId, dateFrom, dateTo).
+    :param period_date_from: Дата начала периода отчета.
+    :param period_date_to: Дата окончания периода отчета.
+    :param stats: Счетчики разбора. В лог ничего не пишется, итог по счетчикам пишет вызывающий код.
+    :return: Явка или None, если запись не учитывается.
+    """
+    employee_id = EmployeeId(api_attendance['employeeId'])
+    date_from = datetime.fromisoformat(api_attendance['dateFrom'])
+    date_to = datetime.fromisoformat(api_attendance.get('dateTo', api_attendance['dateFrom']))
+
+    if period_date_from is not None and period_date_to is not None:
+        overlaps_period = (
+            date_from.date() <= period_date_to
+            and date_to.date() >= period_date_from
+        )
+        if not overlaps_period:
+            if stats is not None:
+                stats.out_of_period += 1
+            return None
+        crosses_period_boundary = (
+            date_from.date() < period_date_from
+            or date_to.date() > period_date_to
+        )
+    else:
+        crosses_period_boundary = False
+
+    # TODO: Вынести расписание в настройки
+    # Если открыта в промежуток между 07:00 и 22:00
+    if 7 <= date_from.hour <= 22:
+        if stats is not None:
+            stats.parsed += 1
+        return Attendance(
+            employee_id=employee_id,
+            date_from=date_from,
+            date_to=date_to,
+            crosses_period_boundary=crosses_period_boundary,
+            stats=stats,
+        )
+
+    if stats is not None:
+        stats.out_of_schedule += 1
+    return None
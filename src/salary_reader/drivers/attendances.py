@@ -1,390 +1,257 @@
-import enum
-from datetime import datetime, date, timedelta
-from typing import AnyStr, Union
-from uuid import UUID
+from datetime import datetime, date
+from functools import partial
 
+from PySide6.QtCore import QModelIndex
 from PySide6.QtGui import QColor, Qt
-from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
-
-from iiko_api import EmployeeNotFoundError, RoleNotFoundError
+from PySide6.QtWidgets import QTableView, QTableWidget, QTableWidgetItem, QHeaderView
 
 from salary_reader.core.database import get_session
-from salary_reader.core.models import MotivationThreshold, Employee
-from salary_reader.core.control_models import get_department_by_code
-from salary_reader.iiko_init import iiko_api, safe_iiko_auth
-from salary_reader.core.logging_config import get_logger
-
-# TODO: Вынести в settings(Для настроек нужна отдельная таблица в бд)
-FULL_SHIFT_HOURS = 10
-HALF_SHIFT_HOURS = 5
+from salary_reader.core.control_models import get_department_by_code, employee_display_name_from_iiko
+from salary_reader.drivers.general_table_model import GeneralTableModel
+from salary_reader.drivers.payroll_cache import PayrollCache, PayrollKey
+from salary_reader.drivers.payroll_engine import AttendanceColumns, PayrollResult, compute_payroll
+from salary_reader.drivers.attendance_list import EmployeeId, AttendancesList, AttendanceParseStats, \
+    parse_api_attendance, TAXI_PRICE
+from salary_reader.drivers.salary import ShiftType, calculate_salaries, calculate_shift_salary
+from salary_reader.drivers.snapshot import ComputeSnapshot, load_compute_snapshot
+from salary_reader.iiko_business_api.data_cache import IikoDataCache, split_into_ranges
+from salary_reader.iiko_business_api.employees import get_iiko_directory
+from salary_reader.iiko_init import iiko_api, safe_iiko_auth, run_concurrently
+from salary_reader.core.logging_config import get_logger, is_enabled
 
 logger = get_logger(__name__, level="DEBUG")
 
 
-class ShiftType(enum.Enum):
-    FULL = "full"
-    HALF = "half"
-    WARNING = "warning"
-
-    def __str__(self):
-        if self == ShiftType.FULL:
-            return "ПОЛНАЯ"
-        elif self == ShiftType.HALF:
-            return "Пол смены"
-        elif self == ShiftType.WARNING:
-            return "Внимание!"
-        else:
-            return "Неизвестный"
-
-
-class EmployeeId(str):
-    """
-    Тип данных, представляющий собой строку в формате UUID.
-    Используется для хранения и валидации идентификатора сотрудника.
-    """
-
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, value: AnyStr) -> Union[str, None]:
-        if not isinstance(value, str):
-            raise TypeError(f'Значение должно быть строкой, получено: {type(value)}')
-        try:
-            UUID(value)
-        except ValueError as e:
-            raise ValueError(f'Некорректный UUID: {value}') from e
-        return value
-
-
-class Attendance:
-    """
-    Класс, представляющий собой явку сотрудника.
-
-    Атрибуты класса:
-
-    :var employee_id: Идентификатор сотрудника.
-    :var date_from Дата и время начала явки.
-    :var date_to Дата и время окончания явки.
-    :var attendance_date Дата явки.
-    :var duration Продолжительность явки.
-    :var attendance_string Строковое представление явки.
-    """
+class AttendancesDataDriver:
+    # Данные периода, которые драйвер окна принимает от драйвера фонового обновления (см. adopt)
+    _STATE_ATTRIBUTES = (
+        "api_attendances", "sales", "employees_shifts", "employees_days", "employees_names",
+        "employees_attendances", "attendance_columns", "snapshot", "period_date_from", "period_date_to",
+    )
 
     def __init__(
             self,
-            employee_id: EmployeeId,
-            date_from: datetime,
-            date_to: datetime,
-            *,
-            crosses_period_boundary: bool = False,
+            general_table: QTableView | None,
+            vectorized: bool = True,
+            fetch_concurrency: int | None = None,
+            data_cache: IikoDataCache | None = None,
+            payroll_cache: PayrollCache | None = None,
     ):
-        self.employee_id = employee_id
-        self.crosses_period_boundary = crosses_period_boundary
-
-        # Если явка закрыта после 22 часов, то устанавливается 22 часа.(чтобы не учитывать время после смены)
-        if date_to.hour > 22 or (date_to.hour == 22 and date_to.minute > 0):
-            logger.warning(
-                f"Время окончания явки сотрудника {employee_id} на {date_to.strftime('%d.%m.%Y')} больше 22:00. "
-                f"Устанавливаем 22 часа."
-            )
-            self.date_to = date_to.replace(hour=22, minute=0, second=0, microsecond=0)
-        else:
-            logger.info(
-                f"Время окончания явки сотрудника {employee_id} на {date_to.strftime('%d.%m.%Y')} меньше 22:00.")
-            self.date_to = date_to
-
-        if date_from.hour < 10 or (date_from.hour == 10 and date_from.minute < 30):
-            logger.warning(
-                f"Время явки сотрудника {employee_id} на {date_from.strftime('%d.%m.%Y')} меньше 10:00."
-                f"Устанавливаем 10 часов."
-            )
-            self.date_from = date_from.replace(hour=10, minute=0, second=0, microsecond=0)
-        else:
-            logger.info(f"Время явки сотрудника {employee_id} на {date_from.strftime('%d.%m.%Y')} больше 10:00.")
-            self.date_from = date_from
-
-        self.attendance_date = date_from.date()
-        # Продолжительность явки
-        if date_from.date() == date_to.date():
-            if self.date_from.hour < 22:
-                self.duration: timedelta = self.date_to - self.date_from
-            else:  # Если смена открыта после 22 часов, то продолжительность явки будет 0 часов.
-                self.duration = timedelta(hours=0)
-        else:
-            error_msg = f"Явка сотрудника {employee_id} на {date_from.strftime('%d.%m.%Y')} больше одного дня."
-            logger.exception(error_msg)
-            self.duration = timedelta(hours=0)
-
-        # Округление длительности явки до 30 минут(если остаток больше 15 минут, то округляем до 30 минут)
-        minutes = self.duration.total_seconds() / 60
-        rounded_minutes = round(minutes / 30) * 30
-        self.duration = timedelta(minutes=rounded_minutes)
-
-        # Строка отражающая период явки
-        if crosses_period_boundary:
-            self.attendance_string = (
-                f'{self.date_from.strftime("%d.%m %H:%M")} - {self.date_to.strftime("%d.%m %H:%M")}'
-            )
-        else:
-            self.attendance_string = f'{self.date_from.strftime("%H:%M")} - {self.date_to.strftime("%H:%M")}'
-
-        if (self.duration > timedelta(hours=6)) and (self.date_to.hour > 20):
-
-            self.is_taxi_paid = True
-        else:
-            self.is_taxi_paid = False
-
-    def __str__(self):
-        return f'Явка сотрудника {self.employee_id}: {self.attendance_string}'
-
-
-class AttendancesList:
-    def __init__(self):
-        self.attendances: dict[EmployeeId, dict[date, list[Attendance]]] = {}
-
-    def __len__(self) -> int:
-        """
-        Возвращает количество явок в списке
-        :return: Кол-во хранящихся явок.
-            Возвращает 0, если список пуст.
-        """
-        _len = 0
-        for employee_id in self.attendances:
-            for date_ in self.attendances[employee_id]:
-                _len += len(self.attendances[employee_id][date_])
-        return _len
-
-    def add_attendance(self, attendance: Attendance) -> None:
-        if attendance.employee_id in self.attendances:
-            if attendance.attendance_date in self.attendances[attendance.employee_id]:
-                self.attendances[attendance.employee_id][attendance.attendance_date].append(attendance)
-            else:
-                self.attendances[attendance.employee_id][attendance.attendance_date] = [attendance]
-        else:
-            self.attendances[attendance.employee_id] = {attendance.attendance_date: [attendance]}
-
-    def get_general_row_data(self, employee_id: EmployeeId):
         """
-        Возвращает строку таблицы с агрегированными данными по всем явкам employee_id сохраненным в attendances
-
-        :param employee_id: Идентификатор сотрудника
-        :return:
-        """
-        employee_attendances = self.attendances[employee_id]
-
-        employee_attendances_data = {
-            "warnings": False,
-            "full_shifts_count": 0,
-            "full_shifts_count_from_1": 0,
-            "full_shifts_count_from_16": 0,
-            "half_shifts_count": 0,
-            "half_shifts_count_from_1": 0,
-            "half_shifts_count_from_16": 0,
-            "total_shifts_count": 0,
-            "total_shifts_count_from_1": 0,
-            "total_shifts_count_from_16": 0,
-            "total_duration_seconds": 0,
-            "shifts": {},
-            "taxi_paid_count": 0,
-            "taxi_paid_sum": 0
-        }
-
-        for date_ in employee_attendances:
-            duration_ = timedelta()
-            is_taxi_paid = False
-            if len(employee_attendances[date_]) > 1:
-                employee_attendances_data["warnings"] = True
-                for attendance_ in employee_attendances[date_]:
-                    duration_ += attendance_.duration
-                    if attendance_.is_taxi_paid:
-                        is_taxi_paid = True
-                    if attendance_.crosses_period_boundary:
-                        employee_attendances_data["warnings"] = True
-            else:
-                duration_ = employee_attendances[date_][0].duration
-                if employee_attendances[date_][0].is_taxi_paid:
-                    is_taxi_paid = True
-                if employee_attendances[date_][0].crosses_period_boundary:
-                    employee_attendances_data["warnings"] = True
-
-            # TODO: Вынести в настройки пороги длительности явки
-            hours_duration = duration_.total_seconds() / 3600
-
-            employee_attendances_data["total_duration_seconds"] += duration_.total_seconds()
-
-            if is_taxi_paid:
-                employee_attendances_data["taxi_paid_count"] += 1
-                employee_attendances_data["taxi_paid_sum"] += 200  # TODO: Вынести в настройки
-
-            if hours_duration >= FULL_SHIFT_HOURS:
-                if 1 <= date_.day <= 15:
-                    employee_attendances_data["full_shifts_count_from_1"] += 1
-                elif 16 <= date_.day <= 31:
-                    employee_attendances_data["full_shifts_count_from_16"] += 1
-                employee_attendances_data["full_shifts_count"] += 1
-                employee_attendances_data["shifts"].update({
-                    date_: {"shift_type": ShiftType("full"),
-                            "hours_duration": hours_duration,
-                            }
-                })
-            elif hours_duration >= HALF_SHIFT_HOURS:
-                if 1 <= date_.day <= 15:
-                    employee_attendances_data["half_shifts_count_from_1"] += 1
-                elif 16 <= date_.day <= 31:
-                    employee_attendances_data["half_shifts_count_from_16"] += 1
-                employee_attendances_data["half_shifts_count"] += 1
-                employee_attendances_data["shifts"].update({
-                    date_: {"shift_type": ShiftType("half"),
-                            "hours_duration": hours_duration,
-                            }
-                })
-            else:
-                employee_attendances_data["warnings"] = True
-                employee_attendances_data["shifts"].update({
-                    date_: {"shift_type": ShiftType("warning"),
-                            "hours_duration": hours_duration,
-                            }
-                })
-
-        return employee_attendances_data
-
-    def get_employee_detailed_data(self, employee_id: EmployeeId) -> dict[date, list[Attendance]]:
+        :param general_table: Сводная таблица зарплат. None для драйвера, который только загружает и считает данные
+            в фоновом потоке (см. detached).
+        :param vectorized: Считать сводную таблицу векторизованным движком (payroll_engine),
+            иначе расчет идет по объектам Attendance.
+        :param fetch_concurrency: Сколько запросов к iiko выполнять одновременно при загрузке данных,
+            по умолчанию из настроек iiko_init. 1 - запросы идут последовательно.
+        :param data_cache: Локальный кэш явок и выручки. Если не задан, весь период каждый раз загружается из iiko.
+        :param payroll_cache: Кэш строк сводной таблицы: векторизованный движок считает только сотрудников,
+            у которых изменились явки, выручка или версия программы мотивации. Если не задан, считаются все.
         """
-        Возвращает данные по явкам сотрудника
-        :param employee_id: Идентификатор сотрудника в iiko
-        :return: Словарь с датами и явками в эти даты
-        """
-        logger.info(f"Получение данных по явкам сотрудника {employee_id}")
-        logger.info(f"{self.attendances=}")
-        return self.attendances[employee_id]
-
-
-class AttendancesDataDriver:
-    def __init__(self, general_table: QTableWidget):
-        self.general_table: QTableWidget = general_table
+        self.general_table: QTableView | None = general_table
+        self.vectorized = vectorized
+        self.fetch_concurrency = fetch_concurrency
+        self.data_cache = data_cache
+        self.payroll_cache = payroll_cache
         self.iiko_api = iiko_api
         self.api_attendances: list[dict] = []
         self.sales: dict[date, int] = {}
         self.employees_shifts: dict = {}
+        # Строки детализации по дням и имена для ведомостей, заполняются в get_general_table_rows
+        self.employees_days: dict[EmployeeId, list[dict]] = {}
+        self.employees_names: dict[EmployeeId, str] = {}
         self.employees_attendances: AttendancesList = AttendancesList()
+        # Явки периода колонками для векторизованного движка, собираются в prepare_data
+        self.attendance_columns: AttendanceColumns | None = None
+        # Снимок сотрудников и программ мотивации, загружается в prepare_data
+        self.snapshot: ComputeSnapshot = ComputeSnapshot()
         self.period_date_from: date | None = None
         self.period_date_to: date | None = None
-        self.general_table.itemDoubleClicked.connect(self.on_general_table_double_clicked)
+        # Модель сводной таблицы, из нее же читают выгрузка в Excel и ведомости
+        self.general_model = GeneralTableModel()
+        if self.general_table is not None:
+            self.general_table.setModel(self.general_model)
+            # Строки одинаковой высоты: представлению не нужно измерять каждую ячейку
+            vertical_header = self.general_table.verticalHeader()
+            vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+            vertical_header.setDefaultSectionSize(self.general_table.fontMetrics().height() + 10)
+            self.general_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+            self.general_table.doubleClicked.connect(self.on_general_table_double_clicked)
+
+    def detached(self) -> "AttendancesDataDriver":
+        """
+        Возвращает новый драйвер с теми же настройками, но без таблицы.
+        Такой драйвер можно использовать в фоновом потоке, не затрагивая данные, которые сейчас отображаются.
+        """
+        return AttendancesDataDriver(
+            general_table=None,
+            vectorized=self.vectorized,
+            fetch_concurrency=self.fetch_concurrency,
+            data_cache=self.data_cache,
+            payroll_cache=self.payroll_cache,
+        )
+
+    def adopt(self, other: "AttendancesDataDriver") -> None:
+        """
+        Принимает данные периода, загруженные и рассчитанные другим драйвером.
+        Вызывается в потоке GUI, поэтому подмена данных не пересекается с их чтением.
+        """
+        for name in self._STATE_ATTRIBUTES:
+            setattr(self, name, getattr(other, name))
 
     @staticmethod
     def _as_date(value: datetime | date) -> date:
         return value.date() if isinstance(value, datetime) else value
 
-    def update_data(self, date_from: datetime, date_to: datetime, department_code: str) -> None:
+    def fetch_data(self, date_from: datetime | date, date_to: datetime | date, department_code: str) -> bool:
         """
-        Получает данные по явкам за период.
+        Загружает явки и выручку за период, без подготовки данных.
+        Если у драйвера есть кэш, из iiko загружаются только дни, которых нет в кэше или которые еще не закрыты.
         :param date_from: Дата начала периода
         :param date_to: Дата окончания периода
         :param department_code: Код отдела
+        :return: False, если iiko_api не инициализирован и данные не загружены
         """
-        logger.info(f"[update_data] Запущено обновление данных")
+        if date_from > date_to:
+            raise ValueError("Дата начала периода больше даты окончания периода")
+        period_date_from = self._as_date(date_from)
+        period_date_to = self._as_date(date_to)
 
-        if self.iiko_api is None:
-            logger.warning("iiko_api не инициализирован, пропускаем обновление данных")
-            return
+        if self.data_cache is None:
+            ranges = [(period_date_from, period_date_to)]
+        else:
+            ranges = split_into_ranges(self.data_cache.days_to_fetch(department_code, period_date_from, period_date_to))
+            logger.info(f"[fetch_data] Периоды для загрузки из iiko: {ranges or 'нет, все дни в кэше'}")
+
+        fetched = []
+        fetched_at = datetime.now()
+        if ranges:
+            if self.iiko_api is None:
+                logger.warning("iiko_api не инициализирован, пропускаем обновление данных")
+                return False
+            fetched = self._fetch_ranges(department_code, ranges)
+
+        if self.data_cache is None:
+            self.api_attendances, self.sales = fetched[0]
+        else:
+            for (range_from, range_to), (api_attendances, sales) in zip(ranges, fetched):
+                self.data_cache.store(department_code, range_from, range_to, api_attendances, sales, fetched_at)
+            self.api_attendances, self.sales = self.data_cache.load(department_code, period_date_from, period_date_to)
 
-        if date_from <= date_to:
-            self.period_date_from = self._as_date(date_from)
-            self.period_date_to = self._as_date(date_to)
+        self.period_date_from = period_date_from
+        self.period_date_to = period_date_to
+        return True
 
-            with get_session() as session:
-                department = get_department_by_code(session, department_code)
+    def _fetch_ranges(self, department_code: str, ranges: list[tuple[date, date]]) -> list[tuple[list | dict, dict]]:
+        """
+        Запрашивает у iiko явки и выручку по каждому периоду.
+        :return: Пары (ответ по явкам, выручка по дням) в порядке ranges
+        """
+        with get_session() as session:
+            department = get_department_by_code(session, department_code)
+
+        calls = []
+        for range_from, range_to in ranges:
+            calls.append(partial(
+                self.iiko_api.employees.get_attendances_for_department,
+                department_code=department_code,
+                date_from=range_from,
+                date_to=range_to,
+            ))
+            calls.append(partial(
+                self.iiko_api.reports.get_sales_report,
+                date_from=range_from,
+                date_to=range_to,
+                department_id=department.id,
+            ))
+
+        # Запросы не зависят друг от друга, выполняем их одновременно в одной сессии
+        with safe_iiko_auth():
+            results = run_concurrently(calls, max_workers=self.fetch_concurrency)
+        return list(zip(results[::2], results[1::2]))
 
-            with safe_iiko_auth():
-                self.api_attendances = self.iiko_api.employees.get_attendances_for_department(
-                    department_code=department_code,
-                    date_from=date_from,
-                    date_to=date_to,
-                )
-                self.sales = self.iiko_api.reports.get_sales_report(
-                    date_from=date_from,
-                    date_to=date_to,
-                    department_id=department.id,
-                )
+    def update_data(self, date_from: datetime | date, date_to: datetime | date, department_code: str) -> None:
+        """
+        Получает данные по явкам за период и подготавливает их.
+        :param date_from: Дата начала периода
+        :param date_to: Дата окончания периода
+        :param department_code: Код отдела
+        """
+        logger.info(f"[update_data] Запущено обновление данных")
 
-            self.prepare_data()
-        else:
-            raise ValueError("Дата начала периода больше даты окончания периода")
-        logger.info(f"[update_data] Обновление данных завершено: \n  {self.api_attendances=}\n\n  {self.sales=}\n\n")
+        if not self.fetch_data(date_from, date_to, department_code):
+            return
+        self.prepare_data()
+
+        logger.info(f"[update_data] Обновление данных завершено: выручка за {len(self.sales)} дней")
 
     def prepare_data(self) -> None:
         """
         Подготавливает данные для выгрузки в QTableWidget.
+        После разбора исходные записи iiko (api_attendances) освобождаются: явки хранятся в employees_attendances
+        и, для векторизованного расчета, в attendance_columns.
         """
-        logger.info(f"Запущенна подготовка данных... \n  {self.api_attendances=}\n")
         if isinstance(self.api_attendances, dict):
             self.api_attendances = [self.api_attendances]
         elif not self.api_attendances:
             self.api_attendances = []
-        # Пересоздаем список явок, чтобы отчистить от старых данных
+        logger.info(f"Запущенна подготовка данных: {len(self.api_attendances)} записей явок iiko")
+        # Пересоздаем список явок и результаты прошлого расчета, чтобы отчистить от старых данных:
+        # сотрудники другого периода или отдела не должны остаться в строках
         self.employees_attendances = AttendancesList()
+        self.employees_shifts = {}
+        self.employees_days = {}
+        self.employees_names = {}
+
+        # Загружаем данные сотрудников и программ мотивации одним снимком
+        with get_session() as session:
+            self.snapshot = load_compute_snapshot(
+                session, {attendance['employeeId'] for attendance in self.api_attendances}
+            )
+
+        # Пропущенные сотрудники и итоги разбора пишутся в лог один раз, а не для каждой явки
+        stats = AttendanceParseStats()
+        missing_employees: set[str] = set()
+        employees_without_program: dict[str, str] = {}
         for attendance in self.api_attendances:
             employee_id = EmployeeId(attendance['employeeId'])
-            # TODO: Дублирование кода, исправить, скорее всего можно просто удалить его повтор далее
-            with get_session() as session:
-                # Найти сотрудника и его мотивационную программу
-                employee = session.query(Employee).filter(Employee.id == employee_id).first()
-                if not employee:
-                    logger.warning(f"Сотрудник с ID={employee_id} не найден в базе данных")
-                    continue
-
-                if not employee.motivation_program:
-                    logger.warning(f"Сотрудник {employee.name} (ID={employee.id}) не имеет привязанных программ"
-                                   f"Не добавляем его в список отчищенных явок")
-                    continue
-
-            logger.debug(f"Обработка явки:\n  {attendance=}")
-            date_from = datetime.fromisoformat(attendance['dateFrom'])
-            date_to = datetime.fromisoformat(attendance.get('dateTo', attendance['dateFrom']))
-
-            if self.period_date_from is not None and self.period_date_to is not None:
-                overlaps_period = (
-                    date_from.date() <= self.period_date_to
-                    and date_to.date() >= self.period_date_from
-                )
-                if not overlaps_period:
-                    logger.debug(
-                        f"Явка сотрудника {employee_id} "
-                        f"({date_from.date()}–{date_to.date()}) не пересекает период "
-                        f"{self.period_date_from}–{self.period_date_to}, пропускаем"
-                    )
-                    continue
-                crosses_period_boundary = (
-                    date_from.date() < self.period_date_from
-                    or date_to.date() > self.period_date_to
-                )
-            else:
-                crosses_period_boundary = False
-
-            # TODO: Вынести расписание в настройки
-            # Если открыта в промежуток между 07:00 и 22:00
-            if 7 <= date_from.hour <= 22:
-                attendance_obj = Attendance(
-                    employee_id=employee_id,
-                    date_from=date_from,
-                    date_to=date_to,
-                    crosses_period_boundary=crosses_period_boundary,
-                )
-                logger.debug(f"Условия по расписанию выполнены создана явка:"
-                             f"\n  {employee_id=}\n  {date_from=}\n  {date_to=}\n"
-                             f"  {crosses_period_boundary=}\n  {attendance_obj=}")
+            employee = self.snapshot.get_employee(employee_id)
+            if not employee:
+                missing_employees.add(employee_id)
+                continue
+
+            if not self.snapshot.get_program(employee_id):
+                employees_without_program[employee_id] = employee.name
+                continue
+
+            attendance_obj = parse_api_attendance(attendance, self.period_date_from, self.period_date_to, stats)
+            if attendance_obj is not None:
                 self.employees_attendances.add_attendance(attendance_obj)
-                logger.debug(f"Явка {attendance_obj} добавлена в список явок,"
-                             f" в нем {len(self.employees_attendances)} явок.")
-            else:
-                logger.debug(f"Условия по расписанию НЕ выполнены, явка НЕ создана:\n"
-                             f"  {employee_id=}\n  {date_from=}\n  {date_to=}")
 
-        logger.debug(f"Подготовка явок окончена:\n"
-                     f"  кол-во явок в списке:{len(self.employees_attendances)}\n"
-                     f"  Явки{self.employees_attendances.attendances}\n\n")
+        if missing_employees:
+            logger.warning(f"Сотрудники не найдены в базе данных, их явки пропущены ({len(missing_employees)}): "
+                           f"{', '.join(sorted(missing_employees))}")
+        if employees_without_program:
+            logger.warning(
+                f"Сотрудники не имеют привязанных программ, их явки пропущены ({len(employees_without_program)}): "
+                + ", ".join(f"{name} (ID={employee_id})" for employee_id, name in employees_without_program.items())
+            )
+
+        # Колонки для движка собираются из тех же записей и только для сотрудников с разобранными явками
+        self.attendance_columns = AttendanceColumns.from_api(
+            self.api_attendances,
+            self.period_date_from,
+            self.period_date_to,
+            employee_filter=set(self.employees_attendances.attendances),
+        ) if self.vectorized else None
+        self.api_attendances = []
+
+        if stats.multi_day:
+            logger.warning(
+                f"Явки больше одного дня, продолжительность считается равной 0 ({len(stats.multi_day)}): "
+                + ", ".join(f"{employee_id} на {date_.strftime('%d.%m.%Y')}" for employee_id, date_ in stats.multi_day)
+            )
+        logger.info(f"Подготовка явок окончена: сотрудников {len(self.employees_attendances.attendances)}, {stats}")
 
     def calculate_salary(
             self, employee_id: EmployeeId,
@@ -404,159 +271,216 @@ class AttendancesDataDriver:
         :return: Вознаграждение
         """
 
-        with get_session() as session:
-            # Найти сотрудника и его мотивационную программу
-            employee = session.query(Employee).filter(Employee.id == employee_id).first()
+        # Найти сотрудника и его мотивационную программу
+        employee = self.snapshot.get_employee(employee_id)
 
-            if not employee:
-                logger.warning(f"Сотрудник с id={employee_id} не найден")
-                return 0  # TODO: Почему возвращаем 0?
+        if not employee:
+            logger.warning(f"Сотрудник с id={employee_id} не найден")
+            return 0  # TODO: Почему возвращаем 0?
 
-            if not employee.motivation_program:
-                logger.warning(f"Сотрудник {employee.name} (ID={employee.id}) не имеет привязанных программ")
-                return 0  # TODO: Почему возвращаем 0?
+        # Получить мотивационную программу
+        motivation_program = self.snapshot.get_program(employee_id)
+        if not motivation_program:
+            logger.warning(f"Сотрудник {employee.name} (ID={employee.id}) не имеет привязанных программ")
+            return 0  # TODO: Почему возвращаем 0?
 
-            # Получить мотивационную программу
-            motivation_program = employee.motivation_program
+        # Извлечь выручку за заданную дату
+        revenue = self.sales.get(date_, 0)
+        # Метод вызывается для каждой смены: сообщение форматируется, только если уровень DEBUG включен
+        if is_enabled("DEBUG"):
             logger.debug(f"Мотивационная программа {employee.name} (ID={employee.id}): "
-                         f"{motivation_program.name} (ID={motivation_program.id})")
-
-            # Извлечь выручку за заданную дату
-            revenue = self.sales.get(date_, 0)
-            logger.debug(f"Выручка за {date_}: {revenue}")
-
-            # Найти соответствующий порог мотивации
-            threshold: MotivationThreshold = session.query(MotivationThreshold).filter(
-                MotivationThreshold.motivation_program_id == motivation_program.id,
-                MotivationThreshold.revenue_threshold <= revenue
-            ).order_by(MotivationThreshold.revenue_threshold.desc()).first()
-
-            if threshold:
-                logger.debug(f"Порог при данной выручке для данной программы: "
-                             f"{threshold.revenue_threshold=} {threshold.salary=} {threshold.id=}")
-
-                logger.debug(f"Тип смены: {shift_type}")
-                if duration_seconds > 12 * 3600:
-                    duration_seconds = 12 * 3600
-                if per_hour:
-                    if duration_seconds > 0:
-                        duration_hours = duration_seconds / 3600
-                        return int(threshold.salary / 12 * duration_hours)
-                    else:
-                        return 0
-                else:
-                    match shift_type:
-                        case ShiftType.FULL:
-                            logger.debug(f"Полная смена возвращаем: {threshold.salary}")
-                            return threshold.salary
-                        case ShiftType.HALF:
-                            logger.debug(f"Пол смены получаем половину: {threshold.salary / 2}")
-                            return int(threshold.salary / 2)
+                         f"{motivation_program.name} (ID={motivation_program.id}), "
+                         f"выручка за {date_}: {revenue}, тип смены: {shift_type}")
+
+        return calculate_shift_salary(
+            motivation_program.thresholds,
+            revenue,
+            duration_seconds,
+            shift_type=shift_type,
+            per_hour=per_hour,
+        )
+
+    def get_general_row_data(self, employee_id: EmployeeId) -> dict:
+        """
+        Возвращает агрегированные данные по явкам сотрудника вместе с суммами зарплаты
+        за весь период (salary), с 1 по 15 (from_1_salary), с 16 числа (from_16_salary) и по дням (day_salaries).
+
+        :param employee_id: Идентификатор сотрудника
+        """
+        employee_attendances_data = self.employees_attendances.get_general_row_data(employee_id)
+
+        total_salary = 0
+        from_1_total_salary = 0
+        from_16_total_salary = 0
+
+        thresholds = self.snapshot.get_program(employee_id).thresholds
+        shifts = list(employee_attendances_data['shifts'].items())
+        salaries = calculate_salaries(
+            (thresholds, self.sales.get(date_, 0), data['hours_duration'] * 3600)
+            for date_, data in shifts
+        )
+        for (date_, data), salary_ in zip(shifts, salaries):
+            total_salary += salary_
+            if 1 <= date_.day <= 15:
+                from_1_total_salary += salary_
+            elif 16 <= date_.day <= 31:
+                from_16_total_salary += salary_
+
+        employee_attendances_data.update({
+            "salary": total_salary,
+            "from_1_salary": from_1_total_salary,
+            "from_16_salary": from_16_total_salary,
+            "day_salaries": {date_: salary_ for (date_, _), salary_ in zip(shifts, salaries)},
+        })
+        return employee_attendances_data
+
+    def compute_payroll(self, employee_ids: list[EmployeeId]) -> PayrollResult:
+        """
+        Считает сводные данные сотрудников векторизованным движком (payroll_engine).
+
+        :param employee_ids: Сотрудники, для которых нужен расчет. У каждого должна быть программа мотивации.
+        :return: Результат расчета, строки в формате get_general_row_data. Считаются только явки employee_ids.
+        """
+        columns = self.attendance_columns
+        if columns is None:
+            columns = AttendanceColumns.from_api([])
+        columns = columns.select(employee_ids)
+        # В колонках только сотрудники с программой мотивации (см. prepare_data)
+        thresholds = {
+            employee_id: self.snapshot.get_program(employee_id).thresholds for employee_id in columns.employee_ids
+        }
+        return compute_payroll(columns, self.sales, thresholds)
 
-            return 0
+    def payroll_keys(self, employee_ids: list[EmployeeId]) -> dict[EmployeeId, PayrollKey]:
+        """
+        Возвращает ключи кэша зарплат сотрудников: хэши их явок и выручки, id и версию программы мотивации.
+        Сотрудники без явок в attendance_columns пропускаются.
+        """
+        if self.attendance_columns is None:
+            return {}
+        digests = self.attendance_columns.digests(self.sales)
+        keys = {}
+        for employee_id in employee_ids:
+            if employee_id in digests:
+                program = self.snapshot.get_program(employee_id)
+                keys[employee_id] = PayrollKey(*digests[employee_id], program.id, program.version)
+        return keys
 
     def get_general_table_rows(self) -> list[dict]:
         """
-        Возвращает список словарей с данными для вывода в сводную таблицу зарплаты(QTableWidget).
+        Возвращает список словарей с данными для вывода в сводную таблицу зарплаты (GeneralTableModel).
         """
         rows = []
         eligible_employees: list[tuple[EmployeeId, list[str]]] = []
 
         for employee_id in self.employees_attendances.attendances:
-            with get_session() as session:
-                employee_db = session.query(Employee).filter(Employee.id == employee_id).first()
-                if not employee_db:
-                    logger.warning(f"Сотрудник {employee_id} не найден в базе данных")
-                    continue
-
-                if not employee_db.departments:
-                    logger.warning(
-                        f"Сотрудник {employee_db.name} (ID={employee_id}) не имеет департаментов"
-                    )
-                    continue
-
-                if not employee_db.motivation_program:
-                    logger.warning(
-                        f"Сотрудник {employee_db.name} (ID={employee_id}) "
-                        f"не имеет привязанных программ мотивации"
-                    )
-                    continue
-
-                departments = [department.name for department in employee_db.departments]
-                eligible_employees.append((employee_id, departments))
+            employee_db = self.snapshot.get_employee(employee_id)
+            if not employee_db:
+                logger.warning(f"Сотрудник {employee_id} не найден в базе данных")
+                continue
+
+            if not employee_db.department_names:
+                logger.warning(
+                    f"Сотрудник {employee_db.name} (ID={employee_id}) не имеет департаментов"
+                )
+                continue
 
-        with safe_iiko_auth():
-            for employee_id, departments in eligible_employees:
-                try:
-                    employee_ = iiko_api.employees.get_employee_by_id(employee_id)
-                except EmployeeNotFoundError:
-                    logger.warning(f"Сотрудник {employee_id} не найден в iiko")
-                    continue
-
-                if not employee_.get('mainRoleId', None):
-                    logger.warning(
-                        f"Сотрудник {employee_.get('name', 'Не удалось получить имя')}"
-                        f" (ID={employee_id}) не имеет роли в iiko"
-                    )
-                    continue
-
-                employee_attendances_data = self.employees_attendances.get_general_row_data(employee_id)
-                logger.debug(
+            if not self.snapshot.get_program(employee_id):
+                logger.warning(
+                    f"Сотрудник {employee_db.name} (ID={employee_id}) "
+                    f"не имеет привязанных программ мотивации"
+                )
+                continue
+
+            eligible_employees.append((employee_id, list(employee_db.department_names)))
+
+        missing_dates = self.employees_attendances.get_dates() - set(self.sales)
+        if missing_dates:
+            logger.warning(f"Даты отсутствуют в отчёте о продажах, считаем выручку = 0: "
+                           f"{', '.join(str(date_) for date_ in sorted(missing_dates))}")
+
+        payroll = None
+        payroll_keys: dict[EmployeeId, PayrollKey] = {}
+        cached_rows: dict[EmployeeId, dict] = {}
+        computed_rows: dict[EmployeeId, dict] = {}
+        if self.vectorized:
+            employee_ids = [employee_id for employee_id, _ in eligible_employees]
+            if self.payroll_cache is not None and self.period_date_from is not None:
+                payroll_keys = self.payroll_keys(employee_ids)
+                cached_rows = self.payroll_cache.load(self.period_date_from, self.period_date_to, payroll_keys)
+            # Движок считает только сотрудников, чьих строк нет в кэше
+            payroll = self.compute_payroll(
+                [employee_id for employee_id in employee_ids if employee_id not in cached_rows]
+            )
+
+        # Сотрудники и роли iiko берутся из справочника, загруженного один раз на обновление
+        directory = get_iiko_directory(employee_id for employee_id, _ in eligible_employees)
+        trace_rows = is_enabled("TRACE")
+
+        for employee_id, departments in eligible_employees:
+            employee_ = directory.get_employee(employee_id)
+            if employee_ is None:
+                logger.warning(f"Сотрудник {employee_id} не найден в iiko")
+                continue
+
+            if not employee_.get('mainRoleId', None):
+                logger.warning(
+                    f"Сотрудник {employee_.get('name', 'Не удалось получить имя')}"
+                    f" (ID={employee_id}) не имеет роли в iiko"
+                )
+                continue
+
+            days = None
+            if employee_id in cached_rows:
+                employee_attendances_data = cached_rows[employee_id]
+                # Детализация хранится в кэше вместе со строкой
+                days = employee_attendances_data.pop("days")
+            elif payroll is not None:
+                employee_attendances_data = payroll.row_data(employee_id)
+                employee_attendances_data["day_salaries"] = payroll.day_salaries(employee_id)
+            else:
+                employee_attendances_data = self.get_general_row_data(employee_id)
+            # Строка целиком пишется только на уровне TRACE, форматирование без него не выполняется
+            if trace_rows:
+                logger.trace(
                     f"Данные по явкам сотрудника {employee_.get('name', 'Не удалось получить имя')}"
                     f" (ID={employee_id}): {employee_attendances_data}"
                 )
+            role = directory.get_role(employee_['mainRoleId'])
+            if role is None:
+                logger.warning(
+                    f"Роль {employee_['mainRoleId']} не найдена для сотрудника {employee_id}"
+                )
+                continue
+
+            # Смены, детализация и имя хранятся только для сотрудников, попавших в таблицу
+            self.employees_shifts[employee_id] = employee_attendances_data['shifts'].copy()
+            # Детализация по дням собирается здесь же, окно детализации и ведомости ее только читают
+            if days is None:
+                days = self._build_detailed_rows(
+                    employee_id, employee_attendances_data['shifts'], employee_attendances_data['day_salaries']
+                )
+                if employee_id in payroll_keys:
+                    # Копия до того, как в строку добавятся данные сотрудника из iiko
+                    computed_rows[employee_id] = {**employee_attendances_data, "days": days}
+            self.employees_days[employee_id] = days
+            self.employees_names[employee_id] = employee_display_name_from_iiko(employee_)
+
+            first_name = employee_.get('firstName', " ")
+            last_name = employee_.get('lastName', " ")
+
+            employee_attendances_data.update({
+                "name": employee_['name'],
+                "full_name": first_name + ' ' + last_name,
+                "role": role['name'],
+                "code": employee_['code'],
+                "departments": " ".join(departments),
+                "id": employee_id,
+            })
+            rows.append(employee_attendances_data)
 
-                total_salary = 0
-                from_1_total_salary = 0
-                from_16_total_salary = 0
-
-                self.employees_shifts[employee_.get("id")] = employee_attendances_data['shifts'].copy()
-                for date_, data in employee_attendances_data['shifts'].items():
-                    shift_type = data['shift_type']
-                    hours_duration = data['hours_duration']
-                    if date_ not in self.sales:
-                        logger.warning(
-                            f"Дата {date_} отсутствует в отчёте о продажах, "
-                            f"считаем выручку = 0"
-                        )
-                    salary_ = self.calculate_salary(
-                        employee_id,
-                        date_,
-                        shift_type,
-                        per_hour=True,
-                        duration_seconds=hours_duration * 3600,
-                    )
-                    logger.debug(f"ЗП за {date_}: {salary_} продолжительность: {hours_duration}")
-                    total_salary += salary_
-                    if 1 <= date_.day <= 15:
-                        from_1_total_salary += salary_
-                    elif 16 <= date_.day <= 31:
-                        from_16_total_salary += salary_
-
-                first_name = employee_.get('firstName', " ")
-                last_name = employee_.get('lastName', " ")
-
-                try:
-                    role_name = self.iiko_api.roles.get_role_by_id(employee_['mainRoleId'])['name']
-                except RoleNotFoundError:
-                    logger.warning(
-                        f"Роль {employee_['mainRoleId']} не найдена для сотрудника {employee_id}"
-                    )
-                    continue
-
-                employee_attendances_data.update({
-                    "name": employee_['name'],
-                    "full_name": first_name + ' ' + last_name,
-                    "role": role_name,
-                    "code": employee_['code'],
-                    "departments": " ".join(departments),
-                    "id": employee_id,
-                    "salary": total_salary,
-                    "from_1_salary": from_1_total_salary,
-                    "from_16_salary": from_16_total_salary,
-                })
-                rows.append(employee_attendances_data)
-
+        if computed_rows and payroll_keys:
+            self.payroll_cache.store(self.period_date_from, self.period_date_to, payroll_keys, computed_rows)
         return rows
 
     def render_general_table(self) -> None:
@@ -568,59 +492,26 @@ class AttendancesDataDriver:
         except Exception as err:
             logger.exception(f"Произошла ошибка при получении данных для сводной таблицы:\n{err}")
             raise
+        self.fill_general_table(rows)
 
-        self.general_table.setRowCount(0)
-        self.general_table.setRowCount(len(rows))
-        self.general_table.setColumnCount(24)
-
-        for row_index, row_data in enumerate(rows):
-
-            self.general_table.setItem(row_index, 0, QTableWidgetItem(str(row_data['name'])))
-            self.general_table.setItem(row_index, 1, QTableWidgetItem(str(row_data['full_name'])))
-            self.general_table.setItem(row_index, 2, QTableWidgetItem(str(row_data['from_1_salary'])))
-            self.general_table.setItem(row_index, 3, QTableWidgetItem(str(row_data['full_shifts_count_from_1'])))
-            self.general_table.setItem(row_index, 4, QTableWidgetItem(str(row_data['half_shifts_count_from_1'])))
-            self.general_table.setItem(row_index, 5, QTableWidgetItem(str(row_data['from_16_salary'])))
-            self.general_table.setItem(row_index, 6, QTableWidgetItem(str(row_data['full_shifts_count_from_16'])))
-            self.general_table.setItem(row_index, 7, QTableWidgetItem(str(row_data['half_shifts_count_from_16'])))
-            self.general_table.setItem(row_index, 8, QTableWidgetItem(str(row_data['salary'])))
-            self.general_table.setItem(row_index, 9, QTableWidgetItem(str(row_data['full_shifts_count'])))
-            self.general_table.setItem(row_index, 10, QTableWidgetItem(str(row_data['half_shifts_count'])))
-            self.general_table.setItem(row_index, 11, QTableWidgetItem(str(row_data['taxi_paid_count'])))
-            self.general_table.setItem(row_index, 12, QTableWidgetItem(str(row_data['taxi_paid_sum'])))
-            self.general_table.setItem(row_index, 13, QTableWidgetItem(str(row_data['role'])))
-            self.general_table.setItem(row_index, 14, QTableWidgetItem(str(row_data['departments'])))
-            self.general_table.setItem(row_index, 15, QTableWidgetItem(str(row_data['code'])))
-            self.general_table.setItem(row_index, 16, QTableWidgetItem(str(row_data['id'])))
-            self.general_table.setItem(row_index, 17, QTableWidgetItem('0')) # Личные списания
-            self.general_table.setItem(row_index, 18, QTableWidgetItem('0')) # Ревизия
-            self.general_table.setItem(row_index, 19, QTableWidgetItem('0')) # Форма
-            self.general_table.setItem(row_index, 20, QTableWidgetItem('0')) # Кофе
-            self.general_table.setItem(row_index, 21, QTableWidgetItem('0')) # Авансы
-            self.general_table.setItem(row_index, 22, QTableWidgetItem('0')) # Надбавки
-            self.general_table.setItem(row_index, 23, QTableWidgetItem('0')) # На карту
-
-            if row_data['warnings']:  # Если есть предупреждение
-                for col_index in range(self.general_table.columnCount()):
-                    # Окрашиваем строку в красный цвет
-                    self.general_table.item(row_index, col_index).setBackground(QColor(255, 10, 10, 80))
-
+    def fill_general_table(self, rows: list[dict]) -> None:
+        """
+        Передает готовые строки (см. get_general_table_rows) в модель сводной таблицы.
+        Вызывается только в потоке GUI.
+        """
+        self.general_model.set_rows(rows)
+        # Ширина столбцов подбирается один раз после загрузки, а не при каждой перерисовке
         self.general_table.resizeColumnsToContents()
-        self.general_table.resizeRowsToContents()
 
-        self.general_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
-        self.general_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
-
-    def on_general_table_double_clicked(self, item: QTableWidgetItem) -> None:
+    def on_general_table_double_clicked(self, index: QModelIndex) -> None:
         """
         Вызывается при двойном клике на строке таблицы с общей информацией о зарплате.
         """
-        employee_id = self.general_table.item(item.row(), 16).text()
-        employee_name = self.general_table.item(item.row(), 0).text()
+        row_data = self.general_model.row_data(index.row())
         self.render_detailed_table(
             parent=self.general_table,
-            employee_id=employee_id,
-            employee_name=employee_name
+            employee_id=row_data['id'],
+            employee_name=row_data['name'],
         )
 
     def get_shift_type(self, employee_id: EmployeeId, date_: date) -> ShiftType:
@@ -632,59 +523,63 @@ class AttendancesDataDriver:
         """
         return ShiftType(self.employees_shifts[employee_id][date_]["shift_type"])
 
-    def get_detailed_table_rows(self, employee_id: str) -> list:
+    def _build_detailed_rows(
+            self,
+            employee_id: EmployeeId,
+            shifts: dict[date, dict],
+            day_salaries: dict[date, int],
+    ) -> list[dict]:
         """
-        Возвращает список словарей с данными для вывода в таблицу с подробной информацией о зарплате.
+        Собирает строки детализации сотрудника по дням из уже рассчитанных смен и зарплат.
+
+        :param employee_id: Id сотрудника
+        :param shifts: Смены сотрудника по датам (shift_type, hours_duration)
+        :param day_salaries: Зарплата сотрудника по датам
+        :return: Строки с ключами date, shift_type, period, salary, is_taxi_paid, warning
         """
         rows = []
-        employee_id = EmployeeId(employee_id)
-        employee_attendances_data = self.employees_attendances.get_employee_detailed_data(employee_id)
-
-        logger.debug(f"Смены сотрудника {employee_id}:\n  {self.employees_shifts[employee_id]}")
-
-        is_taxi_paid = False
-
-        for date_, employee_attendance in employee_attendances_data.items():
+        for date_, employee_attendance in self.employees_attendances.attendances[employee_id].items():
             warning = False
-            logger.debug(f"Обрабатываем дату {date_}")
             # Если количество явок за дату date_ больше 1
             if len(employee_attendance) > 1:
                 is_taxi_paid = "?"
-                logger.debug(f"Обнаружено больше одной явки у {employee_id} за дату: {date_}")
                 warning = True
-                period = [attendance.attendance_string for attendance in employee_attendance]
-                period = "\n".join(period)
-                logger.debug(f"Строка периода явок сформирована: {period}")
-                attendance_duration = sum([attendance.duration.total_seconds() for attendance in employee_attendance])
+                period = "\n".join(attendance.attendance_string for attendance in employee_attendance)
             else:
                 is_taxi_paid = employee_attendance[0].is_taxi_paid
                 period = employee_attendance[0].attendance_string
-                attendance_duration = employee_attendance[0].duration.total_seconds()
 
             if any(attendance.crosses_period_boundary for attendance in employee_attendance):
                 warning = True
 
-            shift_type = self.get_shift_type(employee_id, date_)
+            shift_type = ShiftType(shifts[date_]["shift_type"])
             if shift_type == ShiftType.WARNING:
                 warning = True
-            salary = self.calculate_salary(
-                employee_id,
-                date_,
-                shift_type,
-                per_hour=True,
-                duration_seconds=attendance_duration
-            )
 
             rows.append({
                 "date": date_,
                 "shift_type": str(shift_type),
                 "period": period,
-                "salary": salary,
+                "salary": day_salaries.get(date_, 0),
                 "is_taxi_paid": is_taxi_paid,
                 "warning": warning,
             })
         return rows
 
+    def get_detailed_table_rows(self, employee_id: str) -> list:
+        """
+        Возвращает список словарей с данными для вывода в таблицу с подробной информацией о зарплате.
+        Строки рассчитываются в get_general_table_rows, здесь они только читаются.
+        """
+        return self.employees_days.get(EmployeeId(employee_id), [])
+
+    def get_employee_display_name(self, employee_id: str) -> str | None:
+        """
+        Возвращает имя сотрудника для ведомости (firstName + lastName из iiko),
+        сохраненное при расчете сводной таблицы, или None, если сотрудника нет в таблице.
+        """
+        return self.employees_names.get(EmployeeId(employee_id))
+
     def render_detailed_table(self, parent, employee_id: str, employee_name: str) -> None:
         """
         Выводит данные подробного отчета по зарплате в таблицу.
@@ -697,12 +592,11 @@ class AttendancesDataDriver:
         self.detailed_table.setHorizontalHeaderLabels(["Дата", "Смена", "Период", "Зарплата", "Такси"])
 
         for row, row_data in enumerate(rows):
-            logger.debug(f"Такси оплачено: {row_data['is_taxi_paid']}")
             if row_data['is_taxi_paid']:
                 if row_data['is_taxi_paid'] == "?":
                     self.detailed_table.setItem(row, 4, QTableWidgetItem("?"))
                 else:
-                    self.detailed_table.setItem(row, 4, QTableWidgetItem("200")) # TODO: Вынести в настройки
+                    self.detailed_table.setItem(row, 4, QTableWidgetItem(str(TAXI_PRICE)))
             else:
                 self.detailed_table.setItem(row, 4, QTableWidgetItem("0"))
 
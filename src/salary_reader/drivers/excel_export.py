@@ -0,0 +1,229 @@
+"""
+Выгрузка сводной таблицы зарплат в Excel.
+
+Книга пишется в режиме openpyxl write-only: строки сразу сериализуются в файл и не хранятся в памяти,
+стили заданы один раз именованными стилями. Данные берутся из рассчитанных строк (модель сводной таблицы
+и детализация драйвера), а не из виджета, поэтому выгрузку можно выполнять в фоновом потоке.
+
+Листы: сводная таблица и детализация по дням всех сотрудников. Если строк детализации больше,
+чем помещается на лист Excel, они продолжаются на следующем листе.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from salary_reader.drivers.attendance_list import TAXI_PRICE
+from salary_reader.drivers.general_table_model import ADJUSTMENT_KEYS, COLUMN_KEYS, HEADERS
+from salary_reader.core.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from salary_reader.drivers.attendances import AttendancesDataDriver
+
+logger = get_logger(__name__, level="DEBUG")
+
+SUMMARY_SHEET_TITLE = "Сводная таблица зарплат"
+DETAIL_SHEET_TITLE = "Детализация по дням"
+DETAIL_HEADERS = ("ФИО", "Табельный", "Дата", "Смена", "Период", "Зарплата", "Такси", "Предупреждение")
+
+# Максимум строк на листе Excel, включая заголовок
+MAX_SHEET_ROWS = 1_048_576
+
+# Столбцы сводной таблицы, которые выгружаются текстом, даже если похожи на число
+_TEXT_KEYS = frozenset({"name", "full_name", "role", "departments", "code", "id"})
+# Денежные столбцы получают формат с разделителем разрядов, количества смен выгружаются простыми числами
+_MONEY_KEYS = frozenset({"from_1_salary", "from_16_salary", "salary", "taxi_paid_sum"}) | frozenset(ADJUSTMENT_KEYS)
+_SUMMARY_WIDTHS = {"name": 30, "full_name": 30, "role": 20, "departments": 20, "id": 38}
+_DETAIL_WIDTHS = (30, 12, 12, 14, 28, 12, 10, 16)
+
+HEADER_STYLE = "salary_header"
+NUMBER_STYLE = "salary_number"
+DATE_STYLE = "salary_date"
+WARNING_STYLE = "salary_warning"
+
+ProgressCallback = Callable[[int, str], None]
+
+
+@dataclass(slots=True)
+class ExcelExportData:
+    """
+    Данные для выгрузки, собранные в потоке GUI.
+
+    :var summary_rows: Значения строк сводной таблицы в порядке COLUMN_KEYS и в текущем порядке сортировки.
+    :var warnings: Признак предупреждения для каждой строки сводной таблицы.
+    :var details: Детализация по дням: (имя сотрудника, табельный, строки детализации драйвера).
+    """
+    summary_rows: list[list[Any]]
+    warnings: list[bool]
+    details: list[tuple[str, str, list[dict]]]
+
+
+def collect_export_data(driver: "AttendancesDataDriver") -> ExcelExportData:
+    """
+    Собирает данные для выгрузки из модели сводной таблицы и детализации драйвера.
+    Вызывается в потоке GUI: значения копируются, поэтому дальнейшие правки таблицы не влияют на выгрузку.
+    """
+    model = driver.general_model
+    summary_rows = [list(values) for values in model.iter_values()]
+    warnings = []
+    details = []
+    for row in range(model.rowCount()):
+        row_data = model.row_data(row)
+        warnings.append(bool(row_data.get("warnings")))
+        employee_id = row_data["id"]
+        name = driver.get_employee_display_name(employee_id) or row_data.get("name", "")
+        details.append((name, str(row_data.get("code", "")), driver.get_detailed_table_rows(employee_id)))
+    return ExcelExportData(summary_rows=summary_rows, warnings=warnings, details=details)
+
+
+def _register_styles(workbook) -> None:
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+    thin = Side(border_style="thin", color="000000")
+    header = NamedStyle(name=HEADER_STYLE)
+    header.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    header.fill = PatternFill(start_color="00339966", end_color="00339966", fill_type="solid")
+    header.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header.font = Font(bold=True, color="00FFFFFF", name="Arial")
+
+    number = NamedStyle(name=NUMBER_STYLE, number_format="#,##0")
+    date_style = NamedStyle(name=DATE_STYLE, number_format="DD.MM.YYYY")
+    warning = NamedStyle(name=WARNING_STYLE)
+    warning.fill = PatternFill(start_color="00FFC7CE", end_color="00FFC7CE", fill_type="solid")
+
+    for style in (header, number, date_style, warning):
+        workbook.add_named_style(style)
+
+
+def _number(value: Any) -> Any:
+    """
+    Приводит значение к числу, если это возможно (удержания вводятся пользователем строкой).
+    Нечисловое значение выгружается как есть.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(str(value).replace(",", ".").replace(" ", ""))
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def _header_row(sheet, headers) -> list:
+    from openpyxl.cell import WriteOnlyCell
+
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, header)
+        cell.style = HEADER_STYLE
+        cells.append(cell)
+    return cells
+
+
+def _create_sheet(workbook, title: str, headers, widths) -> Any:
+    from openpyxl.utils import get_column_letter
+
+    sheet = workbook.create_sheet(title)
+    # Ширины и закрепление заголовка в режиме write-only задаются до первой строки
+    for column, width in enumerate(widths, start=1):
+        sheet.column_dimensions[get_column_letter(column)].width = width
+    sheet.freeze_panes = "A2"
+    sheet.append(_header_row(sheet, headers))
+    return sheet
+
+
+def _write_summary(workbook, data: ExcelExportData) -> None:
+    from openpyxl.cell import WriteOnlyCell
+
+    sheet = _create_sheet(
+        workbook, SUMMARY_SHEET_TITLE, HEADERS, [_SUMMARY_WIDTHS.get(key, 20) for key in COLUMN_KEYS]
+    )
+    # Ячейка со стилем создается только там, где он нужен, остальные значения передаются как есть
+    text_columns = [key in _TEXT_KEYS for key in COLUMN_KEYS]
+    money_columns = [key in _MONEY_KEYS for key in COLUMN_KEYS]
+    adjustment_columns = [key in ADJUSTMENT_KEYS for key in COLUMN_KEYS]
+    for values, warning in zip(data.summary_rows, data.warnings):
+        cells = []
+        for value, is_text, is_money, is_adjustment in zip(values, text_columns, money_columns, adjustment_columns):
+            if is_text:
+                cells.append(str(value))
+                continue
+            if is_adjustment:
+                value = _number(value)
+            if is_money and not isinstance(value, str):
+                value = WriteOnlyCell(sheet, value)
+                value.style = NUMBER_STYLE
+            cells.append(value)
+        if warning:
+            cells[0] = WriteOnlyCell(sheet, cells[0])
+            cells[0].style = WARNING_STYLE
+        sheet.append(cells)
+
+
+def _detail_row(sheet, name: str, code: str, row: dict) -> list:
+    from openpyxl.cell import WriteOnlyCell
+
+    date_cell = WriteOnlyCell(sheet, row["date"])
+    date_cell.style = DATE_STYLE
+
+    is_taxi_paid = row["is_taxi_paid"]
+    taxi = "?" if is_taxi_paid == "?" else (TAXI_PRICE if is_taxi_paid else 0)
+    return [name, code, date_cell, row["shift_type"], row["period"], row["salary"], taxi,
+            "!" if row["warning"] else ""]
+
+
+def write_salary_workbook(
+        path: str | Path,
+        data: ExcelExportData,
+        report: ProgressCallback | None = None,
+        check_cancelled: Callable[[], None] | None = None,
+        max_sheet_rows: int = MAX_SHEET_ROWS,
+) -> Path:
+    """
+    Записывает книгу Excel со сводной таблицей и детализацией по дням.
+
+    :param path: Путь к файлу.
+    :param data: Данные выгрузки (collect_export_data).
+    :param report: Вызывается с процентом выполнения и описанием этапа.
+    :param check_cancelled: Вызывается между сотрудниками, может прервать выгрузку исключением (TaskContext).
+    :param max_sheet_rows: Сколько строк помещается на лист детализации, включая заголовок.
+    :return: Путь к записанному файлу.
+    """
+    from openpyxl import Workbook
+
+    path = Path(path)
+    report = report or (lambda percent, message: None)
+    check_cancelled = check_cancelled or (lambda: None)
+
+    workbook = Workbook(write_only=True)
+    _register_styles(workbook)
+
+    report(0, "Сводная таблица...")
+    _write_summary(workbook, data)
+    check_cancelled()
+
+    sheet = _create_sheet(workbook, DETAIL_SHEET_TITLE, DETAIL_HEADERS, _DETAIL_WIDTHS)
+    sheet_rows, sheets_count = 1, 1
+    employees_count = len(data.details)
+    for position, (name, code, rows) in enumerate(data.details):
+        for row in rows:
+            if sheet_rows >= max_sheet_rows:
+                sheets_count += 1
+                sheet = _create_sheet(
+                    workbook, f"{DETAIL_SHEET_TITLE} ({sheets_count})", DETAIL_HEADERS, _DETAIL_WIDTHS
+                )
+                sheet_rows = 1
+            sheet.append(_detail_row(sheet, name, code, row))
+            sheet_rows += 1
+        if position % 50 == 0:
+            check_cancelled()
+            report(10 + 80 * position // max(employees_count, 1), "Детализация по дням...")
+
+    report(90, "Сохранение файла...")
+    check_cancelled()
+    workbook.save(str(path))
+    report(100, "Готово")
+    logger.info(f"Выгрузка в Excel: {len(data.summary_rows)} строк сводной таблицы, листов детализации "
+                f"{sheets_count}, файл {path}")
+    return path
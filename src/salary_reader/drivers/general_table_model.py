@@ -0,0 +1,158 @@
+"""
+Модель сводной таблицы зарплат.
+
+Строки хранятся в виде словарей, рассчитанных драйвером (см. AttendancesDataDriver.get_general_table_rows).
+Текст и цвет ячейки вычисляются только для ячеек, которые запрашивает представление, поэтому стоимость отрисовки
+зависит от видимой области, а не от числа сотрудников.
+Столбцы удержаний и выплат заполняет пользователь, их значения хранятся в модели отдельно от рассчитанных данных.
+"""
+from typing import Any, Iterator
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QColor
+
+# Столбцы: ключ в строке драйвера и заголовок
+COLUMNS: tuple[tuple[str, str], ...] = (
+    ("name", "ФИО"),
+    ("full_name", "Полное имя"),
+    ("from_1_salary", "Сумма ЗП\nc 1 по 15"),
+    ("full_shifts_count_from_1", "Кол-во полных смен\nс 1 по 15"),
+    ("half_shifts_count_from_1", "Кол-во неполных смен\nс 1 по 15"),
+    ("from_16_salary", "Сумма ЗП\n c 16 до конца месяца"),
+    ("full_shifts_count_from_16", "Кол-во полных смен\n c 16 до конца месяца"),
+    ("half_shifts_count_from_16", "Кол-во неполных смен\n c 16 до конца месяца"),
+    ("salary", "Сумма ЗП\n за весь месяц"),
+    ("full_shifts_count", "Кол-во полных смен\n за весь месяц"),
+    ("half_shifts_count", "Кол-во неполных смен\n за весь месяц"),
+    ("taxi_paid_count", "Кол-во оплаченных\nпоездок такси"),
+    ("taxi_paid_sum", "Сумма оплаченных\nпоездок такси"),
+    ("role", "Роль"),
+    ("departments", "Отдел"),
+    ("code", "Табельный"),
+    ("id", "id"),
+    # Удержания и выплаты, вводятся пользователем
+    ("self", "Личные списания"),
+    ("revision", "Ревизия"),
+    ("form", "Форма"),
+    ("coffee", "Кофе"),
+    ("advances", "Авансы"),
+    ("bonus", "Надбавки"),
+    ("on_card", "На карту"),
+)
+HEADERS: tuple[str, ...] = tuple(header for _, header in COLUMNS)
+COLUMN_KEYS: tuple[str, ...] = tuple(key for key, _ in COLUMNS)
+
+# Ключи удержаний (передаются в ведомость как deduction) и выплат
+DEDUCTION_KEYS = ("self", "revision", "form", "coffee", "advances")
+ADJUSTMENT_KEYS = DEDUCTION_KEYS + ("bonus", "on_card")
+FIRST_ADJUSTMENT_COLUMN = COLUMN_KEYS.index(ADJUSTMENT_KEYS[0])
+
+WARNING_BACKGROUND = QColor(255, 10, 10, 80)
+
+
+def _sort_key(value: Any) -> tuple:
+    """Числа (в том числе введенные строкой) сортируются как числа и идут перед текстом."""
+    if isinstance(value, (int, float)):
+        return 0, value, ""
+    try:
+        return 0, float(value), ""
+    except (TypeError, ValueError):
+        return 1, 0, str(value)
+
+
+class GeneralTableModel(QAbstractTableModel):
+    """
+    Модель сводной таблицы зарплат поверх рассчитанных строк.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+        # Удержания и выплаты по строкам, значения в том виде, в каком их ввел пользователь
+        self._adjustments: list[dict[str, str]] = []
+
+    def set_rows(self, rows: list[dict]) -> None:
+        """
+        Заменяет строки таблицы, удержания и выплаты сбрасываются в 0.
+
+        :param rows: Строки в формате AttendancesDataDriver.get_general_table_rows.
+        """
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._adjustments = [dict.fromkeys(ADJUSTMENT_KEYS, "0") for _ in self._rows]
+        self.endResetModel()
+
+    def row_data(self, row: int) -> dict:
+        """Возвращает рассчитанные данные строки."""
+        return self._rows[row]
+
+    def adjustments(self, row: int) -> dict[str, str]:
+        """Возвращает удержания и выплаты строки (ключи ADJUSTMENT_KEYS)."""
+        return self._adjustments[row]
+
+    def value(self, row: int, column: int) -> Any:
+        """Возвращает значение ячейки без преобразования в текст."""
+        key = COLUMN_KEYS[column]
+        if column >= FIRST_ADJUSTMENT_COLUMN:
+            return self._adjustments[row][key]
+        return self._rows[row][key]
+
+    def iter_values(self) -> Iterator[list[Any]]:
+        """Перебирает значения строк в порядке столбцов, например для выгрузки в Excel."""
+        for row in range(len(self._rows)):
+            yield [self.value(row, column) for column in range(len(COLUMNS))]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return str(self.value(index.row(), index.column()))
+        if role == Qt.ItemDataRole.BackgroundRole and self._rows[index.row()]['warnings']:
+            return WARNING_BACKGROUND
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() < FIRST_ADJUSTMENT_COLUMN:
+            return False
+        self._adjustments[index.row()][COLUMN_KEYS[index.column()]] = str(value).strip()
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.isValid() and index.column() >= FIRST_ADJUSTMENT_COLUMN:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        if not self._rows:
+            return
+        self.layoutAboutToBeChanged.emit()
+        order_ = sorted(
+            range(len(self._rows)),
+            key=lambda row: _sort_key(self.value(row, column)),
+            reverse=order == Qt.SortOrder.DescendingOrder,
+        )
+        self._rows = [self._rows[row] for row in order_]
+        self._adjustments = [self._adjustments[row] for row in order_]
+
+        # Переносим выделение и текущую ячейку представления на новые позиции строк
+        new_positions = {old: new for new, old in enumerate(order_)}
+        old_indexes = self.persistentIndexList()
+        new_indexes = [
+            self.index(new_positions[index.row()], index.column()) if index.isValid() else QModelIndex()
+            for index in old_indexes
+        ]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
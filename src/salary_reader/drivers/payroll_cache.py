@@ -0,0 +1,168 @@
+"""
+Постоянный кэш строк сводной таблицы зарплат по сотрудникам за период.
+
+Строка сотрудника (смены, суммы, зарплаты и детализация по дням) зависит только от его явок за период,
+выручки в дни явок и порогов его программы мотивации. Поэтому строка хранится вместе с ключом: хэш явок,
+хэш выручки, id и версия программы (MotivationProgram.version). При обновлении векторизованный движок считает
+только сотрудников, у которых ключ изменился, и только для них собирается детализация, остальные строки
+берутся из кэша.
+На сотрудника и период хранится одна запись, новый расчет заменяет прежний.
+
+Кэш хранится в отдельном файле SQLite рядом с БД приложения, как и кэш данных iiko.
+"""
+import json
+import threading
+from datetime import date
+from typing import Mapping, NamedTuple
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, select
+from sqlalchemy.dialects.sqlite import insert
+
+from salary_reader.core.logging_config import get_logger
+from salary_reader.core.paths import get_cache_path
+from salary_reader.drivers.salary import ShiftType
+
+logger = get_logger(__name__, level="DEBUG")
+
+CACHE_FILE_NAME = "payroll_cache.db"
+
+metadata = MetaData()
+
+payroll_rows = Table(
+    "payroll_rows",
+    metadata,
+    Column("employee_id", String, primary_key=True),
+    Column("date_from", String, primary_key=True),  # Даты периода в формате ISO
+    Column("date_to", String, primary_key=True),
+    Column("attendance_hash", String, nullable=False),
+    Column("revenue_hash", String, nullable=False),
+    Column("program_id", Integer, nullable=False),
+    Column("program_version", Integer, nullable=False),
+    Column("row", Text, nullable=False),  # JSON строки сотрудника (см. _encode_row)
+)
+
+
+class PayrollKey(NamedTuple):
+    """Все, от чего зависит строка сотрудника за период."""
+    attendance_hash: str
+    revenue_hash: str
+    program_id: int
+    program_version: int
+
+
+def _encode_row(row: dict) -> str:
+    data = {key: value for key, value in row.items() if key not in ("shifts", "day_salaries", "days")}
+    data["shifts"] = [
+        [date_.isoformat(), shift["shift_type"].value, shift["hours_duration"]]
+        for date_, shift in row["shifts"].items()
+    ]
+    data["day_salaries"] = [[date_.isoformat(), salary] for date_, salary in row["day_salaries"].items()]
+    data["days"] = [dict(day, date=day["date"].isoformat()) for day in row["days"]]
+    return json.dumps(data)
+
+
+# Разбор строк из кэша не должен стоить столько же, сколько расчет: ShiftType(value) и date.fromisoformat
+# на каждую смену заменены поиском в словарях
+_SHIFT_TYPES = {shift_type.value: shift_type for shift_type in ShiftType}
+
+
+class _Dates(dict):
+    """Даты периода по строкам ISO, каждая дата разбирается один раз на загрузку."""
+
+    def __missing__(self, day: str) -> date:
+        value = self[day] = date.fromisoformat(day)
+        return value
+
+
+def _decode_row(text: str, dates: _Dates) -> dict:
+    row = json.loads(text)
+    row["shifts"] = {
+        dates[day]: {"shift_type": _SHIFT_TYPES[shift_type], "hours_duration": hours_duration}
+        for day, shift_type, hours_duration in row["shifts"]
+    }
+    row["day_salaries"] = {dates[day]: salary for day, salary in row["day_salaries"]}
+    for day in row["days"]:
+        day["date"] = dates[day["date"]]
+    return row
+
+
+class PayrollCache:
+    """
+    Кэш строк сводной таблицы зарплат.
+    """
+
+    def __init__(self, url: str):
+        """
+        :param url: Адрес БД кэша для SQLAlchemy, например sqlite:///path/to/payroll_cache.db
+        """
+        self.engine = create_engine(url)
+        metadata.create_all(self.engine)
+
+    def load(self, date_from: date, date_to: date, keys: Mapping[str, PayrollKey]) -> dict[str, dict]:
+        """
+        Загружает строки сотрудников за период одним запросом.
+
+        :param keys: Текущий ключ каждого сотрудника.
+        :return: Строки сотрудников, у которых ключ в кэше совпал с текущим.
+        """
+        with self.engine.connect() as connection:
+            records = connection.execute(
+                select(payroll_rows.c.employee_id, payroll_rows.c.attendance_hash, payroll_rows.c.revenue_hash,
+                       payroll_rows.c.program_id, payroll_rows.c.program_version, payroll_rows.c.row)
+                .where(payroll_rows.c.date_from == date_from.isoformat(), payroll_rows.c.date_to == date_to.isoformat())
+            )
+            dates = _Dates()
+            rows = {
+                employee_id: _decode_row(row, dates)
+                for employee_id, *key, row in records
+                if keys.get(employee_id) == PayrollKey(*key)
+            }
+        logger.debug(f"Кэш зарплат: из кэша {len(rows)} из {len(keys)} сотрудников")
+        return rows
+
+    def store(self, date_from: date, date_to: date, keys: Mapping[str, PayrollKey], rows: Mapping[str, dict]) -> None:
+        """
+        Сохраняет рассчитанные строки сотрудников за период, заменяя прежние записи.
+
+        :param keys: Ключ каждого сотрудника, по которому рассчитана строка.
+        :param rows: Строки в формате PayrollResult.row_data с зарплатами по дням (day_salaries)
+            и строками детализации (days).
+        """
+        records = [
+            {
+                "employee_id": employee_id,
+                "date_from": date_from.isoformat(),
+                "date_to": date_to.isoformat(),
+                **keys[employee_id]._asdict(),
+                "row": _encode_row(row),
+            }
+            for employee_id, row in rows.items() if employee_id in keys
+        ]
+        if not records:
+            return
+        statement = insert(payroll_rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[payroll_rows.c.employee_id, payroll_rows.c.date_from, payroll_rows.c.date_to],
+            set_={name: statement.excluded[name]
+                  for name in ("attendance_hash", "revenue_hash", "program_id", "program_version", "row")},
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, records)
+        logger.debug(f"Кэш зарплат: сохранено {len(records)} сотрудников")
+
+
+_default_cache: PayrollCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_payroll_cache() -> PayrollCache:
+    """
+    Возвращает кэш приложения, файл создается при первом обращении.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = get_cache_path(CACHE_FILE_NAME)
+            logger.info(f"Кэш зарплат: {path}")
+            _default_cache = PayrollCache(f"sqlite:///{path}")
+        return _default_cache
@@ -0,0 +1,408 @@
+"""
+Векторизованный расчет сводной таблицы зарплат на NumPy.
+
+Все явки периода хранятся колонками: индекс сотрудника, начало и конец в микросекундах от эпохи,
+продолжительность и день месяца. Ограничение 10:00 / 22:00, округление до 30 минут, тип смены, такси,
+пороги мотивации и суммы по половинам месяца считаются операциями над массивами, поэтому время расчета
+зависит от числа явок, а не от количества Python объектов.
+
+Результат совпадает с AttendancesList.get_general_row_data и почасовым расчетом calculate_salaries.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Iterable, Mapping
+
+import numpy as np
+
+from salary_reader.drivers.attendance_list import FULL_SHIFT_HOURS, HALF_SHIFT_HOURS, TAXI_AFTER_HOUR, \
+    TAXI_MIN_HOURS, TAXI_PRICE
+from salary_reader.drivers.salary import PAID_SHIFT_HOURS, ShiftType, ThresholdIndex
+
+TAXI_MIN_SECONDS = TAXI_MIN_HOURS * 3600
+SCHEDULE_FIRST_HOUR = 7
+SCHEDULE_LAST_HOUR = 22
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_SECOND_US = 1_000_000
+_HOUR_US = 3600 * _SECOND_US
+_DAY_US = 24 * _HOUR_US
+# Явка, закрытая позже 22:00 (22:01 и позже), обрезается до 22:00
+_CAP_END_FROM_US = 22 * _HOUR_US + 60 * _SECOND_US
+_CAP_END_TO_US = 22 * _HOUR_US
+# Явка, открытая раньше 10:30, начинается с 10:00
+_CAP_START_BEFORE_US = 10 * _HOUR_US + 30 * 60 * _SECOND_US
+_CAP_START_TO_US = 10 * _HOUR_US
+
+
+def _to_epoch_us(value: datetime) -> int:
+    """
+    Переводит время в микросекунды от эпохи по "настенному" времени.
+    Смещение часового пояса отбрасывается, как и при работе Attendance с часами и датами.
+    """
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _day_to_date(day_number: int) -> date:
+    return date.fromordinal(_EPOCH_ORDINAL + int(day_number))
+
+
+def _date_to_day(value: date) -> int:
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+class AttendanceColumns:
+    """
+    Явки периода в колоночном виде.
+
+    :var employee_ids: Идентификаторы сотрудников, позиция в списке - индекс сотрудника.
+    :var employee_index: Индекс сотрудника для каждой явки.
+    :var start_us: Начало явки в микросекундах от эпохи.
+    :var end_us: Окончание явки в микросекундах от эпохи.
+    :var crosses_period_boundary: Признак явки, выходящей за границы периода.
+    """
+    __slots__ = ("employee_ids", "employee_index", "start_us", "end_us", "crosses_period_boundary")
+
+    def __init__(
+            self,
+            employee_ids: list[str],
+            employee_index: np.ndarray,
+            start_us: np.ndarray,
+            end_us: np.ndarray,
+            crosses_period_boundary: np.ndarray,
+    ):
+        self.employee_ids = employee_ids
+        self.employee_index = employee_index
+        self.start_us = start_us
+        self.end_us = end_us
+        self.crosses_period_boundary = crosses_period_boundary
+
+    def __len__(self) -> int:
+        return len(self.employee_index)
+
+    @classmethod
+    def from_api(
+            cls,
+            api_attendances: Iterable[dict],
+            period_date_from: date | None = None,
+            period_date_to: date | None = None,
+            employee_filter: set[str] | None = None,
+    ) -> "AttendanceColumns":
+        """
+        Собирает колонки из записей iiko, применяя те же фильтры, что и parse_api_attendance:
+        пересечение с периодом и открытие явки между 07:00 и 22:00.
+
+        :param api_attendances: Записи явок iiko.
+        :param period_date_from: Дата начала периода.
+        :param period_date_to: Дата окончания периода.
+        :param employee_filter: Сотрудники, чьи явки учитываются. Если None, учитываются все.
+        """
+        employee_positions: dict[str, int] = {}
+        employee_index = []
+        start_us = []
+        end_us = []
+        for record in api_attendances:
+            employee_id = record['employeeId']
+            if employee_filter is not None and employee_id not in employee_filter:
+                continue
+            position = employee_positions.setdefault(employee_id, len(employee_positions))
+            employee_index.append(position)
+            start_us.append(_to_epoch_us(datetime.fromisoformat(record['dateFrom'])))
+            end_us.append(_to_epoch_us(datetime.fromisoformat(record.get('dateTo', record['dateFrom']))))
+
+        employee_index = np.asarray(employee_index, dtype=np.int64)
+        start_us = np.asarray(start_us, dtype=np.int64)
+        end_us = np.asarray(end_us, dtype=np.int64)
+        start_day = start_us // _DAY_US
+        end_day = end_us // _DAY_US
+
+        start_hour = (start_us - start_day * _DAY_US) // _HOUR_US
+        keep = (start_hour >= SCHEDULE_FIRST_HOUR) & (start_hour <= SCHEDULE_LAST_HOUR)
+        if period_date_from is not None and period_date_to is not None:
+            first_day = _date_to_day(period_date_from)
+            last_day = _date_to_day(period_date_to)
+            keep &= (start_day <= last_day) & (end_day >= first_day)
+            crosses = (start_day < first_day) | (end_day > last_day)
+        else:
+            crosses = np.zeros(len(start_us), dtype=bool)
+
+        # Сотрудники без единой учтенной явки не попадают в результат, индексы переупаковываются
+        kept_index = employee_index[keep]
+        used, packed_index = np.unique(kept_index, return_inverse=True)
+        first_seen = np.full(len(used), len(kept_index), dtype=np.int64)
+        np.minimum.at(first_seen, packed_index, np.arange(len(kept_index)))
+        order = np.argsort(first_seen, kind="stable")
+        remap = np.empty(len(used), dtype=np.int64)
+        remap[order] = np.arange(len(used))
+        all_ids = list(employee_positions)
+
+        return cls(
+            employee_ids=[all_ids[used[position]] for position in order],
+            employee_index=remap[packed_index] if len(kept_index) else kept_index,
+            start_us=start_us[keep],
+            end_us=end_us[keep],
+            crosses_period_boundary=crosses[keep],
+        )
+
+    def select(self, employee_ids: Iterable[str]) -> "AttendanceColumns":
+        """
+        Возвращает колонки только с явками сотрудников employee_ids, порядок сотрудников сохраняется.
+        Сотрудники, которых нет в колонках, пропускаются.
+        """
+        positions = {employee_id: position for position, employee_id in enumerate(self.employee_ids)}
+        selected = np.array(sorted({positions[employee_id] for employee_id in employee_ids
+                                    if employee_id in positions}), dtype=np.int64)
+        keep = np.isin(self.employee_index, selected)
+        remap = np.full(len(self.employee_ids), -1, dtype=np.int64)
+        remap[selected] = np.arange(len(selected))
+        return AttendanceColumns(
+            employee_ids=[self.employee_ids[position] for position in selected],
+            employee_index=remap[self.employee_index[keep]],
+            start_us=self.start_us[keep],
+            end_us=self.end_us[keep],
+            crosses_period_boundary=self.crosses_period_boundary[keep],
+        )
+
+    def digests(self, sales: Mapping[date, float]) -> dict[str, tuple[str, str]]:
+        """
+        Хэши входных данных расчета каждого сотрудника: явок (начало, окончание, выход за границы периода)
+        и выручки в дни его явок. При тех же хэшах и порогах compute_payroll дает для сотрудника ту же строку.
+
+        :param sales: Выручка по датам.
+        :return: Хэш явок и хэш выручки по идентификатору сотрудника.
+        """
+        order = np.argsort(self.employee_index, kind="stable")
+        bounds = np.searchsorted(self.employee_index[order], np.arange(len(self.employee_ids) + 1))
+        start_us = self.start_us[order]
+        end_us = self.end_us[order]
+        crosses = self.crosses_period_boundary[order]
+        unique_days, day_inverse = np.unique(start_us // _DAY_US, return_inverse=True)
+        day_revenue = np.array([sales.get(_day_to_date(d), 0) for d in unique_days], dtype=np.float64)
+        revenue = day_revenue[day_inverse]
+
+        result = {}
+        for position, employee_id in enumerate(self.employee_ids):
+            rows = slice(bounds[position], bounds[position + 1])
+            attendances = hashlib.blake2b(digest_size=16)
+            for values in (start_us, end_us, crosses):
+                attendances.update(values[rows].tobytes())
+            result[employee_id] = (
+                attendances.hexdigest(),
+                hashlib.blake2b(revenue[rows].tobytes(), digest_size=16).hexdigest(),
+            )
+        return result
+
+    def durations(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Считает продолжительность явок с учетом ограничений 10:00 / 22:00 и округления до 30 минут.
+
+        :return: День явки (номер дня от эпохи), продолжительность в секундах и признак оплаты такси.
+        """
+        start_day = self.start_us // _DAY_US
+        end_day = self.end_us // _DAY_US
+        start_of_start_day = start_day * _DAY_US
+        start_of_end_day = end_day * _DAY_US
+
+        capped_end = np.where(
+            self.end_us - start_of_end_day >= _CAP_END_FROM_US, start_of_end_day + _CAP_END_TO_US, self.end_us
+        )
+        capped_start = np.where(
+            self.start_us - start_of_start_day < _CAP_START_BEFORE_US,
+            start_of_start_day + _CAP_START_TO_US,
+            self.start_us,
+        )
+        # Явка длиной больше дня или открытая после 22:00 имеет нулевую продолжительность
+        counted = (start_day == end_day) & (capped_start - start_of_start_day < 22 * _HOUR_US)
+        raw_us = np.where(counted, capped_end - capped_start, 0)
+
+        # Округление до 30 минут (банковское, как round() в Attendance)
+        minutes = raw_us / _SECOND_US / 60
+        duration_seconds = (np.round(minutes / 30) * 30 * 60).astype(np.int64)
+
+        end_hour = (capped_end - start_of_end_day) // _HOUR_US
+        is_taxi_paid = (duration_seconds > TAXI_MIN_SECONDS) & (end_hour > TAXI_AFTER_HOUR)
+        return start_day, duration_seconds, is_taxi_paid
+
+
+class PayrollResult:
+    """
+    Результат векторизованного расчета.
+
+    Хранит агрегаты по дням сотрудника (группы) и итоги по сотрудникам в массивах,
+    словари в формате AttendancesList.get_general_row_data собираются по запросу.
+    """
+
+    def __init__(self, employee_ids: list[str], groups: dict[str, np.ndarray], totals: dict[str, np.ndarray]):
+        self.employee_ids = employee_ids
+        self.groups = groups
+        self.totals = totals
+        self._positions = {employee_id: position for position, employee_id in enumerate(employee_ids)}
+        # Границы групп каждого сотрудника в массиве groups (группы отсортированы по сотруднику)
+        self._bounds = np.searchsorted(groups["employee"], np.arange(len(employee_ids) + 1))
+
+    def __contains__(self, employee_id: str) -> bool:
+        return employee_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    def row_data(self, employee_id: str) -> dict:
+        """
+        Возвращает агрегированные данные сотрудника в формате AttendancesList.get_general_row_data,
+        дополненные суммами зарплаты salary, from_1_salary и from_16_salary.
+        """
+        position = self._positions[employee_id]
+        totals = {key: values[position] for key, values in self.totals.items()}
+        data = {
+            "warnings": bool(totals["warnings"]),
+            "full_shifts_count": int(totals["full_shifts_count"]),
+            "full_shifts_count_from_1": int(totals["full_shifts_count_from_1"]),
+            "full_shifts_count_from_16": int(totals["full_shifts_count_from_16"]),
+            "half_shifts_count": int(totals["half_shifts_count"]),
+            "half_shifts_count_from_1": int(totals["half_shifts_count_from_1"]),
+            "half_shifts_count_from_16": int(totals["half_shifts_count_from_16"]),
+            "total_shifts_count": 0,
+            "total_shifts_count_from_1": 0,
+            "total_shifts_count_from_16": 0,
+            "total_duration_seconds": float(totals["total_duration_seconds"]),
+            "shifts": self.shifts(employee_id),
+            "taxi_paid_count": int(totals["taxi_paid_count"]),
+            "taxi_paid_sum": int(totals["taxi_paid_count"]) * TAXI_PRICE,
+            "salary": int(totals["salary"]),
+            "from_1_salary": int(totals["from_1_salary"]),
+            "from_16_salary": int(totals["from_16_salary"]),
+        }
+        return data
+
+    def shifts(self, employee_id: str) -> dict[date, dict]:
+        """
+        Возвращает смены сотрудника по датам в порядке появления явок.
+        """
+        position = self._positions[employee_id]
+        start, stop = self._bounds[position], self._bounds[position + 1]
+        groups = self.groups
+        shift_types = (ShiftType.WARNING, ShiftType.HALF, ShiftType.FULL)
+        return {
+            _day_to_date(groups["day"][i]): {
+                "shift_type": shift_types[groups["shift_kind"][i]],
+                "hours_duration": float(groups["hours_duration"][i]),
+            }
+            for i in range(start, stop)
+        }
+
+    def day_salaries(self, employee_id: str) -> dict[date, int]:
+        """
+        Возвращает зарплату сотрудника по датам.
+        """
+        position = self._positions[employee_id]
+        start, stop = self._bounds[position], self._bounds[position + 1]
+        return {
+            _day_to_date(self.groups["day"][i]): int(self.groups["salary"][i])
+            for i in range(start, stop)
+        }
+
+
+def compute_payroll(
+        columns: AttendanceColumns,
+        sales: Mapping[date, float],
+        thresholds: Mapping[str, ThresholdIndex | None],
+) -> PayrollResult:
+    """
+    Считает сводные данные по всем сотрудникам периода.
+
+    :param columns: Явки периода.
+    :param sales: Выручка по датам.
+    :param thresholds: Индекс порогов программы мотивации для каждого сотрудника.
+    :return: Результат расчета.
+    """
+    employees_count = len(columns.employee_ids)
+    day, duration_seconds, is_taxi_paid = columns.durations()
+
+    # Группы "сотрудник + день явки" в порядке первого появления внутри сотрудника
+    if len(day):
+        day_offset = day.min()
+        days_span = int(day.max() - day_offset) + 1
+    else:
+        day_offset, days_span = 0, 1
+    keys = columns.employee_index * days_span + (day - day_offset)
+    unique_keys, first_row, group_of_row = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.lexsort((first_row, unique_keys // days_span))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    group_of_row = rank[group_of_row]
+    unique_keys = unique_keys[order]
+    groups_count = len(unique_keys)
+
+    group_employee = unique_keys // days_span
+    group_day = unique_keys % days_span + day_offset
+    group_count = np.bincount(group_of_row, minlength=groups_count)
+    group_seconds = np.bincount(group_of_row, weights=duration_seconds, minlength=groups_count).astype(np.int64)
+    group_taxi = np.bincount(group_of_row, weights=is_taxi_paid, minlength=groups_count) > 0
+    group_crosses = np.bincount(
+        group_of_row, weights=columns.crosses_period_boundary, minlength=groups_count) > 0
+
+    hours_duration = group_seconds / 3600
+    is_full = hours_duration >= FULL_SHIFT_HOURS
+    is_half = ~is_full & (hours_duration >= HALF_SHIFT_HOURS)
+    shift_kind = is_full.astype(np.int8) * 2 + is_half.astype(np.int8)
+    warnings = (group_count > 1) | group_crosses | ~(is_full | is_half)
+
+    dates = group_day.astype("datetime64[D]")
+    day_of_month = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+    from_1 = day_of_month <= 15
+    from_16 = day_of_month >= 16
+
+    # Выручка по дням: словарь продаж читается только для уникальных дней периода
+    unique_days, day_inverse = np.unique(group_day, return_inverse=True)
+    day_revenue = np.array([sales.get(_day_to_date(d), 0) for d in unique_days], dtype=np.float64)
+    revenue = day_revenue[day_inverse]
+
+    # Порог мотивации ищется бинарным поиском отдельно для каждой программы
+    salary = np.zeros(groups_count, dtype=np.int64)
+    duration_for_salary = np.minimum(hours_duration * 3600, PAID_SHIFT_HOURS * 3600)
+    employee_indexes: dict[ThresholdIndex, list[int]] = {}
+    for position, employee_id in enumerate(columns.employee_ids):
+        index = thresholds.get(employee_id)
+        if index is not None and len(index):
+            employee_indexes.setdefault(index, []).append(position)
+    for index, positions in employee_indexes.items():
+        mask = np.isin(group_employee, positions) & (duration_for_salary > 0)
+        tier = np.searchsorted(np.asarray(index.revenues), revenue[mask], side="right")
+        reached = tier > 0
+        tier_salary = np.asarray(index.salaries, dtype=np.float64)[np.maximum(tier - 1, 0)]
+        values = np.trunc(tier_salary / PAID_SHIFT_HOURS * (duration_for_salary[mask] / 3600))
+        salary[mask] = np.where(reached, values, 0).astype(np.int64)
+
+    def per_employee(values) -> np.ndarray:
+        return np.bincount(group_employee, weights=values, minlength=employees_count)
+
+    totals = {
+        "warnings": per_employee(warnings) > 0,
+        "full_shifts_count": per_employee(is_full),
+        "full_shifts_count_from_1": per_employee(is_full & from_1),
+        "full_shifts_count_from_16": per_employee(is_full & from_16),
+        "half_shifts_count": per_employee(is_half),
+        "half_shifts_count_from_1": per_employee(is_half & from_1),
+        "half_shifts_count_from_16": per_employee(is_half & from_16),
+        "total_duration_seconds": per_employee(group_seconds),
+        "taxi_paid_count": per_employee(group_taxi),
+        "salary": per_employee(salary),
+        "from_1_salary": per_employee(np.where(from_1, salary, 0)),
+        "from_16_salary": per_employee(np.where(from_16, salary, 0)),
+    }
+    groups = {
+        "employee": group_employee,
+        "day": group_day,
+        "count": group_count,
+        "duration_seconds": group_seconds,
+        "hours_duration": hours_duration,
+        "shift_kind": shift_kind,
+        "is_taxi_paid": group_taxi,
+        "crosses_period_boundary": group_crosses,
+        "warning": warnings,
+        "revenue": revenue,
+        "salary": salary,
+    }
+    return PayrollResult(columns.employee_ids, groups, totals)
@@ -0,0 +1,151 @@
+"""
+Расчет вознаграждения по порогам программы мотивации.
+
+Модуль не обращается ни к БД, ни к iiko: пороги программы один раз компилируются в отсортированные массивы,
+после чего расчет сводится к бинарному поиску и арифметике.
+"""
+import enum
+from bisect import bisect_right
+from typing import Iterable
+
+# Максимальная оплачиваемая продолжительность смены, от нее же считается почасовая ставка
+PAID_SHIFT_HOURS = 12
+
+
+class ShiftType(enum.Enum):
+    FULL = "full"
+    HALF = "half"
+    WARNING = "warning"
+
+    def __str__(self):
+        if self == ShiftType.FULL:
+            return "ПОЛНАЯ"
+        elif self == ShiftType.HALF:
+            return "Пол смены"
+        elif self == ShiftType.WARNING:
+            return "Внимание!"
+        else:
+            return "Неизвестный"
+
+
+class ThresholdIndex:
+    """
+    Отсортированный индекс порогов программы мотивации.
+
+    Хранит пороги выручки и вознаграждения в двух параллельных кортежах,
+    поиск порога для выручки выполняется бинарным поиском.
+    """
+    __slots__ = ("revenues", "salaries")
+
+    def __init__(self, thresholds: Iterable[tuple[int, int]] = ()):
+        """
+        :param thresholds: Пары (порог выручки, вознаграждение) в любом порядке.
+        """
+        pairs = sorted(thresholds, key=lambda pair: pair[0])
+        self.revenues: tuple[int, ...] = tuple(revenue for revenue, _ in pairs)
+        self.salaries: tuple[int, ...] = tuple(salary for _, salary in pairs)
+
+    @classmethod
+    def from_program(cls, motivation_program) -> "ThresholdIndex":
+        """
+        Компилирует индекс из ORM объекта MotivationProgram.
+
+        :param motivation_program: Программа мотивации с загруженными порогами.
+        """
+        return cls((threshold.revenue_threshold, threshold.salary) for threshold in motivation_program.thresholds)
+
+    def __len__(self) -> int:
+        return len(self.revenues)
+
+    def __iter__(self):
+        return iter(zip(self.revenues, self.salaries))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ThresholdIndex):
+            return NotImplemented
+        return self.revenues == other.revenues and self.salaries == other.salaries
+
+    def __hash__(self) -> int:
+        return hash((self.revenues, self.salaries))
+
+    def __repr__(self):
+        return f"<ThresholdIndex({list(self)})>"
+
+    def find(self, revenue: float) -> tuple[int, int] | None:
+        """
+        Возвращает наибольший порог, не превышающий выручку.
+
+        :param revenue: Выручка за день.
+        :return: Пара (порог выручки, вознаграждение) или None, если выручка ниже всех порогов.
+        """
+        position = bisect_right(self.revenues, revenue)
+        if not position:
+            return None
+        return self.revenues[position - 1], self.salaries[position - 1]
+
+    def lookup(self, revenue: float) -> int | None:
+        """
+        Возвращает вознаграждение для выручки или None, если выручка ниже всех порогов.
+        """
+        position = bisect_right(self.revenues, revenue)
+        return self.salaries[position - 1] if position else None
+
+
+def calculate_shift_salary(
+        index: ThresholdIndex,
+        revenue: float,
+        duration_seconds: float | None,
+        shift_type: ShiftType | None = None,
+        per_hour: bool = True,
+) -> int:
+    """
+    Считает вознаграждение за одну смену.
+
+    :param index: Индекс порогов программы мотивации сотрудника.
+    :param revenue: Выручка за день смены.
+    :param duration_seconds: Продолжительность явки в секундах.
+    :param shift_type: Тип смены, используется при расчете не по часам.
+    :param per_hour: Почасовой расчет, если включен, то вознаграждение пропорционально часам работы.
+    :return: Вознаграждение.
+    """
+    salary = index.lookup(revenue)
+    if salary is None:
+        return 0
+
+    if per_hour:
+        if not duration_seconds or duration_seconds <= 0:
+            return 0
+        duration_seconds = min(duration_seconds, PAID_SHIFT_HOURS * 3600)
+        return int(salary / PAID_SHIFT_HOURS * (duration_seconds / 3600))
+
+    match shift_type:
+        case ShiftType.FULL:
+            return salary
+        case ShiftType.HALF:
+            return int(salary / 2)
+    return 0
+
+
+def calculate_salaries(items: Iterable[tuple[ThresholdIndex | None, float, float]]) -> list[int]:
+    """
+    Почасовой расчет вознаграждения для набора смен за один проход.
+
+    :param items: Тройки (индекс порогов программы, выручка за день, продолжительность в секундах).
+        Если индекс None (у сотрудника нет программы), вознаграждение равно 0.
+    :return: Вознаграждения в порядке входных троек.
+    """
+    max_seconds = PAID_SHIFT_HOURS * 3600
+    result = []
+    append = result.append
+    for index, revenue, duration_seconds in items:
+        if index is None or not duration_seconds or duration_seconds <= 0:
+            append(0)
+            continue
+        position = bisect_right(index.revenues, revenue)
+        if not position:
+            append(0)
+            continue
+        if duration_seconds > max_seconds:
+            duration_seconds = max_seconds
+        append(int(index.salaries[position - 1] / PAID_SHIFT_HOURS * (duration_seconds / 3600)))
+    return result
@@ -0,0 +1,140 @@
+"""
+Снимок данных БД, необходимых для расчета зарплаты.
+
+Снимок загружается фиксированным набором запросов перед расчетом и хранится в виде неизменяемых объектов,
+поэтому в циклах по явкам и сменам драйвер не обращается к ORM.
+"""
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+from sqlalchemy.orm import Session
+
+from salary_reader.core.models import Employee, Department, MotivationProgram, MotivationThreshold, \
+    association_table
+from salary_reader.drivers.salary import ThresholdIndex
+
+
+@dataclass(frozen=True, slots=True)
+class EmployeeInfo:
+    """
+    Данные сотрудника из БД, нужные для расчета.
+
+    :var id: Идентификатор сотрудника в iiko.
+    :var name: Системное имя сотрудника.
+    :var department_names: Названия отделов сотрудника.
+    :var motivation_program_id: Id программы мотивации или None, если программа не назначена.
+    """
+    id: str
+    name: str
+    department_names: tuple[str, ...] = ()
+    motivation_program_id: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ProgramInfo:
+    """
+    Программа мотивации вместе с порогами.
+
+    :var id: Id программы мотивации.
+    :var name: Название программы.
+    :var department_code: Код отдела программы.
+    :var thresholds: Скомпилированный индекс порогов программы.
+    :var version: Версия программы, новая при каждом изменении порогов.
+    """
+    id: int
+    name: str
+    department_code: str
+    thresholds: ThresholdIndex = field(default_factory=ThresholdIndex)
+    version: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class ComputeSnapshot:
+    """
+    Неизменяемый снимок сотрудников и программ мотивации для одного расчета.
+    """
+    employees: Mapping[str, EmployeeInfo] = field(default_factory=lambda: MappingProxyType({}))
+    programs: Mapping[int, ProgramInfo] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get_employee(self, employee_id: str) -> EmployeeInfo | None:
+        return self.employees.get(employee_id)
+
+    def get_program(self, employee_id: str) -> ProgramInfo | None:
+        """
+        Возвращает программу мотивации сотрудника.
+
+        :param employee_id: Идентификатор сотрудника.
+        :return: Программа мотивации или None, если сотрудник не найден или программа не назначена.
+        """
+        employee = self.employees.get(employee_id)
+        if employee is None or employee.motivation_program_id is None:
+            return None
+        return self.programs.get(employee.motivation_program_id)
+
+
+def load_compute_snapshot(session: Session, employee_ids: Iterable[str] | None = None) -> ComputeSnapshot:
+    """
+    Загружает снимок данных для расчета четырьмя запросами:
+    сотрудники, их отделы, программы мотивации и пороги этих программ.
+
+    :param session: Сессия SQLAlchemy.
+    :param employee_ids: Идентификаторы сотрудников, для которых нужен снимок. Если None, загружаются все.
+    :return: Снимок данных.
+    """
+    if employee_ids is not None:
+        employee_ids = set(employee_ids)
+        if not employee_ids:
+            return ComputeSnapshot()
+
+    employees_query = session.query(Employee.id, Employee.name, Employee.motivation_program_id)
+    departments_query = (
+        session.query(association_table.c.employee_id, Department.name)
+        .join(Department, Department.code == association_table.c.department_code)
+    )
+    if employee_ids is not None:
+        employees_query = employees_query.filter(Employee.id.in_(employee_ids))
+        departments_query = departments_query.filter(association_table.c.employee_id.in_(employee_ids))
+
+    departments_by_employee: dict[str, list[str]] = {}
+    for employee_id, department_name in departments_query:
+        departments_by_employee.setdefault(employee_id, []).append(department_name)
+
+    employees: dict[str, EmployeeInfo] = {}
+    for employee_id, name, motivation_program_id in employees_query:
+        employees[employee_id] = EmployeeInfo(
+            id=employee_id,
+            name=name,
+            department_names=tuple(departments_by_employee.get(employee_id, ())),
+            motivation_program_id=motivation_program_id,
+        )
+
+    program_ids = {employee.motivation_program_id for employee in employees.values()
+                   if employee.motivation_program_id is not None}
+    programs: dict[int, ProgramInfo] = {}
+    if program_ids:
+        thresholds_by_program: dict[int, list[tuple[int, int]]] = {}
+        thresholds_query = (
+            session.query(MotivationThreshold.motivation_program_id,
+                          MotivationThreshold.revenue_threshold,
+                          MotivationThreshold.salary)
+            .filter(MotivationThreshold.motivation_program_id.in_(program_ids))
+        )
+        for program_id, revenue_threshold, salary in thresholds_query:
+            thresholds_by_program.setdefault(program_id, []).append((revenue_threshold, salary))
+
+        programs_query = (
+            session.query(MotivationProgram.id, MotivationProgram.name, MotivationProgram.department_code,
+                          MotivationProgram.version)
+            .filter(MotivationProgram.id.in_(program_ids))
+        )
+        for program_id, name, department_code, version in programs_query:
+            programs[program_id] = ProgramInfo(
+                id=program_id,
+                name=name,
+                department_code=department_code,
+                thresholds=ThresholdIndex(thresholds_by_program.get(program_id, ())),
+                version=version,
+            )
+
+    return ComputeSnapshot(employees=MappingProxyType(employees), programs=MappingProxyType(programs))
@@ -0,0 +1,205 @@
+"""
+Локальный кэш явок и выручки iiko по отделам и дням.
+
+Кэш хранится в отдельном файле SQLite рядом с БД приложения. Для каждого дня отдела сохраняются исходные записи явок,
+пересекающие этот день, и выручка за день. Закрытый день больше не запрашивается из iiko,
+заново загружаются только отсутствующие в кэше, текущие и еще не закрытые дни.
+"""
+import json
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from sqlalchemy import Boolean, Column, Float, MetaData, String, Table, Text, create_engine, select
+from sqlalchemy.dialects.sqlite import insert
+
+from salary_reader.core.logging_config import get_logger
+from salary_reader.core.paths import get_cache_path
+
+logger = get_logger(__name__, level="DEBUG")
+
+CACHE_FILE_NAME = "iiko_cache.db"
+
+# Сколько времени после окончания дня ждать, прежде чем считать день закрытым:
+# ночные смены и кассовая смена успевают закрыться
+DAY_CLOSE_GRACE = timedelta(hours=6)
+
+metadata = MetaData()
+
+iiko_days = Table(
+    "iiko_days",
+    metadata,
+    Column("department_code", String, primary_key=True),
+    Column("day", String, primary_key=True),  # Дата в формате ISO
+    Column("attendances", Text, nullable=False),  # JSON список записей явок, пересекающих день
+    Column("revenue", Float, nullable=True),  # None, если дня нет в отчете о продажах
+    Column("fetched_at", String, nullable=False),
+    Column("closed", Boolean, nullable=False, default=False),
+)
+
+
+def _days(date_from: date, date_to: date) -> Iterable[date]:
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += timedelta(days=1)
+
+
+def _as_list(value) -> list[dict]:
+    """Приводит ответ iiko к списку: одна запись приходит словарем, пустой ответ - None."""
+    if isinstance(value, dict):
+        return [value]
+    return value or []
+
+
+def _record_days(record: dict) -> tuple[date, date]:
+    """Возвращает первый и последний день, которые пересекает запись явки."""
+    start = datetime.fromisoformat(record["dateFrom"]).date()
+    end = datetime.fromisoformat(record.get("dateTo", record["dateFrom"])).date()
+    return start, end
+
+
+def split_into_ranges(days: Iterable[date]) -> list[tuple[date, date]]:
+    """
+    Объединяет дни в непрерывные периоды, чтобы запрашивать их у iiko одним запросом на период.
+
+    :param days: Дни в любом порядке.
+    :return: Список периодов (первый день, последний день) по возрастанию.
+    """
+    ranges: list[tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+class IikoDataCache:
+    """
+    Кэш исходных данных iiko: записи явок и выручка по дням отдела.
+    """
+
+    def __init__(self, url: str):
+        """
+        :param url: Адрес БД кэша для SQLAlchemy, например sqlite:///path/to/iiko_cache.db
+        """
+        self.engine = create_engine(url)
+        metadata.create_all(self.engine)
+
+    def days_to_fetch(
+            self,
+            department_code: str,
+            date_from: date,
+            date_to: date,
+    ) -> list[date]:
+        """
+        Возвращает дни периода, которые нужно загрузить из iiko: отсутствующие в кэше и не закрытые.
+        """
+        with self.engine.connect() as connection:
+            closed_days = set(connection.scalars(
+                select(iiko_days.c.day).where(
+                    iiko_days.c.department_code == department_code,
+                    iiko_days.c.day.between(date_from.isoformat(), date_to.isoformat()),
+                    iiko_days.c.closed.is_(True),
+                )
+            ))
+        return [day for day in _days(date_from, date_to) if day.isoformat() not in closed_days]
+
+    def store(
+            self,
+            department_code: str,
+            date_from: date,
+            date_to: date,
+            api_attendances: list[dict] | dict | None,
+            sales: dict[date, float],
+            fetched_at: datetime | None = None,
+    ) -> None:
+        """
+        Сохраняет ответы iiko за период, загруженный целиком.
+
+        День считается закрытым, если он закончился не позже чем за DAY_CLOSE_GRACE до загрузки
+        и все пересекающие его явки закрыты.
+
+        :param department_code: Код отдела.
+        :param date_from: Первый день загруженного периода.
+        :param date_to: Последний день загруженного периода.
+        :param api_attendances: Ответ iiko по явкам за период.
+        :param sales: Выручка по дням за период.
+        :param fetched_at: Время загрузки, по умолчанию текущее.
+        """
+        fetched_at = fetched_at or datetime.now()
+        records_by_day: dict[date, list[dict]] = {day: [] for day in _days(date_from, date_to)}
+        for record in _as_list(api_attendances):
+            start, end = _record_days(record)
+            for day in _days(max(start, date_from), min(end, date_to)):
+                records_by_day[day].append(record)
+
+        rows = []
+        for day, records in records_by_day.items():
+            day_end = datetime.combine(day + timedelta(days=1), time.min)
+            closed = fetched_at >= day_end + DAY_CLOSE_GRACE and all("dateTo" in record for record in records)
+            rows.append({
+                "department_code": department_code,
+                "day": day.isoformat(),
+                "attendances": json.dumps(records, ensure_ascii=False),
+                "revenue": sales.get(day),
+                "fetched_at": fetched_at.isoformat(),
+                "closed": closed,
+            })
+
+        statement = insert(iiko_days)
+        statement = statement.on_conflict_do_update(
+            index_elements=[iiko_days.c.department_code, iiko_days.c.day],
+            set_={name: statement.excluded[name] for name in ("attendances", "revenue", "fetched_at", "closed")},
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, rows)
+        logger.debug(f"Кэш iiko: сохранено {len(rows)} дней отдела {department_code} ({date_from} - {date_to}), "
+                     f"закрытых {sum(row['closed'] for row in rows)}")
+
+    def load(self, department_code: str, date_from: date, date_to: date) -> tuple[list[dict], dict[date, float]]:
+        """
+        Собирает данные периода из кэша в формате ответов iiko.
+
+        :return: Записи явок, пересекающие период (без повторов), и выручка по дням.
+        """
+        attendances: list[dict] = []
+        seen: set[str] = set()
+        sales: dict[date, float] = {}
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(iiko_days.c.day, iiko_days.c.attendances, iiko_days.c.revenue)
+                .where(
+                    iiko_days.c.department_code == department_code,
+                    iiko_days.c.day.between(date_from.isoformat(), date_to.isoformat()),
+                )
+                .order_by(iiko_days.c.day)
+            )
+            for day, attendances_json, revenue in rows:
+                # Явка через полночь хранится в каждом дне, который пересекает, в период попадает один раз
+                for record in json.loads(attendances_json):
+                    key = json.dumps(record, sort_keys=True)
+                    if key not in seen:
+                        seen.add(key)
+                        attendances.append(record)
+                if revenue is not None:
+                    sales[date.fromisoformat(day)] = revenue
+        return attendances, sales
+
+
+_default_cache: IikoDataCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_iiko_data_cache() -> IikoDataCache:
+    """
+    Возвращает кэш приложения, файл создается при первом обращении.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = get_cache_path(CACHE_FILE_NAME)
+            logger.info(f"Кэш данных iiko: {path}")
+            _default_cache = IikoDataCache(f"sqlite:///{path}")
+        return _default_cache
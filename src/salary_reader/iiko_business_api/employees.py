@@ -1,99 +1,241 @@
-from typing import Type
+import hashlib
+import json
+import time
+from collections import defaultdict
+from typing import Iterable, NamedTuple
 
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
 
-from ..core.models import Employee, Department
+from ..core.models import Employee, Department, association_table
 from salary_reader.helpers.iiko_helpers import normalize_department_codes
-from salary_reader.iiko_init import iiko_api, safe_iiko_auth
+from salary_reader.iiko_init import iiko_api, safe_iiko_auth, run_concurrently
 from salary_reader.core.logging_config import get_logger
 
 logger = get_logger(__name__, level="DEBUG")
 
+# Сколько секунд справочник сотрудников и ролей iiko считается актуальным
+DIRECTORY_MAX_AGE_SECONDS = 300
+
+
+class IikoDirectory:
+    """
+    Справочник сотрудников и ролей iiko, загруженный одним запросом на каждый список.
+    Позволяет получать сотрудника и роль по id без обращения к iiko.
+    """
+
+    def __init__(self, employees: list[dict], roles: list[dict]):
+        """
+        :param employees: Список сотрудников iiko.
+        :param roles: Список ролей iiko.
+        """
+        self.employees: dict[str, dict] = {employee["id"]: employee for employee in employees if employee.get("id")}
+        self.roles: dict[str, dict] = {role["id"]: role for role in roles if role.get("id")}
+        self.loaded_at = time.monotonic()
+
+    def age(self) -> float:
+        """Возвращает возраст справочника в секундах."""
+        return time.monotonic() - self.loaded_at
+
+    def has_employees(self, employee_ids: Iterable[str]) -> bool:
+        return all(employee_id in self.employees for employee_id in employee_ids)
+
+    def get_employee(self, employee_id: str) -> dict | None:
+        return self.employees.get(employee_id)
+
+    def get_role(self, role_id: str) -> dict | None:
+        return self.roles.get(role_id)
+
+
+# Последний загруженный справочник, переиспользуется между обновлениями в пределах DIRECTORY_MAX_AGE_SECONDS
+_last_directory: IikoDirectory | None = None
+
+# Как часто синхронизировать сотрудников с iiko (секунды)
+EMPLOYEES_SYNC_MAX_AGE_SECONDS = DIRECTORY_MAX_AGE_SECONDS
+# Время последней успешной синхронизации (time.monotonic)
+_last_sync_at: float | None = None
+
+
+def _as_list(value) -> list[dict]:
+    """Приводит ответ iiko к списку: одна запись приходит словарем, пустой ответ - None."""
+    if isinstance(value, dict):
+        return [value]
+    return value or []
+
+
+def fetch_iiko_directory(*, authenticated: bool = False) -> IikoDirectory:
+    """
+    Загружает из iiko списки сотрудников и ролей и сохраняет справочник для повторного использования.
+
+    :param authenticated: Если True, iiko-сессия уже открыта (без повторного login).
+    :return: Справочник сотрудников и ролей.
+    """
+    global _last_directory
+
+    if iiko_api is None:
+        raise RuntimeError("iiko_api не инициализирован")
+
+    def _fetch() -> IikoDirectory:
+        roles, employees = run_concurrently([iiko_api.roles.get_roles, iiko_api.employees.get_employees])
+        return IikoDirectory(_as_list(employees), _as_list(roles))
+
+    if authenticated:
+        directory = _fetch()
+    else:
+        with safe_iiko_auth():
+            directory = _fetch()
+
+    logger.debug(f"Справочник iiko загружен: сотрудников {len(directory.employees)}, ролей {len(directory.roles)}")
+    _last_directory = directory
+    return directory
+
+
+def get_iiko_directory(
+        required_ids: Iterable[str] = (),
+        *,
+        max_age: float = DIRECTORY_MAX_AGE_SECONDS,
+        authenticated: bool = False,
+) -> IikoDirectory:
+    """
+    Возвращает справочник сотрудников и ролей iiko.
+    Переиспользует последний загруженный справочник (в том числе загруженный update_employees_from_api),
+    если он не старше max_age и содержит всех сотрудников из required_ids, иначе загружает заново.
+
+    :param required_ids: Id сотрудников, которые должны быть в справочнике.
+    :param max_age: Максимальный возраст справочника в секундах.
+    :param authenticated: Если True, iiko-сессия уже открыта (без повторного login).
+    """
+    directory = _last_directory
+    if directory is not None and directory.age() <= max_age and directory.has_employees(required_ids):
+        return directory
+    return fetch_iiko_directory(authenticated=authenticated)
+
+
+class EmployeeSyncStats(NamedTuple):
+    """Результат синхронизации сотрудников: сколько добавлено, обновлено, удалено и пропущено без изменений."""
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+
+def _employee_digest(name, position, code, department_codes: Iterable[str]) -> str:
+    """Хэш полей сотрудника, которые синхронизируются из iiko."""
+    payload = json.dumps([name, position, code, sorted(department_codes)], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def sync_employees(session: Session, directory: IikoDirectory) -> EmployeeSyncStats:
+    """
+    Приводит сотрудников в БД к справочнику iiko.
+
+    Для каждого сотрудника сравнивается хэш полей из iiko и из БД, неизмененные сотрудники пропускаются.
+    Отделы берутся из одного заранее загруженного набора кодов, добавление, обновление и удаление
+    выполняются пакетными запросами. Фиксацию транзакции выполняет вызывающий код.
+
+    :param session: Сессия БД.
+    :param directory: Справочник сотрудников и ролей iiko.
+    :return: Статистика синхронизации.
+    """
+    roles_name_dict = {role_id: role.get("name") for role_id, role in directory.roles.items()}
+    known_department_codes = set(session.scalars(select(Department.code)))
+
+    # Текущее состояние БД: поля сотрудников и их отделы
+    existing_departments: dict[str, list[str]] = defaultdict(list)
+    for employee_id, department_code in session.execute(
+            select(association_table.c.employee_id, association_table.c.department_code)):
+        existing_departments[employee_id].append(department_code)
+    existing_digests = {
+        employee_id: _employee_digest(name, position, code, existing_departments.get(employee_id, ()))
+        for employee_id, name, position, code in session.execute(
+            select(Employee.id, Employee.name, Employee.position, Employee.code))
+    }
+
+    inserts: list[dict] = []
+    updates: list[dict] = []
+    associations: list[dict] = []
+    seen_ids: set[str] = set()
+    unchanged = 0
+
+    for employee_id, employee_data in directory.employees.items():
+        department_codes = normalize_department_codes(employee_data.get("departmentCodes"))
+        if not department_codes:
+            logger.debug(f"Сотрудник {employee_id} не имеет отдела(скорее всего служебный аккаунт) -> пропускаем")
+            continue
+        if not employee_data.get("code"):
+            logger.debug(f"Сотрудник {employee_id} не имеет табельного(скорее всего служебный аккаунт) -> пропускаем")
+            continue
+        seen_ids.add(employee_id)
+
+        values = {
+            "id": employee_id,
+            "name": employee_data.get("name"),
+            "position": roles_name_dict.get(employee_data.get("mainRoleId")),
+            "code": employee_data.get("code"),
+        }
+        # Отделы, которых нет в БД, не связываются (как и раньше)
+        department_codes = sorted({code for code in department_codes if code in known_department_codes})
+        digest = _employee_digest(values["name"], values["position"], values["code"], department_codes)
+
+        current_digest = existing_digests.get(employee_id)
+        if current_digest == digest:
+            unchanged += 1
+            continue
+        (inserts if current_digest is None else updates).append(values)
+        associations.extend({"employee_id": employee_id, "department_code": code} for code in department_codes)
+
+    deleted_ids = [employee_id for employee_id in existing_digests if employee_id not in seen_ids]
+    updated_ids = [values["id"] for values in updates]
+
+    # Связи с отделами пересоздаются только у измененных и удаленных сотрудников
+    relinked_ids = updated_ids + deleted_ids
+    if relinked_ids:
+        session.execute(delete(association_table).where(association_table.c.employee_id.in_(relinked_ids)))
+    if deleted_ids:
+        session.execute(delete(Employee).where(Employee.id.in_(deleted_ids)))
+    if updates:
+        session.execute(update(Employee), updates)
+    if inserts:
+        session.execute(insert(Employee), inserts)
+    if associations:
+        session.execute(insert(association_table), associations)
+
+    stats = EmployeeSyncStats(len(inserts), len(updates), len(deleted_ids), unchanged)
+    logger.debug(f"Синхронизация сотрудников: {stats}")
+    return stats
+
+
+def update_employees_from_api(session: Session, *, force: bool = False) -> EmployeeSyncStats | None:
+    """
+    Обновляет сотрудников в БД по данным iiko.
+
+    Синхронизация выполняется не чаще одного раза в EMPLOYEES_SYNC_MAX_AGE_SECONDS,
+    поэтому переключение отделов не загружает справочник заново.
+
+    :param session: Сессия БД, фиксацию выполняет вызывающий код.
+    :param force: Синхронизировать независимо от времени последней синхронизации.
+    :return: Статистика синхронизации или None, если синхронизация пропущена.
+    """
+    global _last_sync_at
 
-def update_employees_from_api(session: Session):
     try:
         if iiko_api is None:
             logger.warning("iiko_api не инициализирован, пропускаем обновление сотрудников")
-            return
-            
-        logger.info(f"Обновление сотрудников...")
+            return None
 
-        existing_employees: list[Type[Employee]] = (
-            session.query(Employee)
-            .all()
-        )
+        if not force and _last_sync_at is not None \
+                and time.monotonic() - _last_sync_at < EMPLOYEES_SYNC_MAX_AGE_SECONDS:
+            logger.debug("Сотрудники синхронизированы недавно, пропускаем обновление")
+            return None
 
-        logger.debug(f"Существующие сотрудники: {existing_employees}")
-        existing_employees_dict = {emp.id: emp for emp in existing_employees}
+        logger.info(f"Обновление сотрудников...")
+        directory = fetch_iiko_directory() if force else get_iiko_directory()
+        stats = sync_employees(session, directory)
+        _last_sync_at = time.monotonic()
 
-        with safe_iiko_auth():
-            logger.debug("Получение ролей iiko")
-            roles = iiko_api.roles.get_roles()
-            roles_name_dict = {role["id"]: role["name"] for role in roles}
-            logger.debug(f"Роили iiko получены {roles_name_dict}")
-
-            logger.debug("Получение сотрудников из iiko...")
-            api_employees_raw = iiko_api.employees.get_employees()
-            if isinstance(api_employees_raw, dict):
-                api_employees = [api_employees_raw]
-            else:
-                api_employees = api_employees_raw or []
-            logger.debug(f"Сотрудники получены из iiko:\n  {api_employees}\n")
-
-        for employee_data in api_employees:
-            department_codes = normalize_department_codes(employee_data.get("departmentCodes"))
-            if not department_codes:
-                logger.debug(f"Сотрудник {employee_data} не имеет отдела(скорее всего служебный аккаунт) -> пропускаем")
-                continue
-            if not employee_data.get("code"):
-                logger.debug(
-                    f"Сотрудник {employee_data} не имеет табельного(скорее всего служебный аккаунт) -> пропускаем")
-                continue
-            logger.debug(f"Обработка сотрудника {employee_data}")
-            employee_id: str = employee_data.get("id")
-
-            if employee_id in existing_employees_dict:
-                logger.debug(f"Сотрудник обнаружен -> обновление существующего сотрудника {employee_data}...")
-                existing_employee: Type[Employee] = existing_employees_dict.pop(employee_id)
-                existing_employee.name = employee_data.get("name")
-                existing_employee.position = roles_name_dict.get(employee_data.get("mainRoleId"))
-                existing_employee.code = employee_data.get("code")
-
-                new_departments: list[Type[Department]] = []
-
-                for department_code in department_codes:
-                    department = session.query(Department).filter_by(code=department_code).first()
-                    if department:
-                        new_departments.append(department)
-                logger.debug(
-                    f"Обновление отделов сотрудника {employee_data}\n {existing_employee.departments}\n->\n {new_departments}\n")
-                existing_employee.departments = new_departments
-
-                logger.debug(f"Обновление существующего сотрудника {existing_employee} завершено")
-
-            elif employee_id:
-                logger.debug(f"Сотрудник не обнаружен -> создание нового сотрудника {employee_data}...")
-                employee = Employee(
-                    id=employee_id,
-                    name=employee_data.get("name"),
-                    position=roles_name_dict.get(employee_data.get("mainRoleId")),
-                    code=employee_data.get("code"),
-                )
-
-                for department_code in department_codes:
-                    department = session.query(Department).filter_by(code=department_code).first()
-                    if department:
-                        employee.departments.append(department)
-
-                session.add(employee)
-                logger.debug(f"Создание нового сотрудника {employee} завершено")
-
-        for employee in existing_employees_dict.values():
-            logger.debug(f"Удаление сотрудника {employee}...")
-            session.delete(employee)
-            logger.debug(f"Удаление сотрудника {employee} завершено")
-
-        logger.info(f" Обновление сотрудников завершено")
+        logger.info(f" Обновление сотрудников завершено: добавлено {stats.inserted}, обновлено {stats.updated}, "
+                    f"удалено {stats.deleted}, без изменений {stats.unchanged}")
+        return stats
     except Exception as e:
         logger.error(f"Ошибка обновления сотрудников: {e}\n"
                      f"{e.with_traceback(e.__traceback__)}")
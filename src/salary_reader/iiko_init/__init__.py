@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import contextlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Callable, Sequence
 
 from dotenv import dotenv_values
-from requests.exceptions import HTTPError
 
 from salary_reader.core.logging_config import get_logger
+from salary_reader.iiko_init.session import IikoSessionLease, DEFAULT_SESSION_TTL_SECONDS
 
 logger = get_logger(__name__, level="DEBUG")
 
@@ -18,6 +20,13 @@ def _env_file_path() -> Path:
     return Path(__file__).resolve().parents[3] / ".env"
 
 
+# Сколько запросов к iiko выполнять одновременно в рамках одной сессии.
+# Можно переопределить переменной IIKO_MAX_CONCURRENT_REQUESTS в .env
+DEFAULT_MAX_CONCURRENT_REQUESTS = 2
+max_concurrent_requests = DEFAULT_MAX_CONCURRENT_REQUESTS
+# Сколько секунд простоя сессия iiko переиспользуется без повторной авторизации (IIKO_SESSION_TTL в .env)
+session_ttl = DEFAULT_SESSION_TTL_SECONDS
+
 try:
     from iiko_api import IikoApi
 
@@ -27,6 +36,17 @@ try:
     login = config.get("IIKO_LOGIN")
     password = config.get("IIKO_PASS")
 
+    try:
+        max_concurrent_requests = max(1, int(config.get("IIKO_MAX_CONCURRENT_REQUESTS")
+                                             or DEFAULT_MAX_CONCURRENT_REQUESTS))
+    except ValueError:
+        print("Warning: IIKO_MAX_CONCURRENT_REQUESTS должно быть целым числом, используем значение по умолчанию")
+
+    try:
+        session_ttl = float(config.get("IIKO_SESSION_TTL") or DEFAULT_SESSION_TTL_SECONDS)
+    except ValueError:
+        print("Warning: IIKO_SESSION_TTL должно быть числом секунд, используем значение по умолчанию")
+
     if not all([base_url, login, password]):
         print(
             "Warning: Missing iiko API configuration. "
@@ -43,24 +63,72 @@ except Exception as e:
     print(f"Warning: Failed to initialize iiko_api: {e}")
     iiko_api = None
 
+session_lease = IikoSessionLease(iiko_api, ttl=session_ttl) if iiko_api is not None else None
+
 
 @contextlib.contextmanager
 def safe_iiko_auth():
     """
-    Контекстный менеджер аутентификации iiko.
-    Игнорирует 401 на logout — сессия уже могла истечь на стороне сервера.
+    Контекстный менеджер сессии iiko.
+    Сессия не закрывается после блока, а переиспользуется следующими операциями и потоками (см. IikoSessionLease).
+    logout выполняется в close_iiko_session при завершении приложения.
+    Запросы внутри блока выполняются через call_iiko или run_concurrently: переиспользуемый токен мог истечь
+    на сервере, и они повторяют запрос после повторной авторизации при ответе 401.
     """
     if iiko_api is None:
         raise RuntimeError("iiko_api не инициализирован")
 
-    iiko_api.client.login()
+    session_lease.acquire()
     try:
         yield iiko_api
     finally:
+        session_lease.release()
+
+
+def call_iiko(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Выполняет запрос к iiko внутри safe_iiko_auth, при ответе 401 авторизуется заново и повторяет запрос.
+    """
+    if session_lease is None:
+        return fn(*args, **kwargs)
+    return session_lease.call(fn, *args, **kwargs)
+
+
+def close_iiko_session() -> None:
+    """
+    Закрывает сессию iiko. Вызывается при завершении приложения.
+    """
+    if session_lease is not None:
+        session_lease.close()
+
+
+def run_concurrently(calls: Sequence[Callable[[], Any]], max_workers: int | None = None) -> list:
+    """
+    Выполняет независимые запросы к iiko одновременно в рамках уже открытой сессии (см. safe_iiko_auth).
+
+    Функция возвращает управление только после завершения всех запущенных запросов,
+    поэтому logout не выполнится, пока какой-то из них еще идет.
+    Если один из запросов завершился ошибкой, еще не начатые отменяются, а ошибка выбрасывается дальше.
+    На ответ 401 запрос повторяется после повторной авторизации (см. call_iiko).
+
+    :param calls: Функции без аргументов, каждая выполняет один запрос.
+    :param max_workers: Ограничение одновременных запросов, по умолчанию max_concurrent_requests.
+    :return: Результаты в порядке calls.
+    """
+    if max_workers is None:
+        max_workers = max_concurrent_requests
+    if max_workers <= 1 or len(calls) <= 1:
+        return [call_iiko(call) for call in calls]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls)), thread_name_prefix="iiko") as executor:
+        futures = [executor.submit(call_iiko, call) for call in calls]
         try:
-            iiko_api.client.logout()
-        except HTTPError as e:
-            logger.warning(f"logout iiko завершился с ошибкой (игнорируем): {e}")
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
 
 
-__all__ = ["iiko_api", "safe_iiko_auth"]
+__all__ = ["iiko_api", "safe_iiko_auth", "call_iiko", "close_iiko_session", "run_concurrently",
+           "max_concurrent_requests"]
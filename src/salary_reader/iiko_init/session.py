@@ -0,0 +1,122 @@
+"""
+Долгоживущая сессия iiko.
+
+Вместо login/logout вокруг каждого блока работы с iiko сессия открывается один раз и переиспользуется,
+пока не простаивает дольше TTL. Сессию одновременно используют несколько потоков,
+при ответе 401 выполняется повторная авторизация, logout - при завершении приложения.
+"""
+import threading
+import time
+from typing import Any, Callable
+
+from requests.exceptions import HTTPError
+
+from salary_reader.core.logging_config import get_logger
+
+logger = get_logger(__name__, level="DEBUG")
+
+# Сколько секунд простоя сессия считается действующей
+DEFAULT_SESSION_TTL_SECONDS = 600
+
+
+def is_unauthorized(error: Exception) -> bool:
+    """Проверяет, что iiko ответил 401 (токен истек или отозван)."""
+    response = getattr(error, "response", None)
+    return isinstance(error, HTTPError) and response is not None and response.status_code == 401
+
+
+class IikoSessionLease:
+    """
+    Аренда авторизованной сессии iiko.
+
+    acquire/release окружают работу с iiko. Пока сессия используется хотя бы одним потоком, она не закрывается.
+    Если сессия простаивала дольше ttl, при следующем acquire токен обновляется.
+    """
+
+    def __init__(self, api, ttl: float = DEFAULT_SESSION_TTL_SECONDS):
+        """
+        :param api: Клиент IikoApi.
+        :param ttl: Сколько секунд простоя сессия считается действующей.
+        """
+        self.api = api
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._logged_in = False
+        self._users = 0
+        self._last_used = 0.0
+        # Номер авторизации, растет при каждом login. Нужен, чтобы при одновременных 401
+        # повторная авторизация выполнялась один раз
+        self.generation = 0
+
+    @property
+    def logged_in(self) -> bool:
+        return self._logged_in
+
+    def _login(self) -> None:
+        self.api.client.login()
+        self._logged_in = True
+        self.generation += 1
+        logger.debug(f"Авторизация iiko выполнена (сессия {self.generation})")
+
+    def _logout(self) -> None:
+        self._logged_in = False
+        try:
+            self.api.client.logout()
+        except HTTPError as e:
+            # Сессия уже могла истечь на стороне сервера
+            logger.warning(f"logout iiko завершился с ошибкой (игнорируем): {e}")
+
+    def acquire(self) -> None:
+        """
+        Берет сессию в пользование, при необходимости авторизуется.
+        """
+        with self._lock:
+            expired = self._users == 0 and time.monotonic() - self._last_used >= self.ttl
+            if self._logged_in and expired:
+                logger.debug("Сессия iiko простаивала дольше TTL, обновляем авторизацию")
+                self._logout()
+            if not self._logged_in:
+                self._login()
+            self._users += 1
+
+    def release(self) -> None:
+        """
+        Возвращает сессию. Сессия остается открытой для следующих операций.
+        """
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            self._last_used = time.monotonic()
+
+    def reauthenticate(self, generation: int) -> None:
+        """
+        Повторная авторизация после ответа 401.
+
+        :param generation: Номер авторизации, с которой был выполнен неудачный запрос.
+            Если с тех пор другой поток уже авторизовался заново, повторный login не нужен.
+        """
+        with self._lock:
+            if generation == self.generation or not self._logged_in:
+                logger.warning("iiko ответил 401, выполняем повторную авторизацию")
+                self._login()
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Выполняет запрос к iiko, при ответе 401 авторизуется заново и повторяет запрос один раз.
+        """
+        generation = self.generation
+        try:
+            return fn(*args, **kwargs)
+        except HTTPError as e:
+            if not is_unauthorized(e):
+                raise
+        self.reauthenticate(generation)
+        return fn(*args, **kwargs)
+
+    def close(self) -> None:
+        """
+        Закрывает сессию (logout). Вызывается при завершении приложения.
+        """
+        with self._lock:
+            if self._logged_in:
+                self._logout()
+                logger.info("Сессия iiko закрыта")
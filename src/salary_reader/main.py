@@ -2,25 +2,21 @@
 
 import os
 import sys
-from typing import Type
 
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtCore import Qt, QDate, QThreadPool
 from PySide6.QtGui import QIntValidator, QIcon, QColor
 from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QStyledItemDelegate, QLineEdit, \
-    QTableWidgetItem, QListWidgetItem, QAbstractItemView, QPushButton, QWidget, QVBoxLayout, QTableWidget
+    QTableWidgetItem, QListWidgetItem, QAbstractItemView, QPushButton, QWidget, QVBoxLayout, \
+    QProgressBar
 from loguru import logger
-from openpyxl.styles import Alignment, PatternFill, Border, Side, Font
-from openpyxl.workbook import Workbook
 from qframelesswindow import AcrylicWindow, TitleBar, StandardTitleBar
 
 from salary_reader.core.errors import CardParseError
 from salary_reader.drivers.attendances import AttendancesDataDriver
-from salary_reader.core.models import Employee, MotivationProgram, Department
+from salary_reader.core.models import MotivationProgram
 from salary_reader.core.control_models import delete_motivation_program, get_current_roles_by_department_code, \
-    get_employees_by_motivation_program_id
+    get_departments, load_program_employee_rows, next_program_version
 from salary_reader.helpers.resources import resource_path
-from salary_reader.payslip_report.payslip_report import ReportGenerator
-from salary_reader.screens.edit_employees_window import EditEmployeesWindow
 from salary_reader.styles.department_combo_box import DEPARTMENT_COMBO_BOX
 from salary_reader.styles.general_salary_table import GTS_TABLE_STYLE
 from salary_reader.styles.general_table_excel_button import G_EXCEL_BUTTON
@@ -30,20 +26,18 @@ from salary_reader.helpers.helpers import get_icon_from_svg, set_departments, ge
 from salary_reader.db import get_session
 from salary_reader.ui.styles import CONFIRM_DIALOG_STYLE, WARNING_DIALOG_STYLE
 from salary_reader.iiko_business_api.employees import update_employees_from_api
+from salary_reader.iiko_business_api.data_cache import get_iiko_data_cache
+from salary_reader.drivers.payroll_cache import get_payroll_cache
 from salary_reader.core.version import get_version_info
 from salary_reader.core.updater import Updater
 from salary_reader.core.logging_config import get_logger
-from salary_reader.splash_screen import show_splash_screen
+from salary_reader.core.startup_timing import startup_timer
+from salary_reader.workers.salary_refresh import SalaryRefreshPipeline
+from salary_reader.workers.task import BackgroundTask
 
 logger = get_logger(__name__, level="DEBUG")
 
 
-with get_session() as session:
-    EMPLOYEES_INIT = session.query(Employee).all()
-    ROLES_INIT = session.query(MotivationProgram).all()
-    DEPARTMENTS_INIT = session.query(Department).all()
-
-
 class NumericDelegate(QStyledItemDelegate):
     def createEditor(self, parent, option, index):
         editor = QLineEdit(parent)
@@ -109,25 +103,35 @@ class SalaryReader(AcrylicWindow):
 
         self.DEBUG = False
         self.ui.salar_table.setStyleSheet(GTS_TABLE_STYLE)
-        self.ui.salar_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.ui.salar_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.ui.salar_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.ui.salar_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.ui.salar_table.verticalHeader().setVisible(False)
 
-        self.salary_table_controller = AttendancesDataDriver(self.ui.salar_table)
-        # Передаем ссылку на объект AttendancesDataDriver для возможности использования методов
-        self.payslip_generator = ReportGenerator(self.salary_table_controller)
+        self.salary_table_controller = AttendancesDataDriver(
+            self.ui.salar_table, data_cache=get_iiko_data_cache(), payroll_cache=get_payroll_cache()
+        )
+        # Генератор ведомостей (reportlab) создается при первой печати
+        self._payslip_generator = None
+        # Фоновая синхронизация сотрудников с iiko после запуска
+        self._employees_sync_task: BackgroundTask | None = None
+        # Фоновая выгрузка сводной таблицы в Excel
+        self._excel_export_task: BackgroundTask | None = None
+        # Фоновая печать ведомостей
+        self._payslip_task: BackgroundTask | None = None
 
         self.threshold_table_controller = ThresholdsTableController(self.ui.table_motivate_settings)
 
         # Выпадающий список выбора отдела
-        set_departments(self.ui.department, DEPARTMENTS_INIT)
+        set_departments(self.ui.department, get_departments())
         self.ui.department.currentIndexChanged.connect(  # При выборе отдела выводим список его программ
             self.set_current_roles
         )
         self.ui.department.setStyleSheet(DEPARTMENT_COMBO_BOX)
 
         # Программы мотивации(Список)
-        self.set_current_roles()  # На старте выводим список программ выбранного отдела
+        # На старте выводим список программ выбранного отдела по локальным данным,
+        # сотрудники синхронизируются с iiko в фоне после показа окна (start_employees_sync)
+        self.set_current_roles(sync_employees=False)
         self.ui.roles_list.currentItemChanged.connect(  # Заполняем таблицу при выборе роли
             self.fill_role_settings_table
         )
@@ -175,35 +179,34 @@ class SalaryReader(AcrylicWindow):
         # Сводная таблица зарплат
         self.ui.date_from.setDate(QDate.currentDate())
         self.ui.date_to.setDate(QDate.currentDate())
-        self.ui.salar_table.setColumnCount(24)
-        self.ui.salar_table.setHorizontalHeaderLabels(
-            ["ФИО",
-             "Полное имя",
-             "Сумма ЗП\nc 1 по 15",
-             "Кол-во полных смен\nс 1 по 15",
-             "Кол-во неполных смен\nс 1 по 15",
-             "Сумма ЗП\n c 16 до конца месяца",
-             "Кол-во полных смен\n c 16 до конца месяца",
-             "Кол-во неполных смен\n c 16 до конца месяца",
-             "Сумма ЗП\n за весь месяц",
-             "Кол-во полных смен\n за весь месяц",
-             "Кол-во неполных смен\n за весь месяц",
-             "Кол-во оплаченных\nпоездок такси",
-             "Сумма оплаченных\nпоездок такси",
-             "Роль", "Отдел", "Табельный", "id",
-             "Личные списания",
-             "Ревизия",
-             "Форма",
-             "Кофе",
-             "Авансы",
-             "Надбавки",
-             "На карту",
-             ]
-        )
         self.ui.salar_table.setSortingEnabled(True)
 
         self.ui.refresh_salary.clicked.connect(self.update_and_render_salary_table)
 
+        # Обновление таблицы зарплат выполняется в фоне, ход обновления показываем рядом с кнопкой
+        self.salary_refresh = SalaryRefreshPipeline(self.salary_table_controller, parent=self)
+        self.salary_refresh.progress.connect(self.on_salary_refresh_progress)
+        self.salary_refresh.finished.connect(self.on_salary_refresh_finished)
+        self.salary_refresh.failed.connect(self.on_salary_refresh_failed)
+        self.salary_refresh.cancelled.connect(self.on_salary_refresh_finished)
+
+        self.salary_refresh_progress = QProgressBar(self.ui.salary_panel)
+        self.salary_refresh_progress.setRange(0, 100)
+        self.salary_refresh_progress.setTextVisible(True)
+        self.salary_refresh_progress.hide()
+        self.salary_refresh_cancel = QPushButton("Отменить", self.ui.salary_panel)
+        self.salary_refresh_cancel.clicked.connect(self.salary_refresh.cancel)
+        self.salary_refresh_cancel.hide()
+        refresh_index = self.ui.horizontalLayout_3.indexOf(self.ui.refresh_salary)
+        self.ui.horizontalLayout_3.insertWidget(refresh_index + 1, self.salary_refresh_progress)
+        self.ui.horizontalLayout_3.insertWidget(refresh_index + 2, self.salary_refresh_cancel)
+        # Ход выгрузки в Excel
+        self.excel_export_progress = QProgressBar(self.ui.salary_panel)
+        self.excel_export_progress.setRange(0, 100)
+        self.excel_export_progress.setTextVisible(True)
+        self.excel_export_progress.hide()
+        self.ui.horizontalLayout_3.insertWidget(refresh_index + 3, self.excel_export_progress)
+
         excel_icon = QIcon(resource_path('resources/images/excel.svg'))
         self.excel_button = QPushButton(icon=excel_icon, parent=self.ui.salar_table)
         self.excel_button.setGeometry(1, 1, 23, 23)
@@ -212,6 +215,17 @@ class SalaryReader(AcrylicWindow):
 
         # Печать ведомостей в pdf по 4 таблицы(сотрудника) на листе
         self.ui.button_payslip_report.clicked.connect(self.payslip_report_callback)
+        # Ход печати ведомостей и отмена рядом с кнопкой
+        self.payslip_progress = QProgressBar(self.ui.salary_panel)
+        self.payslip_progress.setRange(0, 100)
+        self.payslip_progress.setTextVisible(True)
+        self.payslip_progress.hide()
+        self.payslip_cancel = QPushButton("Отменить", self.ui.salary_panel)
+        self.payslip_cancel.clicked.connect(self.cancel_payslip_report)
+        self.payslip_cancel.hide()
+        payslip_index = self.ui.horizontalLayout_3.indexOf(self.ui.button_payslip_report)
+        self.ui.horizontalLayout_3.insertWidget(payslip_index + 1, self.payslip_progress)
+        self.ui.horizontalLayout_3.insertWidget(payslip_index + 2, self.payslip_cancel)
 
     def setCentralWidget(self, widget: QWidget):
         # Переопределяем метод, чтобы добавить виджет в FramelessWindow
@@ -241,26 +255,88 @@ class SalaryReader(AcrylicWindow):
 
     def update_and_render_salary_table(self):
         """
-        Обновление данных в таблице зарплат
+        Обновление данных в таблице зарплат.
+        Данные загружаются и считаются в фоне, незавершенное предыдущее обновление отменяется.
         """
         current_department_code = get_department_code(self.ui.department)
         date_from = self.ui.date_from.date().toPython()
         date_to = self.ui.date_to.date().toPython()
 
-        self.salary_table_controller.update_data(
-            department_code=current_department_code, date_from=date_from, date_to=date_to)
-        try:
-            self.salary_table_controller.render_general_table()
-        except Exception as e:
-            logger.error(f"Ошибка при обновлении данных таблицы зарплат: {e}")
-            self.show_error_message(title="Ошибка при обновлении данных таблицы зарплат", message=str(e))
+        self.salary_refresh.start(date_from=date_from, date_to=date_to, department_code=current_department_code)
+        self.salary_refresh_progress.setValue(0)
+        self.salary_refresh_progress.show()
+        self.salary_refresh_cancel.show()
+
+    def on_salary_refresh_progress(self, percent: int, message: str) -> None:
+        self.salary_refresh_progress.setValue(percent)
+        self.salary_refresh_progress.setFormat(f"{message} %p%")
+
+    def on_salary_refresh_finished(self) -> None:
+        self.salary_refresh_progress.hide()
+        self.salary_refresh_cancel.hide()
+
+    def on_salary_refresh_failed(self, error: Exception) -> None:
+        self.on_salary_refresh_finished()
+        logger.error(f"Ошибка при обновлении данных таблицы зарплат: {error}")
+        self.show_error_message(title="Ошибка при обновлении данных таблицы зарплат", message=str(error))
+
+    def closeEvent(self, event) -> None:
+        self.salary_refresh.cancel()
+        self.cancel_payslip_report()
+        super().closeEvent(event)
+
+    @property
+    def payslip_generator(self):
+        """Генератор ведомостей, reportlab импортируется при первом обращении."""
+        if self._payslip_generator is None:
+            from salary_reader.payslip_report.payslip_report import ReportGenerator
+            # Передаем ссылку на объект AttendancesDataDriver для возможности использования методов
+            self._payslip_generator = ReportGenerator(self.salary_table_controller)
+        return self._payslip_generator
+
+    def start_employees_sync(self) -> None:
+        """
+        Синхронизирует сотрудников с iiko в фоне. Вызывается после показа окна при запуске.
+        """
+        if self.DEBUG or self._employees_sync_task is not None:
+            return
+
+        def sync(context) -> None:
+            with get_session() as session:
+                update_employees_from_api(session=session)
+                session.commit()
 
-    def set_current_roles(self):
+        self._employees_sync_task = BackgroundTask(sync)
+        self._employees_sync_task.signals.succeeded.connect(self.on_employees_synced)
+        self._employees_sync_task.signals.failed.connect(self.on_employees_sync_failed)
+        QThreadPool.globalInstance().start(self._employees_sync_task)
+
+    def on_employees_synced(self, task_id: int, result) -> None:
+        startup_timer.mark("employees_synced")
+        self._employees_sync_task = None
+        # Обновляем сотрудников выбранной программы мотивации
+        current_role = self.ui.roles_list.currentItem()
+        if current_role:
+            self.fill_employees_table(current_role.data(Qt.ItemDataRole.UserRole)['role_id'])
+
+    def on_employees_sync_failed(self, task_id: int, error: Exception) -> None:
+        self._employees_sync_task = None
+        logger.error(f"Ошибка фоновой синхронизации сотрудников: {error}")
+        self.show_error_message(
+            title="Ошибка синхронизации с iiko",
+            message=f"Не удалось обновить список сотрудников:\n{error}\n\n"
+                    "Список программ мотивации будет показан по локальным данным.",
+        )
+
+    def set_current_roles(self, sync_employees: bool = True):
         """
         Функция колбэк для заполнения списка ролей.
         Вызывается при изменении индекса выбранного элемента списка отделов.(Выборе отдела, отличного от текущего)
         Также применяется когда нужно заполнить список ролей(программ мотивации)
         в соответствии с выбранным в выпадающем списке отделом.
+
+        :param sync_employees: Синхронизировать сотрудников с iiko перед заполнением списка
+            (не чаще EMPLOYEES_SYNC_MAX_AGE_SECONDS).
         """
         # Отчищаем список ролей
         self.ui.roles_list.clear()
@@ -271,7 +347,7 @@ class SalaryReader(AcrylicWindow):
         with get_session() as session:
             try:
                 logger.debug(f"Обновляем сотрудников для {department_code} (До if)")
-                if not self.DEBUG:
+                if sync_employees and not self.DEBUG and self._employees_sync_task is None:
                     logger.debug(f"Обновляем сотрудников для {department_code} (После if)")
                     update_employees_from_api(session=session)
                     session.commit()  # Сохраняем изменения, если всё успешно
@@ -324,7 +400,8 @@ class SalaryReader(AcrylicWindow):
 
             # Если на данном отделе еще нет роли с таким названием
             if new_role_name not in [role.name for role in current_roles]:
-                motivation_program = MotivationProgram(name=new_role_name, department_code=current_department_code)
+                motivation_program = MotivationProgram(name=new_role_name, department_code=current_department_code,
+                                                       version=next_program_version(session))
                 session.add(motivation_program)
                 session.commit()
             else:
@@ -588,25 +665,18 @@ class SalaryReader(AcrylicWindow):
         Функция заполнения таблицы сотрудников.
         Заполняет таблицу сотрудниками для выбранной роли.
         """
-        # Обновляем данные по работникам во внутренней БД
+        # Сотрудники и их отделы загружаются двумя запросами независимо от числа сотрудников
         with get_session() as session:
-            employees: list[Type[Employee]] = get_employees_by_motivation_program_id(
-                session=session,
-                motivation_program_id=current_role_id
-            )
-
-            self.ui.employees_table.setRowCount(0)
-            self.ui.employees_table.setRowCount(len(employees))
+            employees = load_program_employee_rows(session, current_role_id)
 
-            for i, employee in enumerate(employees):
-                self.ui.employees_table.setItem(i, 0, QTableWidgetItem(employee.name))
-                self.ui.employees_table.setItem(i, 1, QTableWidgetItem(employee.position))
-                self.ui.employees_table.setItem(i, 3, QTableWidgetItem(str(employee.code)))
+        self.ui.employees_table.setRowCount(0)
+        self.ui.employees_table.setRowCount(len(employees))
 
-                departments_string = ""
-                for department in employee.departments:
-                    departments_string += department.name + " "
-                self.ui.employees_table.setItem(i, 2, QTableWidgetItem(departments_string))
+        for i, employee in enumerate(employees):
+            self.ui.employees_table.setItem(i, 0, QTableWidgetItem(employee.name))
+            self.ui.employees_table.setItem(i, 1, QTableWidgetItem(employee.position))
+            self.ui.employees_table.setItem(i, 2, QTableWidgetItem(employee.departments_text))
+            self.ui.employees_table.setItem(i, 3, QTableWidgetItem(str(employee.code)))
 
     def open_edit_employees_window(self):
         """
@@ -634,6 +704,7 @@ class SalaryReader(AcrylicWindow):
         motivation_program_name = motivation_program.text()
         print(f"Передаю role_id в новое окно - {motivation_program_id}")
         # Сохраняем ссылку на окно, чтобы оно сразу не закрылось сборщиком мусора.
+        from salary_reader.screens.edit_employees_window import EditEmployeesWindow
         self.edit_employees_window = EditEmployeesWindow(motivation_program_id, parent=self)
         self.edit_employees_window.setWindowTitle(f"Сотрудники программы мотивации {motivation_program_name}")
         self.edit_employees_window.show()
@@ -643,96 +714,111 @@ class SalaryReader(AcrylicWindow):
 
     def export_to_excel(self):
         """
-        Экспортирует данные из сводной таблицы зарплат в Excel
+        Выгружает сводную таблицу зарплат и детализацию по дням в Excel.
+        Данные собираются из рассчитанных строк в потоке GUI, файл записывается в фоне.
         """
-        headers = [
-            "ФИО",
-            "Полное имя",
-            "Сумма ЗП\nc 1 по 15",
-            "Кол-во полных смен\nс 1 по 15",
-            "Кол-во неполных смен\nс 1 по 15",
-            "Сумма ЗП\n c 16 до конца месяца",
-            "Кол-во полных смен\n c 16 до конца месяца",
-            "Кол-во неполных смен\n c 16 до конца месяца",
-            "Сумма ЗП\n за весь месяц",
-            "Кол-во полных смен\n за весь месяц",
-            "Кол-во неполных смен\n за весь месяц",
-            "Кол-во оплаченных\nпоездок такси",
-            "Сумма оплаченных\nпоездок такси",
-            "Роль",
-            "Отдел",
-            "Табельный",
-            "id",
-            "Личные списания",
-            "Ревизия",
-            "Форма",
-            "Кофе",
-            "Авансы",
-            "Надбавки",
-            "На карту",
-        ]
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Сводная таблица зарплат"
-
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(1, col)
-            cell.value = header
-            cell.alignment = Alignment(
-                horizontal="center",
-                vertical="center",
-                wrap_text=True,
-            )
-            cell.fill = PatternFill(
-                start_color="00339966",
-                end_color="00339966",
-                fill_type="solid",
-            )
-            cell.border = Border(
-                left=Side(border_style="thin", color="000000"),
-                right=Side(border_style="thin", color="000000"),
-                top=Side(border_style="thin", color="000000"),
-                bottom=Side(border_style="thin", color="000000"),
-            )
-            cell.font = Font(
-                bold=True,
-                color="00FFFFFF",
-                name="Arial",
-            )
-            ws.column_dimensions[cell.column_letter].width = 20
-
-        for row in range(self.ui.salar_table.rowCount()):
-            for col in range(self.ui.salar_table.columnCount()):
-                item = self.ui.salar_table.item(row, col)
-                ws.cell(row=row + 2, column=col + 1).value = item.text() if item else ""
-
+        if self._excel_export_task is not None:
+            return
         from salary_reader.core.paths import get_application_path
-        app_path = get_application_path()
-        excel_file_path = app_path / "salary_table.xlsx"
+        from salary_reader.drivers.excel_export import collect_export_data, write_salary_workbook
 
-        wb.save(str(excel_file_path))
-        logger.info(f"Файл сохранен в {excel_file_path}")
+        data = collect_export_data(self.salary_table_controller)
+        excel_file_path = get_application_path() / "salary_table.xlsx"
 
+        task = BackgroundTask(
+            lambda context: write_salary_workbook(excel_file_path, data, context.report, context.check_cancelled)
+        )
+        task.signals.progress.connect(self.on_excel_export_progress)
+        task.signals.succeeded.connect(self.on_excel_exported)
+        task.signals.failed.connect(self.on_excel_export_failed)
+        self._excel_export_task = task
+        self.excel_button.setEnabled(False)
+        self.excel_export_progress.setValue(0)
+        self.excel_export_progress.show()
+        QThreadPool.globalInstance().start(task)
+
+    def on_excel_export_progress(self, task_id: int, percent: int, message: str) -> None:
+        self.excel_export_progress.setValue(percent)
+        self.excel_export_progress.setFormat(f"Excel: {message} %p%")
+
+    def _on_excel_export_finished(self) -> None:
+        self._excel_export_task = None
+        self.excel_button.setEnabled(True)
+        self.excel_export_progress.hide()
+
+    def on_excel_exported(self, task_id: int, excel_file_path) -> None:
+        self._on_excel_export_finished()
+        logger.info(f"Файл сохранен в {excel_file_path}")
         os.startfile(str(excel_file_path))
 
+    def on_excel_export_failed(self, task_id: int, error: Exception) -> None:
+        self._on_excel_export_finished()
+        if isinstance(error, PermissionError):
+            self.show_error_message("Файл открыт в другой программе. Закройте Excel и повторите выгрузку.")
+        else:
+            self.show_error_message(title="Ошибка при выгрузке в Excel", message=str(error))
+
     def payslip_report_callback(self):
         """
-        Функция, которая вызывается при нажатии на кнопку "Отчет по зарплате"
+        Функция, которая вызывается при нажатии на кнопку "Отчет по зарплате".
+        Удержания и выплаты копируются из сводной таблицы сразу, PDF строится в фоне.
         """
+        if self._payslip_task is not None:
+            return
         logger.info("=========================Отчет по зарплате=========================")
-        try:
-            self.payslip_generator.create_payslip_pdf(
-                self.ui.date_from.date().toPython(), self.ui.date_to.date().toPython()
-            )
-        except PermissionError as e:
+        from salary_reader.payslip_report.payslip_report import PAYSLIP_FILENAME, write_payslip_pdf
+
+        date_from = self.ui.date_from.date().toPython()
+        date_to = self.ui.date_to.date().toPython()
+        payslip_inputs = self.payslip_generator.collect_payslip_inputs()
+        if not payslip_inputs:
+            logger.warning("Нет сотрудников для отчета")
+            return
+
+        task = BackgroundTask(
+            lambda context: write_payslip_pdf(PAYSLIP_FILENAME, payslip_inputs, date_from, date_to,
+                                              context.report, context.check_cancelled)
+        )
+        task.signals.progress.connect(self.on_payslip_progress)
+        task.signals.succeeded.connect(self.on_payslip_created)
+        task.signals.failed.connect(self.on_payslip_failed)
+        task.signals.cancelled.connect(self._on_payslip_finished)
+        self._payslip_task = task
+        self.ui.button_payslip_report.setEnabled(False)
+        self.payslip_progress.setValue(0)
+        self.payslip_progress.show()
+        self.payslip_cancel.show()
+        QThreadPool.globalInstance().start(task)
+
+    def cancel_payslip_report(self) -> None:
+        if self._payslip_task is not None:
+            self._payslip_task.cancel()
+
+    def on_payslip_progress(self, task_id: int, percent: int, message: str) -> None:
+        self.payslip_progress.setValue(percent)
+        self.payslip_progress.setFormat(f"{message} %p%")
+
+    def _on_payslip_finished(self, task_id: int = None) -> None:
+        self._payslip_task = None
+        self.ui.button_payslip_report.setEnabled(True)
+        self.payslip_progress.hide()
+        self.payslip_cancel.hide()
+
+    def on_payslip_created(self, task_id: int, pdf_path) -> None:
+        from salary_reader.payslip_report.payslip_report import open_pdf
+
+        self._on_payslip_finished()
+        open_pdf(pdf_path)
+
+    def on_payslip_failed(self, task_id: int, error: Exception) -> None:
+        self._on_payslip_finished()
+        if isinstance(error, PermissionError):
             self.show_error_message("Отчет открыт в другой программе. Закройте другие программы использующие отчет"
                                     " и повторите попытку.")
-        except CardParseError as e:
-            self.show_error_message(f"Ошибка при создании отчета: {e}")
-
-        except Exception as e:
-            self.show_error_message(f"Ошибка при создании отчета: Непредвиденная ошибка: {e}")
+        elif isinstance(error, CardParseError):
+            self.show_error_message(f"Ошибка при создании отчета: {error}")
+        else:
+            self.show_error_message(f"Ошибка при создании отчета: Непредвиденная ошибка: {error}")
 
     def check_updates(self):
         """Проверяет наличие обновлений"""
@@ -944,47 +1030,6 @@ class SalaryReader(AcrylicWindow):
             print(f"Ошибка при автоматической проверке обновлений: {e}")
 
 
-def run():
-    # Проверяем, если это перезапуск после обновления
-    if "--restart-after-update" in sys.argv:
-        logger.info("Запуск после обновления - пропускаем автоматическую проверку обновлений")
-    
-    app = QApplication(sys.argv)
-    
-    # Показываем splash screen
-    version_info = get_version_info()
-    splash_path = resource_path("resources/images/splash_background.png")
-    splash = show_splash_screen(app, splash_path, version_info['full_version'])
-    
-    # Обрабатываем события для отображения splash screen
-    app.processEvents()
-    
-    # Создаем и инициализируем главное окно
-    logger.info("Инициализация главного окна...")
-    window = SalaryReader()
-    
-    # Обрабатываем события для завершения инициализации
-    app.processEvents()
-    
-    # Скрываем splash screen и показываем главное окно
-    splash.finish(window)
-    window.show()
-    
-    # Автоматическая проверка обновлений при запуске (только если не перезапуск)
-    if "--restart-after-update" not in sys.argv:
-        window.auto_check_updates()
-    else:
-        logger.info("Перезапуск после обновления - показываем уведомление")
-        # Показываем уведомление об успешном обновлении
-        from PySide6.QtWidgets import QMessageBox
-        msg = QMessageBox()
-        msg.setWindowTitle("Обновление завершено")
-        msg.setText("Приложение успешно обновлено и перезапущено!")
-        msg.setIcon(QMessageBox.Icon.Information)
-        msg.exec()
-    
-    sys.exit(app.exec())
-
-
 if __name__ == '__main__':
+    from salary_reader.startup import run
     run()
@@ -0,0 +1,368 @@
+"""
+Фрагменты отчета по зарплате: таблицы одного сотрудника по месяцам периода.
+
+Фрагмент зависит только от своих входных данных (имя, строки детализации, удержания и выплаты, период),
+поэтому фрагменты строятся независимо друг от друга в пуле процессов и кэшируются на диске по хэшу входных данных.
+После правки удержаний одного сотрудника заново строится только его фрагмент, остальные берутся из кэша.
+
+Модуль не импортирует Qt, reportlab и клиент iiko: он загружается в каждом процессе пула.
+"""
+import calendar
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable
+
+from salary_reader.core.errors import CardParseError
+from salary_reader.core.logging_config import configure_worker_logging, get_logger
+from salary_reader.drivers.attendance_list import TAXI_PRICE
+
+logger = get_logger(__name__, level="DEBUG")
+
+# Меняется при изменении содержимого таблиц: старые фрагменты в кэше перестают совпадать по ключу
+FRAGMENT_VERSION = 1
+# Пул процессов запускается, только если фрагментов не из кэша не меньше этого числа:
+# запуск процессов (особенно в сборке под Windows) дороже построения нескольких сотен таблиц
+PARALLEL_MIN_FRAGMENTS = 300
+# Фрагменты, которые не использовались дольше этого срока, удаляются из кэша
+CACHE_MAX_AGE_DAYS = 30
+
+# Таблица: строки ячеек, первая строка - [заголовок таблицы]
+TableData = list[list[Any]]
+
+
+@dataclass(slots=True)
+class PayslipInput:
+    """
+    Входные данные фрагмента одного сотрудника.
+
+    :var employee_id: ID сотрудника.
+    :var name: Имя для заголовка таблицы.
+    :var rows: Строки детализации драйвера (date, shift_type, period, salary, is_taxi_paid, warning).
+    :var deduction: Удержания по DEDUCTION_KEYS, как введены в сводной таблице.
+    :var bonus: Надбавки.
+    :var on_card: Выплачено на карту.
+    """
+    employee_id: str
+    name: str
+    rows: list[dict]
+    deduction: dict[str, Any]
+    bonus: Any = 0
+    on_card: Any = 0.0
+
+
+@dataclass(slots=True)
+class PayslipFragment:
+    """Готовые таблицы сотрудника по месяцам периода."""
+    employee_id: str
+    tables: list[TableData] = field(default_factory=list)
+
+
+def _group_by_month(rows: list[dict]) -> dict[tuple[int, int], list[dict]]:
+    grouped = defaultdict(list)
+    for row in rows:
+        d = row['date']
+        grouped[(d.year, d.month)].append(row)
+    return grouped
+
+
+def create_month_table(name: str,
+                       year: int,
+                       month: int,
+                       month_rows: list[dict],
+                       deduction: dict,
+                       bonus: int = 0,
+                       on_card: float = 0.0,
+                       date_from: date = None,
+                       date_to: date = None,
+                       ) -> TableData:
+    """
+    Таблица сотрудника за месяц: дни периода, итоги по сменам, удержания и итог к выплате.
+    Первая строка - текст заголовка, оформление задается при отрисовке.
+    """
+    # Защита от передачи пустых строк в функцию
+    if bonus == "":
+        bonus = 0
+
+    if on_card == "":
+        on_card = 0.0
+    else:
+        # Карта часто может быть с копейками, поэтому конвертируем в float
+        try:
+            on_card = float(on_card)
+        except (ValueError, TypeError):
+            raise CardParseError(f"Ошибка при конвертации поля на карту: {on_card}\n(Должно быть десятичное число с точкой.)")
+
+    deduction = {key: 0 if value == "" else value for key, value in deduction.items()}
+
+    # Определяем базовые параметры
+    month_start = date(year, month, 1)
+    num_days = calendar.monthrange(year, month)[1]
+    month_end = date(year, month, num_days)
+
+    # Валидация периода
+    period = None
+    if date_from and date_to:
+        # Нормализуем порядок дат
+        date_from, date_to = sorted([date_from, date_to])
+
+        # Проверяем принадлежность к текущему месяцу
+        if (date_from >= month_start and date_to <= month_end
+                and date_from.month == date_to.month):
+            period = (date_from.day, date_to.day)
+
+    # Определяем диапазон дней
+    if period:
+        start_day = max(1, period[0])
+        end_day = min(num_days, period[1])
+        days_range = range(start_day, end_day + 1)
+        period_str = f"{date_from.strftime('%d.%m')}-{date_to.strftime('%d.%m.%Y')}"
+    else:
+        days_range = range(1, num_days + 1)
+        period_str = f"{month:02d}/{year}"
+
+    # Создаём словарь для быстрого доступа
+    date_to_row = {r['date']: r for r in month_rows}
+
+    # Формируем заголовок
+    table_data = [
+        [f"<b>{name}</b> - {period_str}"],
+        ["Дата", "Тип смены", "Период", "ЗП"]
+    ]
+
+    salary_sum = 0
+    full_days = 0
+    partial_days = 0
+    taxi_sum = 0
+    invalid_days = []
+
+    # Основной цикл обработки дней
+    for day in days_range:
+        current_date = date(year, month, day)
+        row = date_to_row.get(current_date)
+
+        shift_type = row.get('shift_type', 'Нет смены') if row else 'Нет смены'
+        # Считаем количество полных и неполных смен для футера
+        match shift_type.lower():
+            case "полная":
+                full_days += 1
+            case "пол смены":
+                partial_days += 1
+            case _:
+                pass
+
+        # Формируем строку таблицы
+        table_data.append([
+            current_date.strftime("%d.%m.%Y"),
+            row.get('shift_type', '') if row else "",
+            row.get('period', '') if row else "",
+            str(row['salary']) if row and 'salary' in row else ""
+        ])
+
+        if not row:
+            continue
+        # Суммируем такси ("?" - оплата такси не определена)
+        if row.get('is_taxi_paid') and row.get('is_taxi_paid') != "?":
+            taxi_sum += TAXI_PRICE
+        # Суммируем зарплату с проверкой
+        try:
+            salary_sum += int(row['salary'])
+        except (KeyError, ValueError, TypeError):
+            invalid_days.append(current_date)
+
+    if invalid_days:
+        logger.error(f"{name}: ошибка в данных зарплаты за {', '.join(d.strftime('%d.%m') for d in invalid_days)}")
+
+    # Добавляем итоговую строку
+    table_data.append([
+        'Итого:', 'Полных смен', 'Неполных', 'Сумма'
+    ])
+    table_data.append([
+        '-', str(full_days), str(partial_days), str(salary_sum)
+    ])
+    table_data.append([
+        'Личные', 'Ревизия', 'Форма', 'Кофе', 'Авансы'
+    ])
+    table_data.append([
+        deduction["self"], deduction["revision"], deduction["form"], deduction["coffee"], deduction["advances"]
+    ])
+    table_data.append([
+        'На карту', 'Надбавки', 'Вычеты', 'Итог', 'В среднем'
+    ])
+    # Считаем сумму вычетов
+    deductions_sum = sum(list(map(int, deduction.values())))
+    # Считаем итог с учетом вычетов и надбавок
+    total_sum = round(salary_sum - int(deductions_sum) + int(bonus), 2)
+    # Считаем итог с учетом на карту
+    total_sum_with_on_card = round(total_sum - on_card, 2)
+    # Считаем среднюю зарплату с учетом такси и надбавок (без смен - 0)
+    worked_days = full_days + partial_days
+    average_salary = round((salary_sum + taxi_sum + int(bonus)) / worked_days, 2) if worked_days else 0
+    table_data.append([
+        on_card, bonus, deductions_sum, total_sum_with_on_card, average_salary
+    ])
+
+    return table_data
+
+
+def build_fragment(payslip_input: PayslipInput, date_from: date, date_to: date) -> PayslipFragment:
+    """Строит таблицы сотрудника по всем месяцам, в которых у него есть смены. Выполняется в процессе пула."""
+    tables = [
+        create_month_table(
+            payslip_input.name, year, month, month_rows,
+            payslip_input.deduction, payslip_input.bonus, payslip_input.on_card,
+            date_from, date_to,
+        )
+        for (year, month), month_rows in _group_by_month(payslip_input.rows).items()
+    ]
+    return PayslipFragment(payslip_input.employee_id, tables)
+
+
+def _build_fragments(payslip_inputs: list[PayslipInput], date_from: date, date_to: date) -> list[PayslipFragment]:
+    # Задача пула: пачка сотрудников, чтобы не передавать между процессами каждого по отдельности
+    return [build_fragment(payslip_input, date_from, date_to) for payslip_input in payslip_inputs]
+
+
+def fragment_key(payslip_input: PayslipInput, date_from: date, date_to: date) -> str:
+    """Хэш входных данных фрагмента: ключ в кэше."""
+    payload = json.dumps(
+        [FRAGMENT_VERSION, payslip_input.name, payslip_input.rows, payslip_input.deduction,
+         payslip_input.bonus, payslip_input.on_card, date_from, date_to],
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class FragmentCache:
+    """
+    Кэш фрагментов на диске: файл <ключ>.json с таблицами сотрудника в каталоге directory.
+    Поврежденный или нечитаемый файл считается промахом.
+    """
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> list[TableData] | None:
+        path = self._path(key)
+        try:
+            tables = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        # Время изменения - время последнего использования, по нему prune удаляет старые фрагменты
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return tables
+
+    def put(self, key: str, tables: list[TableData]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temp_path = path.with_suffix(".tmp")
+        try:
+            temp_path.write_text(json.dumps(tables, ensure_ascii=False), encoding="utf-8")
+            os.replace(temp_path, path)
+        except OSError as e:
+            # Без кэша отчет все равно строится, фрагмент будет построен заново в следующий раз
+            logger.warning(f"Не удалось сохранить фрагмент отчета в кэш: {e}")
+
+    def prune(self, max_age_days: int = CACHE_MAX_AGE_DAYS) -> int:
+        """Удаляет фрагменты, которые не использовались дольше max_age_days. Возвращает число удаленных."""
+        if not self.directory.exists():
+            return 0
+        expires = time.time() - max_age_days * 86400
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime < expires:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def _chunks(items: list, count: int) -> list[list]:
+    size = -(-len(items) // count)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_fragments(payslip_inputs: list[PayslipInput],
+                    date_from: date,
+                    date_to: date,
+                    cache: FragmentCache | None = None,
+                    max_workers: int | None = None,
+                    parallel_min: int = PARALLEL_MIN_FRAGMENTS,
+                    report: Callable[[int, int], None] | None = None,
+                    check_cancelled: Callable[[], None] | None = None,
+                    ) -> list[PayslipFragment]:
+    """
+    Возвращает фрагменты сотрудников в порядке payslip_inputs.
+
+    Фрагменты из кэша не перестраиваются. Остальные строятся в пуле процессов, если их не меньше parallel_min,
+    иначе в текущем процессе, и сохраняются в кэш по мере готовности (в том числе при отмене).
+
+    :param cache: Кэш фрагментов, None - без кэша.
+    :param max_workers: Число процессов пула (по умолчанию - по числу ядер). 1 - без пула.
+    :param report: Вызывается с числом готовых фрагментов и общим числом.
+    :param check_cancelled: Вызывается между сотрудниками (пачками в пуле), может прервать построение исключением.
+    :raises CardParseError: Если у сотрудника неверно заполнено поле "на карту".
+    """
+    report = report or (lambda done, total: None)
+    check_cancelled = check_cancelled or (lambda: None)
+    total = len(payslip_inputs)
+    fragments: list[PayslipFragment | None] = [None] * total
+    keys = [fragment_key(payslip_input, date_from, date_to) for payslip_input in payslip_inputs]
+
+    missing = []
+    for position, (payslip_input, key) in enumerate(zip(payslip_inputs, keys)):
+        tables = cache.get(key) if cache else None
+        if tables is None:
+            missing.append(position)
+        else:
+            fragments[position] = PayslipFragment(payslip_input.employee_id, tables)
+    done = total - len(missing)
+    report(done, total)
+
+    def store(positions: list[int], built: list[PayslipFragment]) -> None:
+        nonlocal done
+        for position, fragment in zip(positions, built):
+            fragments[position] = fragment
+            if cache:
+                cache.put(keys[position], fragment.tables)
+        done += len(built)
+        report(done, total)
+
+    workers = max_workers or os.cpu_count() or 1
+    if len(missing) >= parallel_min and workers > 1:
+        # Пачек больше, чем процессов: прогресс обновляется чаще, процессы загружены равномернее
+        chunks = _chunks(missing, workers * 4)
+        # Процессы пула пишут логи только в консоль, файл лога остается за основным процессом
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=configure_worker_logging)
+        try:
+            futures = [
+                executor.submit(_build_fragments, [payslip_inputs[position] for position in chunk], date_from, date_to)
+                for chunk in chunks
+            ]
+            for chunk, future in zip(chunks, futures):
+                store(chunk, future.result())
+                check_cancelled()
+        finally:
+            # При отмене или ошибке не дожидаемся пачек, которые еще не начали строиться
+            executor.shutdown(wait=True, cancel_futures=True)
+    else:
+        for position in missing:
+            check_cancelled()
+            store([position], [build_fragment(payslip_inputs[position], date_from, date_to)])
+
+    logger.info(f"Фрагменты отчета: {total} сотрудников, из кэша {total - len(missing)}, построено {len(missing)}")
+    return fragments
@@ -7,11 +7,15 @@ from PySide6.QtWidgets import QDialog, QAbstractItemView, QTableWidgetItem, QMes
 from PySide6.QtGui import QDrag, QPixmap, QPainter
 
 from ..db import get_session
-from ..models import Employee, MotivationProgram
-from ..core.control_models import assign_motivation_program
+from ..models import MotivationProgram
+from ..core.control_models import EmployeeRow, apply_program_membership, load_assignable_employee_rows, \
+    load_program_employee_rows, plan_program_membership
+from ..core.logging_config import get_logger
 from ..ui.edit_employes_in_role_dialog import Ui_Dialog
 from ..ui.styles import WARNING_DIALOG_STYLE
 
+logger = get_logger(__name__, level="DEBUG")
+
 
 class EditEmployeesWindow(QDialog, Ui_Dialog):
     def __init__(self, role_id: str, parent=None):
@@ -190,59 +194,33 @@ class EditEmployeesWindow(QDialog, Ui_Dialog):
         painter.end()
         return pixmap
 
+    def _fill_table(self, table: QTableWidget, employees: list[EmployeeRow]) -> None:
+        """
+        Заполнение таблицы строками сотрудников.
+        """
+        table.setRowCount(len(employees))
+        for row, employee in enumerate(employees):
+            table.setItem(row, 0, QTableWidgetItem(employee.name))
+            table.setItem(row, 1, QTableWidgetItem(employee.position))
+            table.setItem(row, 2, QTableWidgetItem(employee.departments_text))
+            table.setItem(row, 3, QTableWidgetItem(str(employee.code)))
+            table.setItem(row, 4, QTableWidgetItem(str(employee.id)))
+
     def fill_left_table(self):
         """
-        Заполнение таблицы всех сотрудников.
+        Заполнение таблицы всех сотрудников, не привязанных к роли.
         """
         with get_session() as session:
-
-            all_employees = session.query(Employee).all()
-            role_employees = session.query(Employee).filter(Employee.motivation_program.has(id=self.current_role_id)).all()
-
-            # Если сотрудник не привязан к роли, то добавляем его в таблицу, со всеми сотрудниками.
-            for employee in all_employees:
-                if employee not in role_employees and employee.code:
-                    self.table_all_employees.insertRow(self.table_all_employees.rowCount())
-                    self.table_all_employees.setItem(self.table_all_employees.rowCount() - 1, 0,
-                                                     QTableWidgetItem(employee.name))
-                    self.table_all_employees.setItem(self.table_all_employees.rowCount() - 1, 1,
-                                                     QTableWidgetItem(employee.position))
-                    self.table_all_employees.setItem(self.table_all_employees.rowCount() - 1, 3,
-                                                     QTableWidgetItem(str(employee.code)))
-                    self.table_all_employees.setItem(self.table_all_employees.rowCount() - 1, 4,
-                                                     QTableWidgetItem(str(employee.id)))
-                    # Подготавливаем строку отделов.
-                    departments_string = ""
-                    for department in employee.departments:
-                        departments_string += department.name + " "
-                    # Добавляем строку отделов.
-                    self.table_all_employees.setItem(self.table_all_employees.rowCount() - 1, 2,
-                                                     QTableWidgetItem(departments_string))
+            employees = load_assignable_employee_rows(session, self.current_role_id)
+        self._fill_table(self.table_all_employees, employees)
 
     def fill_right_table(self):
         """
         Заполнение таблицы сотрудников привязанных к роли.
         """
         with get_session() as session:
-            role_employees = session.query(Employee).filter(Employee.motivation_program.has(id=self.current_role_id)).all()
-            for employee in role_employees:
-                self.table_role_employees.insertRow(self.table_role_employees.rowCount())
-                self.table_role_employees.setItem(self.table_role_employees.rowCount() - 1, 0,
-                                                  QTableWidgetItem(employee.name))
-                self.table_role_employees.setItem(self.table_role_employees.rowCount() - 1, 1,
-                                                  QTableWidgetItem(employee.position))
-                self.table_role_employees.setItem(self.table_role_employees.rowCount() - 1, 3,
-                                                  QTableWidgetItem(str(employee.code)))
-                self.table_role_employees.setItem(self.table_role_employees.rowCount() - 1, 4,
-                                                  QTableWidgetItem(str(employee.id)))
-
-                # Подготавливаем строку отделов.
-                departments_string = ""
-                for department in employee.departments:
-                    departments_string += department.name + " "
-                # Добавляем строку отделов.
-                self.table_role_employees.setItem(self.table_role_employees.rowCount() - 1, 2,
-                                                  QTableWidgetItem(departments_string))
+            employees = load_program_employee_rows(session, self.current_role_id)
+        self._fill_table(self.table_role_employees, employees)
 
     def search(self, text):
         """
@@ -263,72 +241,45 @@ class EditEmployeesWindow(QDialog, Ui_Dialog):
     def save(self):
         """
         Сохраняет изменения внесенные в таблицу связи сотрудников с ролями(Программами мотивации).
+        Текущий и новый состав роли сравниваются одним запросом, изменения применяются
+        одним UPDATE на каждое направление в одной транзакции.
         """
 
         current_role_id = self.current_role_id
 
-        with get_session() as session:
-            # Получаем уже привязанных к данной роли сотрудников
-            assigned_employees = session.query(Employee).filter(Employee.motivation_program_id == current_role_id).all()
-
-            # Получаем список id сотрудников из таблицы
-            table_employees_id = [self.table_role_employees.item(row, 4).text() for row in
-                                  range(self.table_role_employees.rowCount())]
-
-            # Проверяем не исключили ли уже существующих из таблицы
-            for assigned_employee in assigned_employees:
-                print(assigned_employee.name)
-                if assigned_employee.id not in table_employees_id:
-                    # Если сотрудника уже нет в таблице, то отвязываем его
-                    assign_motivation_program(
-                        session=session, employee_id=assigned_employee.id, motivation_program_id=None)
-                    print(f"Отвязка {assigned_employee.name}")
-
-            current_role = session.query(MotivationProgram).filter(MotivationProgram.id == current_role_id).first()
-            current_role_name = current_role.name
-            print(f"Выбрана роль {current_role_name}")
-
-            for row in range(self.table_role_employees.rowCount()):
-                employee_id = self.table_role_employees.item(row, 4).text()
-                employee = session.query(Employee).filter(Employee.id == employee_id).first()
-
-                print(f"Строка {row} сотрудник {employee.name}")
-
-                if not employee:
-                    print(f"Сотрудник с id {employee_id} отсутствует в базе")
-                    continue
+        # Получаем список id сотрудников из таблицы
+        table_employees_id = [self.table_role_employees.item(row, 4).text() for row in
+                              range(self.table_role_employees.rowCount())]
 
-                if not employee.motivation_program:  # Если нет связи с ролями, то добавляем.
-                    assign_motivation_program(
-                        session=session, employee_id=employee_id, motivation_program_id=current_role_id)
-                    print(f"Добавление сотрудника {employee.name} в программу {current_role_name}")
-                else:  # Если сотрудник уже связан с другой ролью, то спрашиваем заменить или оставить его как есть.
-                    if employee.motivation_program.id != int(current_role_id):
-                        print(f"Сотрудник {employee.name} уже связан с другой ролью ")
-                        employee_name = employee.name
-                        employee_role_name = employee.motivation_program.name
-                        # Выбрасываем окно с предупреждением
-                        msg_box = QMessageBox(
-                            QMessageBox.Icon.Warning,
-                            "Предупреждение",
-                            f"Сотруднику {employee_name} уже назначена программа {employee_role_name}\nЗаменить ее?",
-                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                            self
-                        )
-
-                        button_yes = msg_box.button(QMessageBox.StandardButton.Yes)
-                        button_no = msg_box.button(QMessageBox.StandardButton.No)
-                        button_yes.setText(f"Заменить на {current_role_name}")
-                        button_no.setText(f"Оставить {employee_role_name}")
-
-                        msg_box.setStyleSheet(WARNING_DIALOG_STYLE)
-                        reply = msg_box.exec()
-
-                        if reply == QMessageBox.StandardButton.Yes:
-                            assign_motivation_program(
-                                session=session, employee_id=employee_id, motivation_program_id=current_role_id)
-                            print(f"Замена сотрудника {employee.name} на программу {current_role_name}")
-                        else:
-                            continue
+        with get_session() as session:
+            plan = plan_program_membership(session, current_role_id, table_employees_id)
+            current_role_name = session.get(MotivationProgram, int(current_role_id)).name
+
+            for employee_id in plan.missing:
+                logger.warning(f"Сотрудник с id {employee_id} отсутствует в базе")
+
+            add_ids = list(plan.to_add)
+            # Если сотрудник уже связан с другой ролью, то спрашиваем заменить или оставить его как есть.
+            for conflict in plan.conflicts:
+                msg_box = QMessageBox(
+                    QMessageBox.Icon.Warning,
+                    "Предупреждение",
+                    f"Сотруднику {conflict.employee_name} уже назначена программа {conflict.program_name}\n"
+                    f"Заменить ее?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    self
+                )
+
+                button_yes = msg_box.button(QMessageBox.StandardButton.Yes)
+                button_no = msg_box.button(QMessageBox.StandardButton.No)
+                button_yes.setText(f"Заменить на {current_role_name}")
+                button_no.setText(f"Оставить {conflict.program_name}")
+
+                msg_box.setStyleSheet(WARNING_DIALOG_STYLE)
+                if msg_box.exec() == QMessageBox.StandardButton.Yes:
+                    add_ids.append(conflict.employee_id)
+
+            apply_program_membership(session, current_role_id, add_ids, plan.to_remove)
             session.commit()
-            self.close()
+            logger.info(f"Программа {current_role_name}: добавлено {len(add_ids)}, отвязано {len(plan.to_remove)}")
+        self.close()
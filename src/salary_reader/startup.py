@@ -0,0 +1,95 @@
+"""
+Точка входа приложения.
+
+Модуль импортирует только Qt и splash screen: splash показывается до импорта главного окна,
+БД, клиента iiko и остальных тяжелых зависимостей. Главное окно импортируется и создается уже под splash screen.
+"""
+from salary_reader.core.startup_timing import startup_timer, EXIT_AFTER_STARTUP_ENV
+
+import multiprocessing
+import os
+import sys
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication, QMessageBox
+
+from salary_reader.core.logging_config import get_logger
+from salary_reader.core.version import get_version_info
+from salary_reader.helpers.resources import resource_path
+from salary_reader.splash_screen import show_splash_screen
+
+logger = get_logger(__name__, level="DEBUG")
+
+# Если окно так и не отрисовалось (например, свернуто), запуск считается завершенным через это время, мс
+INTERACTIVE_FALLBACK_MS = 3000
+
+
+def _on_interactive(window, check_updates: bool) -> None:
+    """
+    Вызывается, когда цикл событий обработал первую отрисовку окна: окно отвечает пользователю.
+    Дальше выполняются операции, которые не нужны для первого экрана.
+    """
+    if "interactive" in startup_timer.marks:
+        return
+    startup_timer.mark("interactive")
+    startup_timer.dump()
+    if os.environ.get(EXIT_AFTER_STARTUP_ENV):
+        QApplication.quit()
+        return
+    window.start_employees_sync()
+    # Автоматическая проверка обновлений при запуске (только если не перезапуск)
+    if check_updates:
+        window.auto_check_updates()
+
+
+def run():
+    # Проверяем, если это перезапуск после обновления
+    restart_after_update = "--restart-after-update" in sys.argv
+    if restart_after_update:
+        logger.info("Запуск после обновления - пропускаем автоматическую проверку обновлений")
+
+    app = QApplication(sys.argv)
+
+    # Показываем splash screen
+    version_info = get_version_info()
+    splash_path = resource_path("resources/images/splash_background.png")
+    splash = show_splash_screen(app, splash_path, version_info['full_version'])
+    startup_timer.mark("splash_shown")
+
+    # Главное окно и его зависимости импортируются, пока показан splash screen
+    from salary_reader.iiko_init import close_iiko_session
+    from salary_reader.main import SalaryReader
+    startup_timer.mark("modules_imported")
+
+    # Сессия iiko живет все время работы приложения, logout при выходе
+    app.aboutToQuit.connect(close_iiko_session)
+
+    # Создаем и инициализируем главное окно
+    logger.info("Инициализация главного окна...")
+    window = SalaryReader()
+    startup_timer.mark("window_created")
+
+    # Показываем главное окно и скрываем splash screen.
+    # Окно показывается до finish, иначе finish ждет появления окна на экране
+    finish_startup = lambda: _on_interactive(window, check_updates=not restart_after_update)
+    startup_timer.watch_first_paint(window, on_painted=lambda: QTimer.singleShot(0, finish_startup))
+    window.show()
+    splash.finish(window)
+    QTimer.singleShot(INTERACTIVE_FALLBACK_MS, finish_startup)
+
+    if restart_after_update:
+        logger.info("Перезапуск после обновления - показываем уведомление")
+        # Показываем уведомление об успешном обновлении
+        msg = QMessageBox()
+        msg.setWindowTitle("Обновление завершено")
+        msg.setText("Приложение успешно обновлено и перезапущено!")
+        msg.setIcon(QMessageBox.Icon.Information)
+        msg.exec()
+
+    sys.exit(app.exec())
+
+
+if __name__ == '__main__':
+    # Процессы пула (отчет по зарплате) в собранном exe запускают этот же файл
+    multiprocessing.freeze_support()
+    run()
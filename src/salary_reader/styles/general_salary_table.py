@@ -1,6 +1,6 @@
 GTS_TABLE_STYLE = u"""
 /* База таблицы */
-QTableWidget {
+QTableView {
     background-color: rgba(255, 255, 255, 30);
     border: 1px solid rgba(255, 255, 255, 40);
     border-radius: 7px;
@@ -9,7 +9,7 @@ QTableWidget {
 }
 
 /* Выделение */
-QTableWidget::item:selected {
+QTableView::item:selected {
     background-color: rgba(255, 255, 255, 120);
     font-weight: bold;
     color: white;
@@ -0,0 +1,394 @@
+"""
+Локальная замена iiko для нагрузочного тестирования.
+
+FakeIikoApi повторяет ту часть интерфейса IikoApi, которую использует приложение:
+client.login/logout, employees (сотрудники и явки по отделу), roles и reports.get_sales_report.
+Данные берутся из синтетического набора (generate_dataset): N отделов × M сотрудников × D дней
+с пересекающимися явками и явками через полночь. Задержку ответов и ошибки можно настроить (FaultInjection).
+
+Замену устанавливает обвязка тестов и бенчмарков (install_fake_iiko), в сборку приложения модуль не входит
+(excludes в SalaryReader.spec). Запуск приложения из исходников с заменой iiko:
+    python -m salary_reader.testing.fake_iiko --departments 3 --employees 40 --days 31 --output dataset.json
+    python -m salary_reader.testing.fake_iiko --run-app dataset.json    # или --run-app 1 - набор по умолчанию
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from requests import Response
+from requests.exceptions import HTTPError
+
+try:
+    from iiko_api import EmployeeNotFoundError
+except ImportError:
+    class EmployeeNotFoundError(LookupError):
+        """Сотрудник не найден (iiko_api не установлен)."""
+
+ROLE_NAMES = ("Повар", "Бармен", "Официант", "Кассир", "Администратор")
+FIRST_NAMES = ("Иван", "Анна", "Петр", "Мария", "Олег", "Елена", "Сергей", "Ольга", "Дмитрий", "Наталья")
+LAST_NAMES = ("Иванов", "Смирнова", "Кузнецов", "Попова", "Соколов", "Лебедева", "Козлов", "Новикова")
+
+# Варианты смен: (час начала, длительность в часах). Вечерние смены заканчиваются после полуночи
+SHIFT_PATTERNS = (
+    (9, 12),
+    (10, 12),
+    (10, 6),
+    (16, 6),
+    (17, 9),
+    (18, 10),
+)
+
+
+@dataclass
+class FakeIikoDataset:
+    """
+    Синтетические данные iiko.
+
+    :var departments: Отделы: id, code, name.
+    :var roles: Роли: id, name.
+    :var employees: Сотрудники в формате iiko (departmentCodes одной строкой или списком, как в XML iiko).
+    :var attendances: Явки: id, employeeId, departmentCode, dateFrom, dateTo (у открытой явки dateTo нет).
+    :var sales: Выручка по отделам: код отдела -> {дата ISO: выручка}.
+    """
+    departments: list[dict] = field(default_factory=list)
+    roles: list[dict] = field(default_factory=list)
+    employees: list[dict] = field(default_factory=list)
+    attendances: list[dict] = field(default_factory=list)
+    sales: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(self.__dict__, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def from_json(cls, text: str) -> "FakeIikoDataset":
+        return cls(**json.loads(text))
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_dataset(
+        departments: int = 2,
+        employees: int = 30,
+        days: int = 31,
+        date_from: date = date(2025, 3, 1),
+        seed: int = 0,
+        open_last_day: bool = False,
+) -> FakeIikoDataset:
+    """
+    Генерирует синтетический набор данных iiko.
+
+    :param departments: Количество отделов.
+    :param employees: Количество сотрудников в каждом отделе.
+    :param days: Количество дней, начиная с date_from.
+    :param date_from: Первый день набора.
+    :param seed: Начальное значение генератора, один seed дает один и тот же набор.
+    :param open_last_day: Оставить часть явок последнего дня открытыми (без dateTo), как в текущей смене.
+    :return: Набор данных.
+    """
+    rng = random.Random(seed)
+    dataset = FakeIikoDataset()
+    dataset.roles = [{"id": _uuid(rng), "name": name} for name in ROLE_NAMES]
+
+    for department_index in range(departments):
+        code = str(department_index + 1)
+        dataset.departments.append({"id": _uuid(rng), "code": code, "name": f"Отдел {code}"})
+        dataset.sales[code] = {
+            (date_from + timedelta(days=day)).isoformat(): rng.randrange(50_000, 250_000, 100)
+            for day in range(days)
+        }
+
+    codes = [department["code"] for department in dataset.departments]
+    tabel = 1000
+    for department_code in codes:
+        for _ in range(employees):
+            tabel += 1
+            employee_codes = [department_code]
+            # Часть сотрудников работает в двух отделах
+            if len(codes) > 1 and rng.random() < 0.1:
+                employee_codes.append(rng.choice([code for code in codes if code != department_code]))
+            employee = {
+                "id": _uuid(rng),
+                "code": str(tabel),
+                "name": f"user{tabel}",
+                "firstName": rng.choice(FIRST_NAMES),
+                "lastName": rng.choice(LAST_NAMES),
+                "mainRoleId": rng.choice(dataset.roles)["id"],
+                "departmentCodes": employee_codes[0] if len(employee_codes) == 1 else employee_codes,
+            }
+            dataset.employees.append(employee)
+            dataset.attendances.extend(_generate_attendances(rng, employee["id"], department_code, date_from, days))
+
+        # Служебный аккаунт без табельного, приложение его пропускает
+        dataset.employees.append({"id": _uuid(rng), "name": f"service{department_code}",
+                                  "departmentCodes": department_code})
+
+    if open_last_day:
+        last_day = (date_from + timedelta(days=days - 1)).isoformat()
+        for attendance in dataset.attendances:
+            if attendance["dateFrom"].startswith(last_day) and rng.random() < 0.5:
+                del attendance["dateTo"]
+    return dataset
+
+
+def _generate_attendances(rng: random.Random, employee_id: str, department_code: str, date_from: date,
+                          days: int) -> list[dict]:
+    """Явки одного сотрудника: смена примерно в 60% дней, иногда смена из двух пересекающихся явок."""
+    attendances = []
+    for day in range(days):
+        if rng.random() > 0.6:
+            continue
+        start_hour, hours = rng.choice(SHIFT_PATTERNS)
+        start = datetime.combine(date_from + timedelta(days=day), datetime.min.time()) \
+            + timedelta(hours=start_hour, minutes=rng.choice((0, 5, 15, 30)))
+        end = start + timedelta(hours=hours, minutes=rng.randrange(-20, 40))
+        parts = [(start, end)]
+        if rng.random() < 0.1:
+            # Сотрудник закрыл явку и открыл новую, явки пересекаются на несколько минут
+            middle = start + (end - start) / 2
+            parts = [(start, middle + timedelta(minutes=10)), (middle, end)]
+        for part_from, part_to in parts:
+            attendances.append({
+                "id": _uuid(rng),
+                "employeeId": employee_id,
+                "departmentCode": department_code,
+                "dateFrom": part_from.isoformat(timespec="seconds"),
+                "dateTo": part_to.isoformat(timespec="seconds"),
+            })
+    return attendances
+
+
+@dataclass
+class FaultInjection:
+    """
+    Задержки и ошибки ответов.
+
+    :var latency: Задержка каждого запроса, секунды.
+    :var jitter: Случайная добавка к задержке от 0 до jitter, секунды.
+    :var error_rate: Доля запросов, завершающихся ошибкой error_status.
+    :var error_status: HTTP-статус ошибки.
+    :var unauthorized_rate: Доля запросов, на которые возвращается 401 (истекшая сессия).
+    :var seed: Начальное значение генератора задержек и ошибок.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    unauthorized_rate: float = 0.0
+    seed: int = 0
+
+
+def _http_error(status_code: int, endpoint: str) -> HTTPError:
+    response = Response()
+    response.status_code = status_code
+    response.reason = f"fake iiko: {endpoint}"
+    return HTTPError(f"{status_code} {response.reason}", response=response)
+
+
+def _as_date(value: date | datetime | str) -> date:
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _xml_list(records: list[dict]) -> list[dict] | dict | None:
+    """Как в ответах iiko: одна запись приходит словарем, пустой ответ - None."""
+    if not records:
+        return None
+    return records[0] if len(records) == 1 else records
+
+
+class FakeIikoServer:
+    """
+    Состояние замены iiko: данные, сессия, задержки и ошибки, счетчики запросов.
+    Потокобезопасна, запросы можно выполнять одновременно.
+    """
+
+    def __init__(self, dataset: FakeIikoDataset, faults: FaultInjection | None = None):
+        self.dataset = dataset
+        self.faults = faults or FaultInjection()
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.faults.seed)
+        self._token: str | None = None
+
+        self._employees_by_id = {employee["id"]: employee for employee in dataset.employees}
+        self._departments_by_id = {department["id"]: department for department in dataset.departments}
+        self._attendances_by_department: dict[str, list[dict]] = {}
+        for attendance in dataset.attendances:
+            self._attendances_by_department.setdefault(attendance["departmentCode"], []).append(attendance)
+
+    @property
+    def logged_in(self) -> bool:
+        return self._token is not None
+
+    def expire_session(self) -> None:
+        """Сбрасывает сессию: следующие запросы получат 401, пока клиент не авторизуется заново."""
+        with self._lock:
+            self._token = None
+
+    def login(self) -> str:
+        self._request("auth", authorized=False)
+        with self._lock:
+            self._token = str(uuid.uuid4())
+            return self._token
+
+    def logout(self) -> None:
+        self._request("logout")
+        with self._lock:
+            self._token = None
+
+    def _request(self, endpoint: str, authorized: bool = True) -> None:
+        """Учитывает запрос, выдерживает задержку и при необходимости выбрасывает ошибку."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            delay = self.faults.latency + self._rng.random() * self.faults.jitter
+            roll = self._rng.random()
+            token = self._token
+        if delay:
+            time.sleep(delay)
+        if authorized and (token is None or roll < self.faults.unauthorized_rate):
+            raise _http_error(401, endpoint)
+        if roll >= 1 - self.faults.error_rate:
+            raise _http_error(self.faults.error_status, endpoint)
+
+    def get_employees(self):
+        self._request("employees")
+        return _xml_list(list(self.dataset.employees))
+
+    def get_employee_by_id(self, employee_id: str) -> dict:
+        self._request("employee")
+        employee = self._employees_by_id.get(employee_id)
+        if employee is None:
+            raise EmployeeNotFoundError(employee_id)
+        return employee
+
+    def get_roles(self):
+        self._request("roles")
+        return _xml_list(list(self.dataset.roles))
+
+    def get_attendances_for_department(self, department_code: str, date_from, date_to):
+        self._request("attendances")
+        date_from, date_to = _as_date(date_from), _as_date(date_to)
+        records = [
+            attendance for attendance in self._attendances_by_department.get(department_code, [])
+            if _as_date(attendance["dateFrom"]) <= date_to
+            and _as_date(attendance.get("dateTo", attendance["dateFrom"])) >= date_from
+        ]
+        return _xml_list(records)
+
+    def get_sales_report(self, date_from, date_to, department_id: str) -> dict[date, int]:
+        self._request("sales")
+        date_from, date_to = _as_date(date_from), _as_date(date_to)
+        department = self._departments_by_id.get(department_id)
+        if department is None:
+            return {}
+        return {
+            day: revenue
+            for day, revenue in ((date.fromisoformat(key), value)
+                                 for key, value in self.dataset.sales.get(department["code"], {}).items())
+            if date_from <= day <= date_to
+        }
+
+
+class _Namespace:
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+
+class FakeIikoApi:
+    """
+    Замена IikoApi поверх FakeIikoServer с теми же группами методов: client, employees, roles, reports.
+    """
+
+    def __init__(self, server: FakeIikoServer):
+        self.server = server
+        self.client = _Namespace(login=server.login, logout=server.logout)
+        self.employees = _Namespace(
+            get_employees=server.get_employees,
+            get_employee_by_id=server.get_employee_by_id,
+            get_attendances_for_department=server.get_attendances_for_department,
+        )
+        self.roles = _Namespace(get_roles=server.get_roles)
+        self.reports = _Namespace(get_sales_report=server.get_sales_report)
+
+
+def add_departments(session, dataset: FakeIikoDataset) -> None:
+    """
+    Добавляет в БД отделы набора (отделы в БД не синхронизируются из iiko). Фиксацию выполняет вызывающий код.
+    """
+    from salary_reader.core.models import Department
+
+    for department in dataset.departments:
+        session.merge(Department(id=department["id"], code=department["code"], name=department["name"]))
+
+
+def create_fake_iiko_api(source: str = "1", faults: FaultInjection | None = None) -> FakeIikoApi:
+    """
+    Создает замену iiko.
+
+    :param source: "1" - набор по умолчанию (generate_dataset()), иначе путь к JSON с набором.
+    :param faults: Задержки и ошибки.
+    """
+    if source == "1":
+        dataset = generate_dataset()
+    else:
+        dataset = FakeIikoDataset.from_json(Path(source).read_text(encoding="utf-8"))
+    return FakeIikoApi(FakeIikoServer(dataset, faults))
+
+
+def install_fake_iiko(source: str = "1", faults: FaultInjection | None = None) -> FakeIikoApi:
+    """
+    Подменяет клиент iiko приложения (salary_reader.iiko_init) заменой.
+    Вызывается до импорта модулей, которые берут клиент через from salary_reader.iiko_init import iiko_api.
+
+    :param source: "1" - набор по умолчанию (generate_dataset()), иначе путь к JSON с набором.
+    :param faults: Задержки и ошибки.
+    """
+    from salary_reader import iiko_init
+    from salary_reader.iiko_init.session import IikoSessionLease
+
+    api = create_fake_iiko_api(source, faults)
+    iiko_init.iiko_api = api
+    iiko_init.session_lease = IikoSessionLease(api, ttl=iiko_init.session_ttl)
+    return api
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Генерация синтетического набора данных iiko")
+    parser.add_argument("--departments", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=30, help="сотрудников в каждом отделе")
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--date-from", type=date.fromisoformat, default=date(2025, 3, 1))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--run-app", metavar="SOURCE",
+                        help="запустить приложение с заменой iiko: 1 - набор по умолчанию, иначе путь к JSON")
+    args = parser.parse_args()
+
+    if args.run_app:
+        install_fake_iiko(args.run_app)
+        print("Warning: используется локальная замена iiko")
+        from salary_reader.startup import run
+
+        run()
+        return
+    if args.output is None:
+        parser.error("нужен --output или --run-app")
+
+    dataset = generate_dataset(args.departments, args.employees, args.days, args.date_from, args.seed)
+    args.output.write_text(dataset.to_json(), encoding="utf-8")
+    print(f"Сохранено: отделов {len(dataset.departments)}, сотрудников {len(dataset.employees)}, "
+          f"явок {len(dataset.attendances)} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@ from PySide6.QtWidgets import QStyledItemDelegate, QLineEdit, QTableWidgetItem,
 from PySide6.QtGui import QIntValidator
 from PySide6.QtCore import Qt
 
-from ...core.models import MotivationThreshold, MotivationProgram
+from ...core.control_models import save_program_thresholds
+from ...core.logging_config import get_logger
+from ...core.models import MotivationProgram
+
+logger = get_logger(__name__, level="DEBUG")
 
 
 class NumericDelegate(QStyledItemDelegate):
@@ -145,83 +149,65 @@ class ThresholdsTableController:
     def save_data(self, motivation_program, session):
         """
         Сохраняет данные из таблицы в базу данных.
+        В базу записывается только разница с сохраненными порогами, одной транзакцией.
 
         Args:
             motivation_program (MotivationProgram): Программа мотивации, для которой сохраняются пороги
             session: Сессия SQLAlchemy для работы с базой данных
         """
         try:
-            # Получаем количество строк в таблице
-            row_count = self.table_widget.rowCount()
-
-            # Очищаем существующие пороги для программы мотивации
-            session.query(MotivationThreshold).filter(
-                MotivationThreshold.motivation_program_id == motivation_program.id
-            ).delete()
-
-            # Если таблица пуста, просто сохраняем изменения и выходим
-            if row_count == 0:
-                session.commit()
-                self.changes_made = False
-                return True
-
-            # Список для новых порогов
-            new_thresholds = []
-
-            # Проходим по всем строкам таблицы
-            for row in range(row_count):
-                try:
-                    # Получаем элементы таблицы
-                    revenue_item = self.table_widget.item(row, 0)
-                    salary_item = self.table_widget.item(row, 1)
-
-                    if revenue_item is None or salary_item is None:
-                        continue
-
-                    # Очищаем значения от форматирования
-                    revenue = int(revenue_item.text().replace(" ", "").replace("руб.", ""))
-                    salary = int(salary_item.text().replace(" ", "").replace("руб.", ""))
-
-                    # Создаем новый порог
-                    threshold = MotivationThreshold(
-                        revenue_threshold=revenue,
-                        salary=salary,
-                        motivation_program_id=motivation_program.id
-                    )
-
-                    # Добавляем порог в список
-                    new_thresholds.append(threshold)
-
-                except (ValueError, AttributeError) as e:
-                    # Если возникла ошибка при обработке строки, пропускаем её
-                    print(f"Ошибка при обработке строки {row}: {e}")
-                    continue
-
-            # Проверяем, что пороги уникальны по revenue_threshold
-            revenue_values = [t.revenue_threshold for t in new_thresholds]
-            if len(revenue_values) != len(set(revenue_values)):
-                raise ValueError("Обнаружены дублирующиеся значения выручки в порогах")
-
-            # Сортируем пороги по возрастанию revenue_threshold
-            new_thresholds.sort(key=lambda x: x.revenue_threshold)
-
-            # Добавляем все новые пороги в сессию
-            for threshold in new_thresholds:
-                session.add(threshold)
+            thresholds = self.table_thresholds()
+            changes = save_program_thresholds(session, motivation_program.id, thresholds)
 
             # Сохраняем изменения в базе данных
             session.commit()
+            if changes:
+                logger.info(f"Пороги программы {motivation_program.id}: добавлено {changes.inserted}, "
+                            f"изменено {changes.updated}, удалено {changes.deleted}")
             self.changes_made = False
             return True
 
         except Exception as e:
             # В случае ошибки откатываем изменения
             session.rollback()
-            print(f"Ошибка при сохранении данных: {e}")
+            logger.error(f"Ошибка при сохранении данных: {e}")
             # Можно также показать диалог с ошибкой пользователю
             self._show_error_dialog(str(e))
             return False
 
+    def table_thresholds(self) -> dict[int, int]:
+        """
+        Читает пороги из таблицы.
+
+        :return: Вознаграждение по порогу выручки.
+        :raises ValueError: Если в таблице повторяется значение выручки.
+        """
+        thresholds = {}
+        # Проходим по всем строкам таблицы
+        for row in range(self.table_widget.rowCount()):
+            try:
+                # Получаем элементы таблицы
+                revenue_item = self.table_widget.item(row, 0)
+                salary_item = self.table_widget.item(row, 1)
+
+                if revenue_item is None or salary_item is None:
+                    continue
+
+                # Очищаем значения от форматирования
+                revenue = int(revenue_item.text().replace(" ", "").replace("руб.", ""))
+                salary = int(salary_item.text().replace(" ", "").replace("руб.", ""))
+
+            except (ValueError, AttributeError) as e:
+                # Если возникла ошибка при обработке строки, пропускаем её
+                logger.warning(f"Ошибка при обработке строки {row}: {e}")
+                continue
+
+            # Проверяем, что пороги уникальны по revenue_threshold
+            if revenue in thresholds:
+                raise ValueError("Обнаружены дублирующиеся значения выручки в порогах")
+            thresholds[revenue] = salary
+        return thresholds
+
     def _show_error_dialog(self, message):
         """
         Показывает диалоговое окно с сообщением об ошибке.
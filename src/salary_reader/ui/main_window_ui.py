@@ -19,7 +19,8 @@ from PySide6.QtWidgets import (QApplication, QComboBox, QDateEdit, QFrame,
     QHBoxLayout, QHeaderView, QLabel, QLayout,
     QLineEdit, QListView, QListWidget, QListWidgetItem,
     QMainWindow, QPushButton, QSizePolicy, QSpacerItem,
-    QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget)
+    QTableView, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -399,7 +400,7 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addWidget(self.salary_panel)
 
-        self.salar_table = QTableWidget(self.main_frame)
+        self.salar_table = QTableView(self.main_frame)
         self.salar_table.setObjectName(u"salar_table")
         font1 = QFont()
         font1.setBold(True)
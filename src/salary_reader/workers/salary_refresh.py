@@ -0,0 +1,162 @@
+"""
+Фоновое обновление сводной таблицы зарплат.
+
+Загрузка данных из iiko, подготовка явок и расчет выполняются в QThreadPool на отдельном экземпляре драйвера.
+В потоке GUI остается только последний этап: драйвер окна принимает рассчитанные данные и заполняет таблицу.
+Новое обновление отменяет предыдущее, результаты устаревших задач отбрасываются.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import QObject, QThreadPool, Signal, Slot
+
+from salary_reader.core.logging_config import get_logger
+from salary_reader.workers.task import BackgroundTask, TaskContext
+
+if TYPE_CHECKING:
+    from salary_reader.drivers.attendances import AttendancesDataDriver
+
+logger = get_logger(__name__, level="DEBUG")
+
+
+@dataclass(slots=True)
+class SalaryRefreshResult:
+    """
+    Результат фоновой части обновления.
+
+    :var driver: Драйвер, в котором загружены и подготовлены данные периода.
+    :var rows: Строки сводной таблицы.
+    """
+    driver: "AttendancesDataDriver"
+    rows: list[dict]
+
+
+def refresh_salary_data(
+        context: TaskContext,
+        driver: "AttendancesDataDriver",
+        date_from: date,
+        date_to: date,
+        department_code: str,
+) -> SalaryRefreshResult:
+    """
+    Этапы обновления, которые выполняются вне потока GUI: загрузка, подготовка явок и расчет.
+
+    :param context: Контекст фоновой задачи.
+    :param driver: Отдельный от окна экземпляр драйвера без таблицы.
+    :param date_from: Дата начала периода.
+    :param date_to: Дата окончания периода.
+    :param department_code: Код отдела.
+    """
+    context.report(0, "Загрузка явок и выручки из iiko...")
+    if not driver.fetch_data(date_from, date_to, department_code):
+        raise RuntimeError("Нет подключения к iiko: проверьте настройки в файле .env")
+    context.check_cancelled()
+
+    context.report(40, "Подготовка явок...")
+    driver.prepare_data()
+    context.check_cancelled()
+
+    context.report(60, "Расчет зарплаты...")
+    rows = driver.get_general_table_rows()
+    context.check_cancelled()
+
+    context.report(90, "Отрисовка таблицы...")
+    return SalaryRefreshResult(driver=driver, rows=rows)
+
+
+class SalaryRefreshPipeline(QObject):
+    """
+    Запускает фоновое обновление сводной таблицы и применяет его результат в потоке GUI.
+    """
+    progress = Signal(int, str)  # процент, сообщение
+    finished = Signal()
+    failed = Signal(object)  # исключение
+    cancelled = Signal()
+
+    def __init__(self, driver: "AttendancesDataDriver", thread_pool: QThreadPool | None = None, parent=None):
+        """
+        :param driver: Драйвер сводной таблицы окна.
+        :param thread_pool: Пул потоков, по умолчанию глобальный.
+        """
+        super().__init__(parent)
+        self.driver = driver
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._current_task_id: int | None = None
+        # Запущенные задачи храним до их завершения, включая отмененные
+        self._tasks: dict[int, BackgroundTask] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._current_task_id is not None
+
+    def start(self, date_from: date, date_to: date, department_code: str) -> None:
+        """
+        Запускает обновление за период, отменяя незавершенное.
+        """
+        self.cancel()
+
+        detached_driver = self.driver.detached()
+        task = BackgroundTask(
+            lambda context: refresh_salary_data(context, detached_driver, date_from, date_to, department_code)
+        )
+        task.signals.progress.connect(self._on_progress)
+        task.signals.succeeded.connect(self._on_succeeded)
+        task.signals.failed.connect(self._on_failed)
+        task.signals.cancelled.connect(self._on_cancelled)
+
+        self._tasks[task.task_id] = task
+        self._current_task_id = task.task_id
+        logger.info(f"Запущено обновление таблицы зарплат (задача {task.task_id}): "
+                    f"{date_from} - {date_to}, отдел {department_code}")
+        self.thread_pool.start(task)
+
+    def cancel(self) -> None:
+        """
+        Отменяет текущее обновление. Сетевой запрос, который уже выполняется, не прерывается,
+        но его результат будет отброшен.
+        """
+        if self._current_task_id is None:
+            return
+        task = self._tasks.get(self._current_task_id)
+        if task is not None:
+            logger.info(f"Обновление таблицы зарплат отменено (задача {task.task_id})")
+            task.cancel()
+        self._current_task_id = None
+        self.cancelled.emit()
+
+    def _is_current(self, task_id: int) -> bool:
+        return task_id == self._current_task_id
+
+    @Slot(int, int, str)
+    def _on_progress(self, task_id: int, percent: int, message: str) -> None:
+        if self._is_current(task_id):
+            self.progress.emit(percent, message)
+
+    @Slot(int, object)
+    def _on_succeeded(self, task_id: int, result: SalaryRefreshResult) -> None:
+        self._tasks.pop(task_id, None)
+        if not self._is_current(task_id):
+            logger.debug(f"Результат устаревшей задачи {task_id} отброшен")
+            return
+        self._current_task_id = None
+        try:
+            self.driver.adopt(result.driver)
+            self.driver.fill_general_table(result.rows)
+        except Exception as e:
+            logger.exception(f"Ошибка при отрисовке сводной таблицы: {e}")
+            self.failed.emit(e)
+            return
+        self.progress.emit(100, "Готово")
+        self.finished.emit()
+
+    @Slot(int, object)
+    def _on_failed(self, task_id: int, error: Exception) -> None:
+        self._tasks.pop(task_id, None)
+        if self._is_current(task_id):
+            self._current_task_id = None
+            self.failed.emit(error)
+
+    @Slot(int)
+    def _on_cancelled(self, task_id: int) -> None:
+        self._tasks.pop(task_id, None)
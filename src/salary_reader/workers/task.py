@@ -0,0 +1,106 @@
+"""
+Фоновые задачи на QThreadPool.
+
+Задача выполняет функцию вне потока GUI и сообщает о ходе работы сигналами. Объект сигналов создается в потоке GUI,
+поэтому слоты объектов GUI вызываются через очередь событий, а не в рабочем потоке.
+Каждый сигнал первым аргументом передает id задачи, чтобы получатель мог отбросить результаты устаревших задач.
+"""
+import itertools
+import threading
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from salary_reader.core.logging_config import get_logger
+
+logger = get_logger(__name__, level="DEBUG")
+
+_task_ids = itertools.count(1)
+
+
+class TaskCancelled(Exception):
+    """
+    Выбрасывается внутри задачи, когда ее отменили.
+    """
+
+
+class TaskSignals(QObject):
+    progress = Signal(int, int, str)  # id задачи, процент, сообщение
+    succeeded = Signal(int, object)  # id задачи, результат
+    failed = Signal(int, object)  # id задачи, исключение
+    cancelled = Signal(int)  # id задачи
+
+
+class TaskContext:
+    """
+    Передается в функцию задачи: через него функция сообщает о прогрессе и проверяет отмену.
+    """
+
+    def __init__(self, task_id: int, signals: TaskSignals):
+        self.task_id = task_id
+        self._signals = signals
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def check_cancelled(self) -> None:
+        """
+        Прерывает задачу исключением TaskCancelled, если ее отменили.
+        """
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, percent: int, message: str = "") -> None:
+        """
+        Сообщает о ходе выполнения задачи.
+
+        :param percent: Процент выполнения от 0 до 100.
+        :param message: Описание текущего этапа.
+        """
+        if not self._cancel_event.is_set():
+            self._signals.progress.emit(self.task_id, percent, message)
+
+
+class BackgroundTask(QRunnable):
+    """
+    Выполняет функцию fn(context) в QThreadPool.
+
+    По завершении испускает ровно один из сигналов succeeded, failed или cancelled.
+    Задачу нужно создавать в потоке GUI, чтобы объект сигналов принадлежал ему.
+    """
+
+    def __init__(self, fn: Callable[[TaskContext], Any]):
+        super().__init__()
+        self.task_id = next(_task_ids)
+        self.signals = TaskSignals()
+        self.context = TaskContext(self.task_id, self.signals)
+        self._fn = fn
+
+    def cancel(self) -> None:
+        """
+        Запрашивает отмену. Функция задачи прерывается на ближайшей проверке check_cancelled,
+        а ее результат в любом случае не будет передан получателю.
+        """
+        self.context.cancel()
+
+    def run(self) -> None:
+        try:
+            result = self._fn(self.context)
+        except TaskCancelled:
+            logger.debug(f"Фоновая задача {self.task_id} отменена")
+            self.signals.cancelled.emit(self.task_id)
+            return
+        except Exception as e:
+            logger.exception(f"Ошибка в фоновой задаче {self.task_id}: {e}")
+            self.signals.failed.emit(self.task_id, e)
+            return
+
+        if self.context.cancelled:
+            self.signals.cancelled.emit(self.task_id)
+        else:
+            self.signals.succeeded.emit(self.task_id, result)
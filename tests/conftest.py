@@ -0,0 +1,27 @@
+"""
+Общие настройки тестов.
+
+Тесты импортируют core.database, control_models, drivers.attendances и payslip_report, которые при импорте
+создают файл БД и лог. До импорта модулей salary_reader БД, кэши и логи переносятся во временный каталог,
+чтобы запуск тестов ничего не записывал в дерево исходников.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from salary_reader.core.paths import DB_PATH_ENV, LOG_DIR_ENV
+
+_tests_dir = Path(tempfile.mkdtemp(prefix="salary-tests-"))
+os.environ[DB_PATH_ENV] = str(_tests_dir / "salary_reader.db")
+os.environ[LOG_DIR_ENV] = str(_tests_dir / "logs")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def pytest_unconfigure(config):
+    from salary_reader.core import logging_config
+
+    # Поток записи логов держит файл открытым (на Windows его иначе нельзя удалить)
+    for writer in logging_config._writers.values():
+        writer.stop()
+    shutil.rmtree(_tests_dir, ignore_errors=True)
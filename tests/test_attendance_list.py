@@ -0,0 +1,62 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from salary_reader.drivers.attendance_list import Attendance, AttendanceParseStats, AttendancesList, \
+    parse_api_attendance
+
+EMPLOYEE_ID = "00000000-0000-0000-0000-000000000001"
+
+
+class AttendanceTests(unittest.TestCase):
+    def test_caps_rounding_and_taxi(self):
+        attendance = Attendance(EMPLOYEE_ID, datetime(2025, 3, 1, 9, 50, 30), datetime(2025, 3, 1, 22, 40))
+
+        self.assertEqual(attendance.date_from, datetime(2025, 3, 1, 10, 0))
+        self.assertEqual(attendance.date_to, datetime(2025, 3, 1, 22, 0))
+        self.assertEqual(attendance.attendance_date, date(2025, 3, 1))
+        self.assertEqual(attendance.duration, timedelta(hours=12))
+        self.assertTrue(attendance.is_taxi_paid)
+        self.assertEqual(attendance.attendance_string, "10:00 - 22:00")
+
+    def test_multi_day_attendance_has_zero_duration(self):
+        attendance = parse_api_attendance(
+            {"employeeId": EMPLOYEE_ID, "dateFrom": "2025-02-28T12:14:00+03:00", "dateTo": "2025-03-01T18:00:00+03:00"},
+            date(2025, 3, 1), date(2025, 3, 31),
+        )
+
+        self.assertEqual(attendance.duration_minutes, 0)
+        self.assertTrue(attendance.crosses_period_boundary)
+        self.assertEqual(attendance.attendance_date, date(2025, 2, 28))
+        self.assertEqual(attendance.attendance_string, "28.02 12:14 - 01.03 18:00")
+
+    def test_slotted_attendance_aggregates_minutes(self):
+        attendance = Attendance(EMPLOYEE_ID, datetime(2025, 3, 1, 11, 0), datetime(2025, 3, 1, 16, 20))
+
+        self.assertFalse(hasattr(attendance, "__dict__"))
+        self.assertEqual(attendance.duration_minutes, 330)
+
+        attendances = AttendancesList()
+        attendances.add_attendance(attendance)
+        row = attendances.get_general_row_data(EMPLOYEE_ID)
+        self.assertEqual(row["total_duration_seconds"], 330 * 60)
+        self.assertEqual(row["shifts"][date(2025, 3, 1)]["hours_duration"], 5.5)
+
+    def test_parse_stats(self):
+        stats = AttendanceParseStats()
+        records = [
+            {"employeeId": EMPLOYEE_ID, "dateFrom": "2025-03-01T09:00:00", "dateTo": "2025-03-01T23:00:00"},
+            {"employeeId": EMPLOYEE_ID, "dateFrom": "2025-03-02T05:00:00", "dateTo": "2025-03-02T12:00:00"},
+            {"employeeId": EMPLOYEE_ID, "dateFrom": "2025-04-01T12:00:00", "dateTo": "2025-04-01T20:00:00"},
+        ]
+        parsed = [parse_api_attendance(record, date(2025, 3, 1), date(2025, 3, 31), stats) for record in records]
+
+        self.assertIsNotNone(parsed[0])
+        self.assertEqual(parsed[1:], [None, None])
+        self.assertEqual(
+            (stats.parsed, stats.out_of_schedule, stats.out_of_period, stats.start_capped, stats.end_capped),
+            (1, 1, 1, 1, 1),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import importlib.util
+import unittest
+from datetime import date, datetime
+from types import MappingProxyType
+from unittest import mock
+
+from salary_reader.drivers.attendance_list import Attendance, parse_api_attendance
+from salary_reader.drivers.salary import ThresholdIndex
+from salary_reader.drivers.snapshot import ComputeSnapshot, EmployeeInfo, ProgramInfo
+
+# Драйвер импортирует control_models, а тот - клиент iiko
+HAS_IIKO_API = importlib.util.find_spec("iiko_api") is not None
+
+
+@unittest.skipUnless(HAS_IIKO_API, "iiko_api не установлен")
+class AttendancesDataDriverTests(unittest.TestCase):
+    def test_prepare_data_drops_previous_results(self):
+        from salary_reader.drivers.attendances import AttendancesDataDriver
+
+        driver = AttendancesDataDriver(None)
+        # Результаты расчета за прошлый период
+        driver.employees_shifts = {"e1": {}}
+        driver.employees_days = {"e1": []}
+        driver.employees_names = {"e1": "Сотрудник"}
+
+        driver.api_attendances = []
+        driver.period_date_from, driver.period_date_to = date(2025, 3, 1), date(2025, 3, 15)
+        driver.prepare_data()
+
+        self.assertEqual((driver.employees_shifts, driver.employees_days, driver.employees_names), ({}, {}, {}))
+
+    def test_rows_state_holds_only_table_employees(self):
+        from salary_reader.drivers import attendances
+        from salary_reader.iiko_business_api.employees import IikoDirectory
+
+        driver = attendances.AttendancesDataDriver(None, vectorized=False)
+        for employee_id in ("e1", "e2"):
+            driver.employees_attendances.add_attendance(
+                Attendance(employee_id, datetime(2025, 3, 1, 10), datetime(2025, 3, 1, 22)))
+        driver.sales = {date(2025, 3, 1): 100_000}
+        driver.snapshot = ComputeSnapshot(
+            employees=MappingProxyType({
+                employee_id: EmployeeInfo(employee_id, employee_id, ("Кухня",), 1) for employee_id in ("e1", "e2")
+            }),
+            programs=MappingProxyType({1: ProgramInfo(1, "Повар", "1", ThresholdIndex([(0, 1200)]))}),
+        )
+        # Роль e2 не найдена в iiko: сотрудника нет в таблице
+        directory = IikoDirectory(
+            employees=[
+                {"id": employee_id, "name": employee_id, "code": employee_id, "mainRoleId": role_id}
+                for employee_id, role_id in (("e1", "cook"), ("e2", "unknown"))
+            ],
+            roles=[{"id": "cook", "name": "Повар"}],
+        )
+        with mock.patch.object(attendances, "get_iiko_directory", return_value=directory):
+            rows = driver.get_general_table_rows()
+
+        self.assertEqual([row["id"] for row in rows], ["e1"])
+        self.assertEqual(set(driver.employees_shifts), {"e1"})
+        self.assertEqual(set(driver.employees_days), {"e1"})
+        self.assertEqual(set(driver.employees_names), {"e1"})
+
+    def test_payroll_cache_recomputes_only_changed_employees(self):
+        from salary_reader.drivers import attendances
+        from salary_reader.drivers.payroll_cache import PayrollCache
+        from salary_reader.drivers.payroll_engine import AttendanceColumns
+        from salary_reader.iiko_business_api.employees import IikoDirectory
+
+        period = (date(2025, 3, 1), date(2025, 3, 15))
+        records = [
+            {"employeeId": employee_id, "dateFrom": f"2025-03-{day:02d}T10:00:00",
+             "dateTo": f"2025-03-{day:02d}T{end}:00:00"}
+            for employee_id, day, end in (("e1", 1, 22), ("e1", 2, 16), ("e2", 2, 22), ("e3", 3, 21))
+        ]
+        driver = attendances.AttendancesDataDriver(None, payroll_cache=PayrollCache("sqlite://"))
+        driver.period_date_from, driver.period_date_to = period
+        for record in records:
+            driver.employees_attendances.add_attendance(parse_api_attendance(record, *period))
+        driver.attendance_columns = AttendanceColumns.from_api(records, *period)
+        driver.sales = {date(2025, 3, day): 100_000 for day in (1, 2, 3)}
+        program = ProgramInfo(1, "Повар", "1", ThresholdIndex([(0, 1200), (150_000, 2400)]))
+        driver.snapshot = ComputeSnapshot(
+            employees=MappingProxyType({
+                employee_id: EmployeeInfo(employee_id, employee_id, ("Кухня",), 1) for employee_id in ("e1", "e2", "e3")
+            }),
+            programs=MappingProxyType({1: program}),
+        )
+        directory = IikoDirectory(
+            employees=[{"id": employee_id, "name": employee_id, "code": employee_id, "mainRoleId": "cook"}
+                       for employee_id in ("e1", "e2", "e3")],
+            roles=[{"id": "cook", "name": "Повар"}],
+        )
+
+        def refresh() -> tuple[list[dict], list[str]]:
+            """Строки таблицы и сотрудники, которых посчитал движок."""
+            with mock.patch.object(attendances, "get_iiko_directory", return_value=directory), \
+                    mock.patch.object(driver, "compute_payroll", wraps=driver.compute_payroll) as compute:
+                rows = driver.get_general_table_rows()
+            return rows, compute.call_args.args[0]
+
+        rows, computed = refresh()
+        days = dict(driver.employees_days)
+        self.assertEqual(computed, ["e1", "e2", "e3"])
+        cached_rows, computed = refresh()
+        self.assertEqual(computed, [])
+        self.assertEqual(cached_rows, rows)
+        self.assertEqual(driver.employees_days, days)
+
+        # Выручка изменилась только 2 марта: пересчитываются e1 и e2
+        driver.sales[date(2025, 3, 2)] = 200_000
+        rows, computed = refresh()
+        self.assertEqual(computed, ["e1", "e2"])
+        self.assertEqual(rows[1]["day_salaries"], {date(2025, 3, 2): 2400})
+
+        # Новая версия программы пересчитывает всех ее сотрудников
+        driver.snapshot = ComputeSnapshot(
+            employees=driver.snapshot.employees,
+            programs=MappingProxyType({1: ProgramInfo(1, "Повар", "1", ThresholdIndex([(0, 600)]), version=2)}),
+        )
+        rows, computed = refresh()
+        self.assertEqual(computed, ["e1", "e2", "e3"])
+        self.assertEqual(rows[2]["salary"], 550)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from salary_reader.core.models import Base, Department, Employee, MotivationProgram, MotivationThreshold
+from salary_reader.drivers.snapshot import load_compute_snapshot
+
+
+class LoadComputeSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+
+        kitchen = Department(id="d1", code="1", name="Кухня")
+        hall = Department(id="d2", code="2", name="Зал")
+        program = MotivationProgram(name="Повар", department_code="1")
+        program.thresholds = [
+            MotivationThreshold(revenue_threshold=200_000, salary=4000),
+            MotivationThreshold(revenue_threshold=0, salary=2400),
+            MotivationThreshold(revenue_threshold=100_000, salary=3000),
+        ]
+        cook = Employee(id="e1", name="cook", code="101", position="Повар",
+                        departments=[kitchen, hall], motivation_program=program)
+        waiter = Employee(id="e2", name="waiter", code="102", position="Официант", departments=[hall])
+        self.session.add_all([kitchen, hall, program, cook, waiter])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_loads_requested_employees_only(self):
+        snapshot = load_compute_snapshot(self.session, ["e1", "unknown"])
+        self.assertEqual(set(snapshot.employees), {"e1"})
+        self.assertEqual(sorted(snapshot.get_employee("e1").department_names), ["Зал", "Кухня"])
+
+    def test_program_thresholds_sorted(self):
+        snapshot = load_compute_snapshot(self.session)
+        program = snapshot.get_program("e1")
+        self.assertEqual(list(program.thresholds), [(0, 2400), (100_000, 3000), (200_000, 4000)])
+        self.assertEqual(program.thresholds.find(150_000), (100_000, 3000))
+        self.assertIsNone(snapshot.get_program("e2"))
+
+    def test_empty_ids(self):
+        snapshot = load_compute_snapshot(self.session, [])
+        self.assertEqual(len(snapshot.employees), 0)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = load_compute_snapshot(self.session)
+        with self.assertRaises(TypeError):
+            snapshot.employees["e3"] = None
+        with self.assertRaises(AttributeError):
+            snapshot.get_employee("e1").name = "other"
+
+
+if __name__ == "__main__":
+    unittest.main()
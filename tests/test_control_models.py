@@ -0,0 +1,123 @@
+import importlib.util
+import unittest
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from salary_reader.core.models import Base, Department, Employee, MotivationProgram, MotivationThreshold
+
+# control_models импортирует клиент iiko
+HAS_IIKO_API = importlib.util.find_spec("iiko_api") is not None
+
+
+@unittest.skipUnless(HAS_IIKO_API, "iiko_api не установлен")
+class EmployeeLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        kitchen, bar = Department(id="d1", code="1", name="Кухня"), Department(id="d2", code="2", name="Бар")
+        self.session.add_all([kitchen, bar])
+        self.cook = MotivationProgram(name="Повар", department_code="1")
+        self.barman = MotivationProgram(name="Бармен", department_code="2")
+        self.session.add_all([self.cook, self.barman])
+        self.session.flush()
+        for number in range(30):
+            program = (self.cook, self.barman, None)[number % 3]
+            self.session.add(Employee(
+                id=f"e{number}", name=f"Сотрудник {number}", position="Повар", code=str(number) if number else None,
+                motivation_program=program, departments=[kitchen, bar] if number % 2 else [kitchen],
+            ))
+        self.session.commit()
+        self.cook_id = self.cook.id
+        self.session.expunge_all()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_program_employees(self):
+        from salary_reader.core.control_models import load_program_employee_rows
+
+        rows = load_program_employee_rows(self.session, str(self.cook_id))
+        self.assertEqual([row.id for row in rows], [f"e{number}" for number in range(0, 30, 3)])
+        self.assertEqual(rows[1].department_names, ("Бар", "Кухня"))
+        self.assertEqual(rows[1].departments_text, "Бар Кухня")
+        self.assertEqual(len(self.statements), 2)
+
+    def test_assignable_employees(self):
+        from salary_reader.core.control_models import load_assignable_employee_rows
+
+        rows = load_assignable_employee_rows(self.session, self.cook_id)
+        # Без табельного (e0) и сотрудники программы не попадают в список
+        self.assertEqual({row.id for row in rows}, {f"e{number}" for number in range(30) if number % 3})
+        self.assertEqual(len(self.statements), 2)
+
+    def test_bulk_program_membership(self):
+        from salary_reader.core.control_models import apply_program_membership, plan_program_membership
+
+        # Программа Повар: e0, e3, ... e27. Оставляем e3, добавляем e2 (без программы), e1 (Бармен) и неизвестного
+        plan = plan_program_membership(self.session, self.cook_id, ["e3", "e2", "e1", "unknown"])
+        self.assertEqual(plan.to_add, ["e2"])
+        self.assertEqual(sorted(plan.to_remove), sorted(f"e{number}" for number in range(0, 30, 3) if number != 3))
+        self.assertEqual([(conflict.employee_id, conflict.program_name) for conflict in plan.conflicts],
+                         [("e1", "Бармен")])
+        self.assertEqual(plan.missing, ["unknown"])
+
+        apply_program_membership(self.session, self.cook_id, plan.to_add + ["e1"], plan.to_remove)
+        self.session.commit()
+        # Один SELECT и по одному UPDATE на каждое направление
+        self.assertEqual(sum(statement.lstrip().startswith(("SELECT", "UPDATE")) for statement in self.statements), 3)
+
+        members = self.session.scalars(select(Employee.id).where(Employee.motivation_program_id == self.cook_id))
+        self.assertEqual(sorted(members), ["e1", "e2", "e3"])
+
+    def test_threshold_diff(self):
+        from salary_reader.core.control_models import save_program_thresholds
+
+        self.session.add_all([MotivationThreshold(motivation_program_id=self.cook_id, revenue_threshold=revenue,
+                                                  salary=salary)
+                              for revenue, salary in ((0, 1000), (10000, 1500), (20000, 2000))])
+        self.session.commit()
+        self.statements.clear()
+
+        changes = save_program_thresholds(self.session, self.cook_id, {0: 1000, 10000: 1700, 30000: 2500})
+        self.session.commit()
+        self.assertEqual((changes.inserted, changes.updated, changes.deleted), (1, 1, 1))
+        # SELECT порогов, DELETE, UPDATE, INSERT, новая версия из счетчика (INSERT OR IGNORE и UPDATE)
+        # и UPDATE версии программы
+        self.assertEqual(len(self.statements), 7)
+
+        thresholds = self.session.execute(
+            select(MotivationThreshold.revenue_threshold, MotivationThreshold.salary)
+            .where(MotivationThreshold.motivation_program_id == self.cook_id)
+            .order_by(MotivationThreshold.revenue_threshold)
+        ).all()
+        self.assertEqual([tuple(row) for row in thresholds], [(0, 1000), (10000, 1700), (30000, 2500)])
+        self.assertEqual(self.session.get(MotivationProgram, self.cook_id).version, 2)
+
+        # Без изменений версия не увеличивается
+        self.assertFalse(save_program_thresholds(self.session, self.cook_id, {0: 1000, 10000: 1700, 30000: 2500}))
+        self.session.commit()
+        self.assertEqual(self.session.get(MotivationProgram, self.cook_id).version, 2)
+
+    def test_program_versions_do_not_repeat_after_delete(self):
+        from salary_reader.core.control_models import next_program_version
+
+        cook = self.session.get(MotivationProgram, self.cook_id)
+        cook.version = 5
+        self.session.flush()
+        # Счетчик начинается с наибольшей версии среди программ
+        self.assertEqual(next_program_version(self.session), 6)
+
+        # Программа с наибольшей версией удалена, ее версии больше не выдаются
+        self.session.delete(cook)
+        self.session.flush()
+        self.assertEqual(next_program_version(self.session), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from salary_reader.core.models import Base, Department, Employee
+from salary_reader.iiko_business_api.employees import IikoDirectory, sync_employees
+
+
+def _employee(employee_id: str, name: str, departments, code: str | None = None) -> dict:
+    return {"id": employee_id, "name": name, "code": code or employee_id, "mainRoleId": "r1",
+            "departmentCodes": departments}
+
+
+class EmployeeSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.session.add_all([Department(id="d1", code="1", name="Кухня"), Department(id="d2", code="2", name="Бар")])
+        self.session.commit()
+        self.roles = [{"id": "r1", "name": "Повар"}]
+
+    def tearDown(self):
+        self.session.close()
+
+    def _sync(self, employees: list[dict]):
+        stats = sync_employees(self.session, IikoDirectory(employees, self.roles))
+        self.session.commit()
+        self.session.expire_all()
+        return stats
+
+    def test_inserts_updates_and_deletes(self):
+        self._sync([_employee("e1", "Иван", "1"), _employee("e2", "Петр", ["1", "2"]), _employee("e3", "Анна", "2")])
+
+        stats = self._sync([
+            _employee("e1", "Иван", "1"),
+            _employee("e2", "Петр", ["2", "99"]),
+            _employee("e4", "Олег", "1"),
+            _employee("svc", "Служебный", None),
+        ])
+        self.assertEqual(tuple(stats), (1, 1, 1, 1))
+
+        employees = {employee.id: employee for employee in self.session.query(Employee)}
+        self.assertEqual(sorted(employees), ["e1", "e2", "e4"])
+        self.assertEqual([department.code for department in employees["e2"].departments], ["2"])
+        self.assertEqual(employees["e4"].position, "Повар")
+
+    def test_unchanged_directory_issues_no_writes(self):
+        employees = [_employee("e1", "Иван", ["2", "1"]), _employee("e2", "Петр", "1")]
+        self._sync(employees)
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        stats = self._sync(employees)
+
+        self.assertEqual(tuple(stats), (0, 0, 0, 2))
+        self.assertFalse([statement for statement in statements if not statement.lstrip().startswith("SELECT")])
+
+
+if __name__ == "__main__":
+    unittest.main()
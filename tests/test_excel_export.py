@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from salary_reader.drivers.excel_export import DETAIL_SHEET_TITLE, SUMMARY_SHEET_TITLE, ExcelExportData, \
+    write_salary_workbook
+from salary_reader.drivers.general_table_model import COLUMN_KEYS, HEADERS
+
+
+def _summary_row(name: str, salary: int, advances: str) -> list:
+    row = {key: 0 for key in COLUMN_KEYS}
+    row.update({"name": name, "full_name": name, "salary": salary, "role": "Повар", "departments": "Кухня",
+                "code": "007", "id": "id-" + name, "advances": advances})
+    return [row[key] for key in COLUMN_KEYS]
+
+
+def _detail(day: int, salary: int) -> dict:
+    return {"date": date(2025, 3, day), "shift_type": "Полная", "period": "10:00 - 22:00", "salary": salary,
+            "is_taxi_paid": day % 2 == 0, "warning": False}
+
+
+class ExcelExportTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "salary_table.xlsx"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_typed_summary_and_detail(self):
+        data = ExcelExportData(
+            summary_rows=[_summary_row("Иванов", 3000, "500"), _summary_row("Петров", 1500, "нет")],
+            warnings=[False, True],
+            details=[("Иван Иванов", "007", [_detail(1, 1500), _detail(2, 1500)]), ("Петр Петров", "008", [])],
+        )
+        progress = []
+        write_salary_workbook(self.path, data, report=lambda percent, message: progress.append(percent))
+
+        workbook = load_workbook(self.path)
+        self.assertEqual(workbook.sheetnames, [SUMMARY_SHEET_TITLE, DETAIL_SHEET_TITLE])
+        summary = workbook[SUMMARY_SHEET_TITLE]
+        self.assertEqual([cell.value for cell in summary[1]], list(HEADERS))
+        row = {key: cell.value for key, cell in zip(COLUMN_KEYS, summary[2])}
+        self.assertEqual(row["salary"], 3000)
+        self.assertEqual(row["advances"], 500)
+        self.assertEqual(row["code"], "007")
+        self.assertEqual(summary.cell(3, COLUMN_KEYS.index("advances") + 1).value, "нет")
+
+        detail = workbook[DETAIL_SHEET_TITLE]
+        self.assertEqual(detail.max_row, 3)
+        self.assertEqual(detail["C2"].value.date(), date(2025, 3, 1))
+        self.assertEqual([detail["F2"].value, detail["G2"].value, detail["G3"].value], [1500, 0, 200])
+        self.assertEqual(progress[-1], 100)
+
+    def test_detail_continues_on_next_sheet(self):
+        data = ExcelExportData(
+            summary_rows=[_summary_row("Иванов", 0, "0")],
+            warnings=[False],
+            details=[("Иван Иванов", "007", [_detail(day, 0) for day in range(1, 6)])],
+        )
+        write_salary_workbook(self.path, data, max_sheet_rows=3)
+
+        workbook = load_workbook(self.path)
+        self.assertEqual(workbook.sheetnames[1:], [DETAIL_SHEET_TITLE, f"{DETAIL_SHEET_TITLE} (2)",
+                                                  f"{DETAIL_SHEET_TITLE} (3)"])
+        self.assertEqual([workbook[name].max_row for name in workbook.sheetnames[1:]], [3, 3, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from datetime import date, datetime
+
+from requests.exceptions import HTTPError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from salary_reader.core.models import Base, Employee
+from salary_reader.iiko_business_api.employees import IikoDirectory, sync_employees
+from salary_reader.iiko_init.session import IikoSessionLease
+from salary_reader.testing.fake_iiko import (
+    FakeIikoApi, FakeIikoDataset, FakeIikoServer, FaultInjection, add_departments, generate_dataset,
+)
+
+
+class FakeIikoTests(unittest.TestCase):
+    def setUp(self):
+        self.dataset = generate_dataset(departments=2, employees=5, days=10, seed=1)
+        self.api = FakeIikoApi(FakeIikoServer(self.dataset))
+
+    def test_dataset_is_reproducible_and_realistic(self):
+        self.assertEqual(FakeIikoDataset.from_json(self.dataset.to_json()), self.dataset)
+        self.assertEqual(generate_dataset(departments=2, employees=5, days=10, seed=1), self.dataset)
+        self.assertEqual(len(self.dataset.employees), 2 * (5 + 1))
+        self.assertTrue(any(
+            datetime.fromisoformat(a["dateTo"]).date() > datetime.fromisoformat(a["dateFrom"]).date()
+            for a in self.dataset.attendances
+        ))
+
+    def test_requests_need_a_session(self):
+        with self.assertRaises(HTTPError) as error:
+            self.api.roles.get_roles()
+        self.assertEqual(error.exception.response.status_code, 401)
+
+        lease = IikoSessionLease(self.api)
+        lease.acquire()
+        self.api.server.expire_session()
+        self.assertEqual(len(lease.call(self.api.roles.get_roles)), 5)
+        self.assertEqual(self.api.server.calls["auth"], 2)
+
+    def test_attendances_and_sales_are_filtered_by_period(self):
+        self.api.client.login()
+        department = self.dataset.departments[0]
+        attendances = self.api.employees.get_attendances_for_department(
+            department_code=department["code"], date_from=date(2025, 3, 2), date_to=date(2025, 3, 3))
+        self.assertTrue(attendances)
+        for attendance in attendances:
+            self.assertEqual(attendance["departmentCode"], department["code"])
+            self.assertLessEqual(attendance["dateFrom"][:10], "2025-03-03")
+            self.assertGreaterEqual(attendance["dateTo"][:10], "2025-03-02")
+
+        sales = self.api.reports.get_sales_report(date_from=date(2025, 3, 2), date_to=date(2025, 3, 3),
+                                                  department_id=department["id"])
+        self.assertEqual(sorted(sales), [date(2025, 3, 2), date(2025, 3, 3)])
+
+    def test_error_injection(self):
+        api = FakeIikoApi(FakeIikoServer(self.dataset, FaultInjection(error_rate=1.0, error_status=503)))
+        with self.assertRaises(HTTPError) as error:
+            api.client.login()
+        self.assertEqual(error.exception.response.status_code, 503)
+
+    def test_directory_syncs_into_db(self):
+        self.api.client.login()
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            add_departments(session, self.dataset)
+            directory = IikoDirectory(self.api.employees.get_employees(), self.api.roles.get_roles())
+            stats = sync_employees(session, directory)
+            session.commit()
+            self.assertEqual(stats.inserted, 10)
+            self.assertEqual(session.query(Employee).count(), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
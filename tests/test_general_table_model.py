@@ -0,0 +1,53 @@
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, Qt
+
+from salary_reader.drivers.general_table_model import COLUMN_KEYS, GeneralTableModel, WARNING_BACKGROUND
+
+
+def _row(employee_id: str, salary: int, warnings: bool = False) -> dict:
+    row = dict.fromkeys(COLUMN_KEYS, 0)
+    row.update({"id": employee_id, "name": employee_id, "salary": salary, "warnings": warnings})
+    return row
+
+
+class GeneralTableModelTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.model = GeneralTableModel()
+        self.model.set_rows([_row("a", 900), _row("b", 10_000, warnings=True), _row("c", 1500)])
+        self.salary = COLUMN_KEYS.index("salary")
+        self.on_card = COLUMN_KEYS.index("on_card")
+
+    def test_display_and_background(self):
+        self.assertEqual(self.model.rowCount(), 3)
+        self.assertEqual(self.model.columnCount(), 24)
+        self.assertEqual(self.model.data(self.model.index(1, self.salary)), "10000")
+        self.assertEqual(self.model.data(self.model.index(1, 0), Qt.ItemDataRole.BackgroundRole), WARNING_BACKGROUND)
+        self.assertIsNone(self.model.data(self.model.index(0, 0), Qt.ItemDataRole.BackgroundRole))
+
+    def test_only_adjustments_are_editable(self):
+        self.assertFalse(self.model.setData(self.model.index(0, self.salary), "1"))
+        self.assertTrue(self.model.setData(self.model.index(0, self.on_card), " 1500.50 "))
+        self.assertEqual(self.model.adjustments(0)["on_card"], "1500.50")
+        self.assertEqual(self.model.adjustments(1)["on_card"], "0")
+
+    def test_sort_is_numeric_and_keeps_adjustments(self):
+        self.model.setData(self.model.index(0, self.on_card), "700")
+        self.model.sort(self.salary, Qt.SortOrder.DescendingOrder)
+        self.assertEqual([self.model.row_data(row)["id"] for row in range(3)], ["b", "c", "a"])
+        self.assertEqual(self.model.adjustments(2)["on_card"], "700")
+
+        values = list(self.model.iter_values())
+        self.assertEqual(values[0][COLUMN_KEYS.index("id")], "b")
+        self.assertEqual(values[2][self.on_card], "700")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import time
+import unittest
+
+from salary_reader.iiko_init import run_concurrently
+
+
+class RunConcurrentlyTests(unittest.TestCase):
+    def test_runs_calls_at_the_same_time(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def request(name):
+            barrier.wait()
+            return name
+
+        results = run_concurrently([lambda: request("attendances"), lambda: request("sales")], max_workers=2)
+        self.assertEqual(results, ["attendances", "sales"])
+
+    def test_sequential_when_limited(self):
+        threads = []
+        results = run_concurrently([lambda: threads.append(threading.get_ident()) or 1,
+                                    lambda: threads.append(threading.get_ident()) or 2], max_workers=1)
+        self.assertEqual(results, [1, 2])
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+    def test_failure_waits_for_running_calls(self):
+        started = threading.Event()
+        finished = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.1)
+            finished.set()
+            return "sales"
+
+        def failing():
+            started.wait(5)
+            raise ConnectionError("iiko недоступен")
+
+        with self.assertRaises(ConnectionError):
+            run_concurrently([failing, slow], max_workers=2)
+        # Ошибка выбрасывается только после завершения запроса, который уже выполнялся
+        self.assertTrue(finished.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
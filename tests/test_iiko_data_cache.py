@@ -0,0 +1,62 @@
+import unittest
+from datetime import date, datetime
+
+from salary_reader.iiko_business_api.data_cache import IikoDataCache, split_into_ranges
+
+
+class IikoDataCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = IikoDataCache("sqlite://")
+        self.night_shift = {"employeeId": "e1", "dateFrom": "2025-03-01T20:00:00", "dateTo": "2025-03-02T04:00:00"}
+        self.day_shift = {"employeeId": "e2", "dateFrom": "2025-03-02T10:00:00", "dateTo": "2025-03-02T22:00:00"}
+        self.open_shift = {"employeeId": "e3", "dateFrom": "2025-03-03T10:00:00"}
+
+    def test_split_into_ranges(self):
+        days = [date(2025, 3, 5), date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 4)]
+        self.assertEqual(split_into_ranges(days), [
+            (date(2025, 3, 1), date(2025, 3, 2)),
+            (date(2025, 3, 4), date(2025, 3, 5)),
+        ])
+
+    def test_only_open_and_missing_days_are_fetched(self):
+        self.cache.store(
+            "1", date(2025, 3, 1), date(2025, 3, 3),
+            [self.night_shift, self.day_shift, self.open_shift],
+            {date(2025, 3, 1): 100_000, date(2025, 3, 2): 150_000},
+            fetched_at=datetime(2025, 3, 3, 12, 0),
+        )
+        # 3 марта еще идет и в нем открытая явка, 4 марта нет в кэше, 2 марта закрыто
+        self.assertEqual(self.cache.days_to_fetch("1", date(2025, 3, 1), date(2025, 3, 4)),
+                         [date(2025, 3, 3), date(2025, 3, 4)])
+        self.assertEqual(self.cache.days_to_fetch("2", date(2025, 3, 1), date(2025, 3, 1)), [date(2025, 3, 1)])
+
+    def test_day_is_not_closed_right_after_midnight(self):
+        self.cache.store("1", date(2025, 3, 2), date(2025, 3, 2), [self.day_shift], {},
+                         fetched_at=datetime(2025, 3, 3, 1, 0))
+        self.assertEqual(self.cache.days_to_fetch("1", date(2025, 3, 2), date(2025, 3, 2)), [date(2025, 3, 2)])
+
+    def test_load_merges_days_without_duplicates(self):
+        self.cache.store("1", date(2025, 3, 1), date(2025, 3, 2), [self.night_shift, self.day_shift],
+                         {date(2025, 3, 1): 100_000}, fetched_at=datetime(2025, 3, 10))
+        attendances, sales = self.cache.load("1", date(2025, 3, 1), date(2025, 3, 2))
+        self.assertEqual(attendances, [self.night_shift, self.day_shift])
+        self.assertEqual(sales, {date(2025, 3, 1): 100_000})
+
+        # Явка через полночь попадает и в период из одного следующего дня
+        attendances, _ = self.cache.load("1", date(2025, 3, 2), date(2025, 3, 2))
+        self.assertEqual(attendances, [self.night_shift, self.day_shift])
+
+    def test_refetched_day_replaces_records(self):
+        self.cache.store("1", date(2025, 3, 3), date(2025, 3, 3), [self.open_shift], {},
+                         fetched_at=datetime(2025, 3, 3, 12, 0))
+        closed = dict(self.open_shift, dateTo="2025-03-03T21:00:00")
+        self.cache.store("1", date(2025, 3, 3), date(2025, 3, 3), closed, {date(2025, 3, 3): 90_000},
+                         fetched_at=datetime(2025, 3, 4, 12, 0))
+        attendances, sales = self.cache.load("1", date(2025, 3, 3), date(2025, 3, 3))
+        self.assertEqual(attendances, [closed])
+        self.assertEqual(sales, {date(2025, 3, 3): 90_000})
+        self.assertEqual(self.cache.days_to_fetch("1", date(2025, 3, 3), date(2025, 3, 3)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from salary_reader.iiko_business_api import employees
+from salary_reader.iiko_business_api.employees import IikoDirectory, get_iiko_directory
+
+
+class IikoDirectoryTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = IikoDirectory(
+            employees=[{"id": "e1", "name": "cook", "mainRoleId": "r1"}, {"name": "no id"}],
+            roles=[{"id": "r1", "name": "Повар"}],
+        )
+
+    def tearDown(self):
+        employees._last_directory = None
+
+    def test_maps_by_id(self):
+        self.assertEqual(self.directory.get_employee("e1")["name"], "cook")
+        self.assertEqual(self.directory.get_role("r1")["name"], "Повар")
+        self.assertIsNone(self.directory.get_employee("e2"))
+        self.assertEqual(len(self.directory.employees), 1)
+
+    def test_reuses_fresh_directory(self):
+        employees._last_directory = self.directory
+        with mock.patch.object(employees, "fetch_iiko_directory") as fetch:
+            self.assertIs(get_iiko_directory(["e1"]), self.directory)
+        fetch.assert_not_called()
+
+    def test_refetches_when_employee_missing_or_stale(self):
+        employees._last_directory = self.directory
+        with mock.patch.object(employees, "fetch_iiko_directory") as fetch:
+            get_iiko_directory(["e2"])
+            get_iiko_directory(["e1"], max_age=-1)
+        self.assertEqual(fetch.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from types import SimpleNamespace
+
+from requests import Response
+from requests.exceptions import HTTPError
+
+from salary_reader.iiko_init.session import IikoSessionLease
+
+
+class FakeClient:
+    def __init__(self):
+        self.logins = 0
+        self.logouts = 0
+
+    def login(self):
+        self.logins += 1
+
+    def logout(self):
+        self.logouts += 1
+
+
+def _http_error(status_code: int) -> HTTPError:
+    response = Response()
+    response.status_code = status_code
+    return HTTPError(response=response)
+
+
+class IikoSessionLeaseTests(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.lease = IikoSessionLease(SimpleNamespace(client=self.client), ttl=600)
+
+    def test_session_is_reused_between_blocks(self):
+        for _ in range(3):
+            self.lease.acquire()
+            self.lease.release()
+        self.assertEqual((self.client.logins, self.client.logouts), (1, 0))
+
+    def test_idle_session_is_renewed_after_ttl(self):
+        self.lease.ttl = 0
+        self.lease.acquire()
+        self.lease.release()
+        self.lease.acquire()
+        self.lease.release()
+        self.assertEqual((self.client.logins, self.client.logouts), (2, 1))
+
+    def test_session_in_use_is_not_renewed(self):
+        self.lease.ttl = 0
+        self.lease.acquire()
+        self.lease.acquire()
+        self.assertEqual(self.client.logins, 1)
+
+    def test_unauthorized_request_is_retried_once(self):
+        self.lease.acquire()
+        responses = [_http_error(401), "ok"]
+
+        def request():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.assertEqual(self.lease.call(request), "ok")
+        self.assertEqual(self.client.logins, 2)
+
+        def forbidden():
+            raise _http_error(403)
+
+        with self.assertRaises(HTTPError):
+            self.lease.call(forbidden)
+        self.assertEqual(self.client.logins, 2)
+
+    def test_close_logs_out_once(self):
+        self.lease.acquire()
+        self.lease.release()
+        self.lease.close()
+        self.lease.close()
+        self.assertEqual(self.client.logouts, 1)
+        self.assertFalse(self.lease.logged_in)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from salary_reader.core.logging_config import BackgroundLogWriter
+
+
+_WORKER_MAIN = """
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from salary_reader.core import logging_config
+
+logger = logging_config.get_logger(__name__, filepath=sys.argv[1])
+logger.info("импорт модуля")
+
+
+def has_file_writer():
+    logging_config.get_logger(__name__, filepath=sys.argv[1]).info("сообщение из процесса пула")
+    return bool(logging_config._writers)
+
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                             initializer=logging_config.configure_worker_logging) as executor:
+        print(executor.submit(has_file_writer).result())
+"""
+
+
+class BackgroundLogWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "app.log"
+        self.writer = BackgroundLogWriter(self.path)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.tmp.cleanup()
+
+    def test_failed_rollover_reopens_file_and_keeps_console(self):
+        handler = self.writer._file_handler
+
+        def failed_rollover():
+            # Как TimedRotatingFileHandler.doRollover: файл закрыт, переименование не удалось
+            handler.stream.close()
+            handler.stream = None
+            raise PermissionError("файл занят другим процессом")
+
+        stderr = io.StringIO()
+        with mock.patch.object(handler, "shouldRollover", return_value=True), \
+                mock.patch.object(handler, "doRollover", failed_rollover), \
+                mock.patch("sys.stderr", stderr):
+            self.writer._write([(True, "в файл\n"), (False, "в консоль\n")])
+
+        self.assertIn("в консоль", stderr.getvalue())
+        self.assertIn("файл занят другим процессом", stderr.getvalue())
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "в файл\n")
+
+    def test_file_error_does_not_lose_console_output(self):
+        stderr = io.StringIO()
+        with mock.patch.object(self.writer, "_write_file", side_effect=OSError("диск заполнен")), \
+                mock.patch("sys.stderr", stderr):
+            self.writer._write([(True, "в файл\n"), (False, "в консоль\n")])
+
+        self.assertIn("в консоль", stderr.getvalue())
+        self.assertIn("диск заполнен", stderr.getvalue())
+
+
+class WorkerLoggingTests(unittest.TestCase):
+    def test_spawned_worker_does_not_open_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "app.log"
+            script = Path(tmp) / "app_main.py"
+            # Модуль __main__ пишет в лог при импорте, как startup.py: процесс spawn импортирует его заново
+            # до initializer пула
+            script.write_text(_WORKER_MAIN, encoding="utf-8")
+            result = subprocess.run(
+                [sys.executable, str(script), str(log_path)],
+                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+                capture_output=True, text=True, timeout=60,
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.strip(), "False")
+            self.assertEqual(log_path.read_text(encoding="utf-8").count("импорт модуля"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
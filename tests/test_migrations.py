@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect
+
+from salary_reader.core.migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+from salary_reader.core.models import Base
+
+INDEXES = {
+    "employees": {"ix_employees_motivation_program_id"},
+    "motivate_thresholds": {"ix_motivate_thresholds_program_revenue"},
+    "employee_department_association": {"ix_employee_department_association_employee_id",
+                                        "ix_employee_department_association_department_code"},
+    "motivation_programs": {"ix_motivation_programs_department_code"},
+}
+
+
+class MigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{Path(self.directory.name) / 'salary_reader.db'}")
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def _indexes(self) -> dict[str, set[str]]:
+        inspector = inspect(self.engine)
+        return {table: {index["name"] for index in inspector.get_indexes(table)} for table in INDEXES}
+
+    def test_adds_indexes_to_existing_database(self):
+        # БД, созданная до появления индексов: версия 0 и только автоматические индексы
+        with self.engine.begin() as connection:
+            for names in INDEXES.values():
+                for name in names:
+                    connection.exec_driver_sql(f"DROP INDEX {name}")
+
+        self.assertEqual(migrate(self.engine), SCHEMA_VERSION)
+        self.assertEqual(self._indexes(), INDEXES)
+        with self.engine.connect() as connection:
+            self.assertEqual(get_schema_version(connection), SCHEMA_VERSION)
+
+    def test_adds_program_version_to_existing_database(self):
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql("INSERT INTO departments (id, code, name) VALUES ('d1', '1', 'Кухня')")
+            connection.exec_driver_sql("INSERT INTO motivation_programs (name, department_code) VALUES ('Повар', '1')")
+            connection.exec_driver_sql("ALTER TABLE motivation_programs DROP COLUMN version")
+            connection.exec_driver_sql("PRAGMA user_version = 1")
+
+        self.assertEqual(migrate(self.engine), SCHEMA_VERSION)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql("SELECT version FROM motivation_programs").scalar_one(), 1)
+
+    def test_new_database_is_migrated_idempotently(self):
+        self.assertEqual(self._indexes(), INDEXES)
+        self.assertEqual(migrate(self.engine), MIGRATIONS[-1].version)
+        self.assertEqual(migrate(self.engine), MIGRATIONS[-1].version)
+        self.assertEqual(self._indexes(), INDEXES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from datetime import date
+
+from salary_reader.drivers.payroll_cache import PayrollCache, PayrollKey
+from salary_reader.drivers.salary import ShiftType
+
+PERIOD = (date(2025, 3, 1), date(2025, 3, 15))
+
+
+class PayrollCacheTests(unittest.TestCase):
+    def test_load_returns_rows_with_matching_key(self):
+        cache = PayrollCache("sqlite://")
+        row = {
+            "warnings": False,
+            "full_shifts_count": 1,
+            "total_duration_seconds": 43200.0,
+            "shifts": {date(2025, 3, 1): {"shift_type": ShiftType.FULL, "hours_duration": 12.0}},
+            "salary": 1200,
+            "day_salaries": {date(2025, 3, 1): 1200},
+            "days": [{"date": date(2025, 3, 1), "shift_type": "ПОЛНАЯ", "period": "10:00 - 22:00",
+                      "salary": 1200, "is_taxi_paid": True, "warning": False}],
+        }
+        keys = {"e1": PayrollKey("a", "r", 1, 1), "e2": PayrollKey("b", "r", 1, 1)}
+        cache.store(*PERIOD, keys, {"e1": row, "e2": dict(row, salary=600)})
+
+        self.assertEqual(cache.load(*PERIOD, keys), {"e1": row, "e2": dict(row, salary=600)})
+        # Новая версия программы у e1, другой период - строки не подходят
+        changed = dict(keys, e1=keys["e1"]._replace(program_version=2))
+        self.assertEqual(list(cache.load(*PERIOD, changed)), ["e2"])
+        self.assertEqual(cache.load(date(2025, 3, 1), date(2025, 3, 31), keys), {})
+
+        # Пересчет заменяет прежнюю запись
+        cache.store(*PERIOD, changed, {"e1": dict(row, salary=2400)})
+        self.assertEqual(cache.load(*PERIOD, changed)["e1"]["salary"], 2400)
+        self.assertNotIn("e1", cache.load(*PERIOD, keys))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta
+
+from salary_reader.drivers.attendance_list import AttendancesList, parse_api_attendance
+from salary_reader.drivers.payroll_engine import AttendanceColumns, compute_payroll
+from salary_reader.drivers.salary import ThresholdIndex, calculate_salaries
+
+
+def _random_attendances(rng: random.Random, employees: list[str], first_day: date, days: int) -> list[dict]:
+    records = []
+    for employee_id in employees:
+        for offset in range(-1, days + 1):
+            if rng.random() < 0.3:
+                continue
+            for _ in range(rng.choice((1, 1, 1, 2))):
+                start = datetime.combine(first_day + timedelta(days=offset), datetime.min.time()) + timedelta(
+                    hours=rng.randint(5, 23), minutes=rng.randint(0, 59), seconds=rng.choice((0, 0, 30)))
+                end = start + timedelta(hours=rng.randint(0, 15), minutes=rng.randint(0, 59))
+                record = {"employeeId": employee_id, "dateFrom": start.isoformat()}
+                if rng.random() > 0.05:
+                    record["dateTo"] = end.isoformat()
+                records.append(record)
+    rng.shuffle(records)
+    return records
+
+
+def _reference_rows(records, period_from, period_to, sales, thresholds):
+    attendances = AttendancesList()
+    for record in records:
+        attendance = parse_api_attendance(record, period_from, period_to)
+        if attendance is not None:
+            attendances.add_attendance(attendance)
+
+    rows = {}
+    for employee_id in attendances.attendances:
+        data = attendances.get_general_row_data(employee_id)
+        shifts = list(data["shifts"].items())
+        salaries = calculate_salaries(
+            (thresholds[employee_id], sales.get(date_, 0), shift["hours_duration"] * 3600)
+            for date_, shift in shifts
+        )
+        data["salary"] = sum(salaries)
+        data["from_1_salary"] = sum(s for (d, _), s in zip(shifts, salaries) if d.day <= 15)
+        data["from_16_salary"] = sum(s for (d, _), s in zip(shifts, salaries) if d.day >= 16)
+        rows[employee_id] = data
+    return rows
+
+
+class PayrollEngineTests(unittest.TestCase):
+    def test_matches_python_path(self):
+        rng = random.Random(42)
+        employees = [f"00000000-0000-0000-0000-{i:012d}" for i in range(12)]
+        period_from, period_to = date(2025, 1, 10), date(2025, 2, 20)
+        records = _random_attendances(rng, employees, period_from, (period_to - period_from).days)
+        sales = {period_from + timedelta(days=i): rng.randint(0, 400_000) for i in range(0, 42, 1) if i % 7}
+        cook = ThresholdIndex([(0, 2400), (150_000, 3000), (250_000, 3600)])
+        waiter = ThresholdIndex([(100_000, 1800), (300_000, 2500)])
+        thresholds = {employee_id: (cook if i % 2 else waiter) for i, employee_id in enumerate(employees)}
+
+        expected = _reference_rows(records, period_from, period_to, sales, thresholds)
+        result = compute_payroll(AttendanceColumns.from_api(records, period_from, period_to), sales, thresholds)
+
+        self.assertEqual(result.employee_ids, list(expected))
+        for employee_id, expected_row in expected.items():
+            self.assertEqual(result.row_data(employee_id), expected_row, employee_id)
+            self.assertEqual(list(result.shifts(employee_id)), list(expected_row["shifts"]))
+
+        # Расчет части сотрудников дает те же строки
+        selected = list(expected)[1::3]
+        partial = compute_payroll(AttendanceColumns.from_api(records, period_from, period_to).select(selected),
+                                  sales, thresholds)
+        self.assertEqual(partial.employee_ids, selected)
+        for employee_id in selected:
+            self.assertEqual(partial.row_data(employee_id), expected[employee_id], employee_id)
+            self.assertEqual(partial.day_salaries(employee_id), result.day_salaries(employee_id), employee_id)
+
+    def test_employee_filter_and_empty_input(self):
+        records = [
+            {"employeeId": "a", "dateFrom": "2025-03-01T09:50:00", "dateTo": "2025-03-01T22:30:00"},
+            {"employeeId": "b", "dateFrom": "2025-03-01T11:00:00", "dateTo": "2025-03-01T16:00:00"},
+        ]
+        columns = AttendanceColumns.from_api(records, employee_filter={"a"})
+        result = compute_payroll(columns, {date(2025, 3, 1): 100}, {"a": ThresholdIndex([(0, 1200)])})
+        row = result.row_data("a")
+        self.assertEqual(row["full_shifts_count_from_1"], 1)
+        self.assertEqual(row["taxi_paid_sum"], 200)
+        self.assertEqual(row["salary"], 1200)
+        self.assertNotIn("b", result)
+
+        empty = compute_payroll(AttendanceColumns.from_api([]), {}, {})
+        self.assertEqual(len(empty), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from salary_reader.core.errors import CardParseError
+from salary_reader.payslip_report import fragments
+from salary_reader.payslip_report.fragments import FragmentCache, PayslipInput, build_fragments
+
+DATE_FROM, DATE_TO = date(2025, 3, 1), date(2025, 3, 15)
+DEDUCTION = {"self": "", "revision": "100", "form": 0, "coffee": 0, "advances": "500"}
+
+
+def _input(employee_id: str, advances: str = "500", on_card="1000") -> PayslipInput:
+    rows = [
+        {"date": date(2025, 3, day), "shift_type": "Полная", "period": "10:00 - 22:00", "salary": 2000,
+         "is_taxi_paid": day == 1, "warning": False}
+        for day in (1, 2)
+    ]
+    return PayslipInput(employee_id, f"Сотрудник {employee_id}", rows, dict(DEDUCTION, advances=advances),
+                        bonus=300, on_card=on_card)
+
+
+class PayslipFragmentTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = FragmentCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_month_table(self):
+        [fragment] = build_fragments([_input("a")], DATE_FROM, DATE_TO)
+        [table] = fragment.tables
+        self.assertEqual(table[0], ["<b>Сотрудник a</b> - 01.03-15.03.2025"])
+        self.assertEqual(len(table), 2 + 15 + 6)
+        self.assertEqual(table[2], ["01.03.2025", "Полная", "10:00 - 22:00", "2000"])
+        self.assertEqual(table[-3], [0, "100", 0, 0, "500"])
+        # 4000 - 600 вычетов + 300 надбавок - 1000 на карту; в среднем (4000 + 200 такси + 300) / 2
+        self.assertEqual(table[-1], [1000.0, 300, 600, 2700, 2250.0])
+
+    def test_only_changed_employee_is_rebuilt(self):
+        inputs = [_input("a"), _input("b"), _input("c")]
+        first = build_fragments(inputs, DATE_FROM, DATE_TO, self.cache)
+
+        inputs[1] = _input("b", advances="700")
+        with mock.patch.object(fragments, "build_fragment", wraps=fragments.build_fragment) as build:
+            second = build_fragments(inputs, DATE_FROM, DATE_TO, self.cache)
+        self.assertEqual([call.args[0].employee_id for call in build.call_args_list], ["b"])
+        self.assertEqual([fragment.employee_id for fragment in second], ["a", "b", "c"])
+        self.assertEqual(second[0].tables, first[0].tables)
+        self.assertEqual(second[1].tables[0][-3][-1], "700")
+
+    def test_parallel_build_matches_serial(self):
+        inputs = [_input(str(number)) for number in range(6)]
+        serial = build_fragments(inputs, DATE_FROM, DATE_TO, max_workers=1)
+        parallel = build_fragments(inputs, DATE_FROM, DATE_TO, max_workers=2, parallel_min=1)
+        self.assertEqual([fragment.tables for fragment in parallel], [fragment.tables for fragment in serial])
+
+    def test_progress_and_cancel(self):
+        inputs = [_input(str(number)) for number in range(4)]
+        build_fragments(inputs[:1], DATE_FROM, DATE_TO, self.cache)
+
+        progress = []
+
+        def check_cancelled():
+            if len(progress) == 3:
+                raise RuntimeError("cancelled")
+
+        with self.assertRaises(RuntimeError):
+            build_fragments(inputs, DATE_FROM, DATE_TO, self.cache,
+                            report=lambda done, total: progress.append((done, total)), check_cancelled=check_cancelled)
+        # Первый фрагмент взят из кэша, два построены до отмены и сохранены в кэш
+        self.assertEqual(progress, [(1, 4), (2, 4), (3, 4)])
+        self.assertEqual(len(list(self.cache.directory.glob("*.json"))), 3)
+
+    def test_invalid_on_card(self):
+        with self.assertRaises(CardParseError):
+            build_fragments([_input("a", on_card="1 000,50")], DATE_FROM, DATE_TO, self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from salary_reader.drivers.salary import ShiftType, ThresholdIndex, calculate_salaries, calculate_shift_salary
+
+
+class ThresholdIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = ThresholdIndex([(200_000, 4000), (0, 2400), (100_000, 3000)])
+
+    def test_sorted_on_build(self):
+        self.assertEqual(self.index.revenues, (0, 100_000, 200_000))
+        self.assertEqual(self.index.salaries, (2400, 3000, 4000))
+
+    def test_lookup_picks_highest_reached_threshold(self):
+        self.assertEqual(self.index.lookup(0), 2400)
+        self.assertEqual(self.index.lookup(99_999), 2400)
+        self.assertEqual(self.index.lookup(100_000), 3000)
+        self.assertEqual(self.index.lookup(10_000_000), 4000)
+
+    def test_revenue_below_all_thresholds(self):
+        index = ThresholdIndex([(50_000, 3000)])
+        self.assertIsNone(index.lookup(49_999))
+        self.assertIsNone(index.find(0))
+        self.assertEqual(calculate_shift_salary(index, 0, 12 * 3600), 0)
+
+    def test_empty_index(self):
+        self.assertIsNone(ThresholdIndex().lookup(100))
+
+
+class CalculateSalaryTests(unittest.TestCase):
+    def setUp(self):
+        self.index = ThresholdIndex([(0, 2400), (100_000, 3000)])
+
+    def test_per_hour(self):
+        self.assertEqual(calculate_shift_salary(self.index, 150_000, 6 * 3600), 1500)
+        self.assertEqual(calculate_shift_salary(self.index, 150_000, 7.5 * 3600), int(3000 / 12 * 7.5))
+
+    def test_per_hour_capped_at_12_hours(self):
+        self.assertEqual(calculate_shift_salary(self.index, 150_000, 14 * 3600), 3000)
+
+    def test_zero_duration(self):
+        self.assertEqual(calculate_shift_salary(self.index, 150_000, 0), 0)
+
+    def test_by_shift_type(self):
+        self.assertEqual(
+            calculate_shift_salary(self.index, 150_000, 10 * 3600, ShiftType.FULL, per_hour=False), 3000)
+        self.assertEqual(
+            calculate_shift_salary(self.index, 150_000, 5 * 3600, ShiftType.HALF, per_hour=False), 1500)
+        self.assertEqual(
+            calculate_shift_salary(self.index, 150_000, 1 * 3600, ShiftType.WARNING, per_hour=False), 0)
+
+    def test_batch_matches_single(self):
+        items = [
+            (self.index, 0, 10 * 3600),
+            (self.index, 120_000, 5.5 * 3600),
+            (self.index, 120_000, 13 * 3600),
+            (None, 120_000, 10 * 3600),
+            (self.index, 120_000, 0),
+        ]
+        expected = [
+            calculate_shift_salary(index, revenue, duration) if index else 0
+            for index, revenue, duration in items
+        ]
+        self.assertEqual(calculate_salaries(items), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import threading
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, QThreadPool
+
+from salary_reader.workers.salary_refresh import SalaryRefreshPipeline
+
+
+class FakeDriver:
+    def __init__(self, gate: threading.Event | None = None, error: Exception | None = None):
+        self.gate = gate
+        self.error = error
+        self.period = None
+        self.rows = None
+        self.threads = set()
+
+    def detached(self):
+        return FakeDriver(self.gate, self.error)
+
+    def fetch_data(self, date_from, date_to, department_code):
+        self.threads.add(threading.get_ident())
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        self.period = (date_from, date_to, department_code)
+        return True
+
+    def prepare_data(self):
+        self.threads.add(threading.get_ident())
+
+    def get_general_table_rows(self):
+        return [{"id": self.period[2]}]
+
+    def adopt(self, other):
+        self.period = other.period
+        self.threads = other.threads
+
+    def fill_general_table(self, rows):
+        self.rows = rows
+
+
+class SalaryRefreshPipelineTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.pool = QThreadPool()
+        self.events = []
+
+    def _pipeline(self, driver):
+        pipeline = SalaryRefreshPipeline(driver, thread_pool=self.pool)
+        pipeline.progress.connect(lambda percent, message: self.events.append(("progress", percent)))
+        pipeline.finished.connect(lambda: self.events.append(("finished",)))
+        pipeline.failed.connect(lambda error: self.events.append(("failed", str(error))))
+        return pipeline
+
+    def _drain(self):
+        self.pool.waitForDone(5000)
+        QCoreApplication.processEvents()
+
+    def test_computes_off_gui_thread_and_renders_result(self):
+        driver = FakeDriver()
+        pipeline = self._pipeline(driver)
+        pipeline.start("2025-01-01", "2025-01-15", "1")
+        self._drain()
+
+        self.assertEqual(driver.rows, [{"id": "1"}])
+        self.assertNotIn(threading.get_ident(), driver.threads)
+        self.assertEqual(self.events[-1], ("finished",))
+        self.assertIn(("progress", 100), self.events)
+        self.assertFalse(pipeline.is_running)
+
+    def test_new_refresh_discards_stale_result(self):
+        gate = threading.Event()
+        driver = FakeDriver(gate)
+        pipeline = self._pipeline(driver)
+        pipeline.start("2025-01-01", "2025-01-15", "stale")
+        pipeline.start("2025-01-01", "2025-01-15", "fresh")
+        gate.set()
+        self._drain()
+
+        self.assertEqual(driver.rows, [{"id": "fresh"}])
+        self.assertEqual(self.events.count(("finished",)), 1)
+
+    def test_cancel_keeps_current_data(self):
+        gate = threading.Event()
+        driver = FakeDriver(gate)
+        pipeline = self._pipeline(driver)
+        pipeline.start("2025-01-01", "2025-01-15", "1")
+        pipeline.cancel()
+        gate.set()
+        self._drain()
+
+        self.assertIsNone(driver.rows)
+        self.assertNotIn(("finished",), self.events)
+
+    def test_failure_is_reported(self):
+        driver = FakeDriver(error=ValueError("Дата начала периода больше даты окончания периода"))
+        pipeline = self._pipeline(driver)
+        pipeline.start("2025-01-15", "2025-01-01", "1")
+        self._drain()
+
+        self.assertEqual(self.events[-1], ("failed", "Дата начала периода больше даты окончания периода"))
+        self.assertIsNone(driver.rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from salary_reader.core.startup_timing import StartupTimer
+
+
+class StartupTimerTests(unittest.TestCase):
+    def test_marks_are_recorded_once_and_dumped(self):
+        timer = StartupTimer(started_at=0.0)
+        first = timer.mark("first_paint")
+        self.assertEqual(timer.mark("first_paint"), first)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "startup.json"
+            timer.dump(path)
+            self.assertEqual(list(json.loads(path.read_text(encoding="utf-8"))), ["first_paint"])
+
+
+if __name__ == "__main__":
+    unittest.main()